@@ -0,0 +1,243 @@
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+import git
+from codeace import FileScanner
+
+
+class CloneJob:
+    """
+    A clone or update of a repository running in the background.
+    status is 'running', 'done' or 'failed'; progress (0-1) and message follow git's progress output.
+    """
+
+    def __init__(self, repo_url: str, repo_path: str, action: str):
+        self.repo_url = repo_url
+        self.repo_path = repo_path
+        # 'clone' or 'update'
+        self.action = action
+        self.status = "running"
+        self.progress = 0.0
+        self.message = "Starting..."
+        # Files added, modified or deleted by an update (relative to repo_path)
+        self.changed_files: List[str] = []
+        self.error: Optional[BaseException] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status != "running"
+
+    def summary(self) -> str:
+        """A one-line outcome of the job, for status messages"""
+        if self.status == "running":
+            return f"{self.message} ({self.progress:.0%})"
+        if self.status == "failed":
+            return f"Error {'cloning' if self.action == 'clone' else 'updating'} repository: {str(self.error)}"
+        if self.action == "clone":
+            return f"Repository cloned successfully to {self.repo_path}"
+        if not self.changed_files:
+            return f"Repository at {self.repo_path} is up to date"
+        return f"Repository at {self.repo_path} updated, {len(self.changed_files)} files changed"
+
+
+class _JobProgress(git.RemoteProgress):
+    """Forwards git's progress lines to a CloneJob"""
+
+    STAGES = {
+        git.RemoteProgress.COUNTING: "Counting objects",
+        git.RemoteProgress.COMPRESSING: "Compressing objects",
+        git.RemoteProgress.RECEIVING: "Receiving objects",
+        git.RemoteProgress.RESOLVING: "Resolving deltas",
+        git.RemoteProgress.CHECKING_OUT: "Checking out files",
+    }
+
+    def __init__(self, job: CloneJob):
+        super().__init__()
+        self.job = job
+
+    def update(self, op_code, cur_count, max_count=None, message=''):
+        stage = self.STAGES.get(op_code & self.OP_MASK, "Transferring")
+        if max_count:
+            self.job.progress = min(float(cur_count) / float(max_count), 1.0)
+            self.job.message = f"{stage}: {int(cur_count)}/{int(max_count)}"
+        else:
+            self.job.message = f"{stage}: {int(cur_count)}"
+
+
+class CloneManager:
+    """
+    Clones repositories into repos_dir and keeps them up to date, on a background thread pool.
+    - New repositories are cloned shallow (depth 1, single branch). With sparse_extensions, only files with
+      those extensions (plus ignore files) are checked out, and blobs are fetched on demand (partial clone),
+      so large repositories cost about as much as the code CodeAce maps.
+    - Existing clones are updated with a fetch and a fast-forward of the checked out branch; the job reports
+      the changed files (unchanged files keep their mapping, as mapping is incremental).
+    Works with any URL git understands, including file:// URLs of local repositories.
+    """
+
+    # Always checked out in a sparse clone - the scanner reads them
+    SPARSE_ALWAYS = ('.gitignore', FileScanner.PROJECT_IGNORE_FILE)
+
+    def __init__(self, repos_dir: str, depth: int = 1, sparse_extensions: Iterable[str] = None,
+                 max_workers: int = 2):
+        """
+        Args:
+            repos_dir (str): Where repositories are cloned
+            depth (int): History depth of new clones (0 for the full history)
+            sparse_extensions (Iterable[str]): Only check out these file extensions (None for all files)
+            max_workers (int): Clones and updates running at the same time
+        """
+        self.repos_dir = repos_dir
+        self.depth = depth
+        self.sparse_extensions = tuple(sparse_extensions) if sparse_extensions else None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="codeace-clone")
+        self._lock = threading.Lock()
+        # repo path -> the last job started for it
+        self._jobs: Dict[str, CloneJob] = {}
+
+    def get_repo_path(self, repo_url: str) -> str:
+        repo_name = repo_url.rstrip("/").split("/")[-1].replace(".git", "")
+        return os.path.join(self.repos_dir, repo_name)
+
+    @staticmethod
+    def is_repository(path: str) -> bool:
+        return os.path.isdir(os.path.join(path, ".git"))
+
+    def is_managed(self, path: str) -> bool:
+        """Whether path is a repository cloned into repos_dir"""
+        repos_dir = os.path.abspath(self.repos_dir)
+        return os.path.dirname(os.path.abspath(path)) == repos_dir and self.is_repository(path)
+
+    def get_job(self, repo_path: str) -> Optional[CloneJob]:
+        with self._lock:
+            return self._jobs.get(repo_path)
+
+    def start(self, repo_url: str) -> CloneJob:
+        """
+        Clone a repository in the background, or update it if it was cloned before.
+        Returns the running job if the repository is already being cloned or updated.
+        """
+        repo_path = self.get_repo_path(repo_url)
+        if os.path.exists(repo_path) and os.listdir(repo_path):
+            if not self.is_repository(repo_path):
+                raise ValueError(f"Directory {repo_path} exists and is not a git repository")
+            return self._submit(repo_url, repo_path, "update")
+        return self._submit(repo_url, repo_path, "clone")
+
+    def start_update(self, repo_path: str) -> CloneJob:
+        """Fetch and fast-forward an existing clone in the background"""
+        if not self.is_repository(repo_path):
+            raise ValueError(f"Directory {repo_path} is not a git repository")
+        return self._submit(None, repo_path, "update")
+
+    def _submit(self, repo_url: Optional[str], repo_path: str, action: str) -> CloneJob:
+        with self._lock:
+            job = self._jobs.get(repo_path)
+            if job is not None and not job.done:
+                return job
+            job = CloneJob(repo_url, repo_path, action)
+            self._jobs[repo_path] = job
+        self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job: CloneJob) -> None:
+        try:
+            if job.action == "clone":
+                self.clone(job.repo_url, job.repo_path, _JobProgress(job))
+            else:
+                job.changed_files = self.update(job.repo_path, _JobProgress(job))
+            job.progress = 1.0
+            job.status = "done"
+        except Exception as e:
+            print(f"Error in {job.action} of {job.repo_path}: {str(e)}")
+            job.error = e
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+
+    def clone(self, repo_url: str, repo_path: str, progress: git.RemoteProgress = None) -> git.Repo:
+        """
+        Clone a repository (blocking) - shallow and sparse as configured.
+        The clone is made next to repo_path and moved into place once it is checked out, so a failed or
+        interrupted clone never leaves behind a repository that the next start() would take as up to date.
+        """
+        os.makedirs(self.repos_dir, exist_ok=True)
+        partial_path = os.path.join(os.path.dirname(repo_path), f".{os.path.basename(repo_path)}.partial")
+        # Left over by a process that died while cloning
+        shutil.rmtree(partial_path, ignore_errors=True)
+        try:
+            self._clone(repo_url, partial_path, progress).close()
+            if os.path.isdir(repo_path):
+                # start() only clones into a directory that is empty
+                os.rmdir(repo_path)
+            os.replace(partial_path, repo_path)
+        except BaseException:
+            shutil.rmtree(partial_path, ignore_errors=True)
+            raise
+        return git.Repo(repo_path)
+
+    def _clone(self, repo_url: str, repo_path: str, progress: git.RemoteProgress = None) -> git.Repo:
+        options = ["--single-branch", "--no-tags"]
+        if self.depth:
+            options.append(f"--depth={self.depth}")
+        if not self.sparse_extensions:
+            return git.Repo.clone_from(repo_url, repo_path, progress=progress, multi_options=options)
+
+        # Partial clone: blobs of files outside the sparse checkout are never downloaded
+        options += ["--filter=blob:none", "--no-checkout"]
+        repo = git.Repo.clone_from(repo_url, repo_path, progress=progress, multi_options=options)
+        patterns = [f"*{extension}" for extension in self.sparse_extensions] + list(self.SPARSE_ALWAYS)
+        try:
+            repo.git.sparse_checkout("set", "--no-cone", *patterns)
+        except git.GitCommandError as e:
+            # git older than 2.35 - check out everything rather than fail
+            print(f"Error setting up sparse checkout in {repo_path}: {str(e)} - checking out all files")
+        repo.git.checkout(repo.head.reference.name)
+        return repo
+
+    def update(self, repo_path: str, progress: git.RemoteProgress = None) -> List[str]:
+        """
+        Fetch the tracked branch and fast-forward to it (blocking).
+
+        Returns:
+            List[str]: Files added, modified or deleted by the update ('/' separated, relative to repo_path)
+        """
+        repo = git.Repo(repo_path)
+        if repo.head.is_detached:
+            raise ValueError(f"Repository at {repo_path} has no branch checked out")
+        branch = repo.active_branch
+        tracking_branch = branch.tracking_branch()
+        if tracking_branch is None:
+            raise ValueError(f"Branch {branch.name} of {repo_path} has no upstream branch")
+
+        old_commit = repo.head.commit.hexsha
+        # A plain fetch deepens a shallow clone just enough to connect to the commits it already has
+        repo.remote(tracking_branch.remote_name).fetch(progress=progress)
+        new_commit = tracking_branch.commit.hexsha
+        if new_commit == old_commit:
+            return []
+        # Fails (and leaves the checkout alone) if the histories diverged or local changes would be overwritten
+        repo.git.merge("--ff-only", tracking_branch.name)
+        changed = repo.git.diff("--name-only", "--no-renames", old_commit, new_commit)
+        return [line for line in changed.splitlines() if line]
+
+
+_clone_manager = None
+_clone_manager_lock = threading.Lock()
+
+
+def get_clone_manager() -> CloneManager:
+    """The process-wide clone manager - repositories go to repos/ next to this file"""
+    global _clone_manager
+    with _clone_manager_lock:
+        if _clone_manager is None:
+            _clone_manager = CloneManager(
+                os.path.join(os.path.dirname(os.path.abspath(__file__)), "repos"),
+                sparse_extensions=FileScanner.DEFAULT_EXTENSIONS
+            )
+        return _clone_manager
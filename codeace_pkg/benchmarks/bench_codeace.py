@@ -0,0 +1,188 @@
+"""
+Offline benchmarks of the CodeAce mapping and query paths.
+
+Every LLM is replaced by a deterministic fake chat model (see fake_llm.py) with a configurable
+latency, and the source trees are generated (see synthetic_repo.py), so runs are reproducible and
+results can be compared between releases. For each repository size it measures:
+- scan_directory
+- run_mapping_process: full run, no-op run and incremental run after editing a share of the files
+- save_mapping: a single upsert into the populated mapping store
+- find_relevant_files per search mode, get_possible_files_content and the end-to-end query
+  (with the per-stage breakdown recorded by the telemetry)
+
+Usage:
+    python bench_codeace.py [--sizes 1000 10000 100000] [--latency 0.0] [--workers 8] [--json results.json]
+
+Only the tiktoken encoding has to be available (downloaded once, or from TIKTOKEN_CACHE_DIR).
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+# Benchmark the working tree, not an installed release
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import codeace  # noqa: E402
+from codeace import CoreAgent, MappingAgent, get_telemetry  # noqa: E402
+from codeace.managers.file_manager import FileManager  # noqa: E402
+from fake_llm import fake_llm_manager  # noqa: E402
+from synthetic_repo import generate_queries, generate_repo, modify_files  # noqa: E402
+
+MODEL_NAME = "azure"
+
+
+def timed(func: Callable, repeat: int = 1) -> Dict:
+    """Run func repeat times - best, mean and the result of the last run"""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - start)
+    return {"best_s": min(durations), "mean_s": sum(durations) / len(durations), "runs": repeat, "result": result}
+
+
+def run_mapping(src_path: str, app_data_path: str, workers: int, summary: bool) -> Dict:
+    agent = MappingAgent(model_name=MODEL_NAME, src_path=src_path, app_data_path=app_data_path)
+    messages = list(agent.run_mapping_process(
+        generate_summery=summary, max_workers=workers, summary_mode="hierarchical"
+    ))
+    return {"messages": len(messages), "unmapped": len(agent.unmapped_files)}
+
+
+def bench_size(num_files: int, args: argparse.Namespace, work_dir: str) -> Dict:
+    src_path = os.path.join(work_dir, f"repo_{num_files}")
+    app_data_path = os.path.join(work_dir, f"app_data_{num_files}")
+    os.makedirs(app_data_path, exist_ok=True)
+    results = {"files": num_files}
+
+    start = time.perf_counter()
+    file_paths = generate_repo(src_path, num_files, seed=args.seed)
+    results["generate_s"] = time.perf_counter() - start
+
+    file_manager = FileManager(src_path, app_data_path)
+    scan = timed(file_manager.scan_directory, args.repeat)
+    results["scan_directory"] = {**scan, "result": len(scan["result"])}
+
+    if num_files <= args.max_mapping_files:
+        results["mapping_full"] = timed(lambda: run_mapping(src_path, app_data_path, args.workers, args.summary))
+        results["mapping_noop"] = timed(lambda: run_mapping(src_path, app_data_path, args.workers, args.summary))
+        modified = modify_files(file_paths, args.modify_fraction, seed=args.seed + 1)
+        results["mapping_incremental"] = {
+            **timed(lambda: run_mapping(src_path, app_data_path, args.workers, args.summary)),
+            "modified_files": len(modified),
+        }
+    else:
+        # Fill the mapping store directly, so the query benchmarks still run against a full mapping
+        start = time.perf_counter()
+        agent = MappingAgent(model_name=MODEL_NAME, src_path=src_path, app_data_path=app_data_path)
+        for file_path in file_paths:
+            content, description = agent._describe_file(file_path)
+            agent.file_manager.save_mapping(agent._create_mapping_structure(file_path, description))
+        agent.file_manager.update_search_index()
+        results["mapping_direct_fill_s"] = time.perf_counter() - start
+
+    entry = {"file_name": "bench/save_mapping_probe.py", "description": "probe", "functions": "probe", "symbols": []}
+    results["save_mapping"] = timed(lambda: file_manager.save_mapping(entry), args.repeat)
+    file_manager.remove_mappings([entry["file_name"]])
+
+    queries = generate_queries(args.queries, seed=args.seed + 2)
+    agent = CoreAgent(model_name=MODEL_NAME, src_path=src_path, app_data_path=app_data_path, use_cache=False)
+    for search_mode in args.search_modes:
+        search = timed(lambda: [agent.find_relevant_files(query, search_mode=search_mode) for query in queries], args.repeat)
+        results[f"find_relevant_files_{search_mode}"] = {
+            **search,
+            "per_query_s": search["best_s"] / len(queries),
+            "result": sum(len(files) for files in search["result"]) / len(queries),
+        }
+
+    relevant_files = [agent.find_relevant_files(query, search_mode="lexical") for query in queries]
+    packing = timed(lambda: [
+        agent.token_manager.get_possible_files_content(query, agent.extra_context_doc, files)
+        for query, files in zip(queries, relevant_files) if files
+    ], args.repeat)
+    results["get_possible_files_content"] = {**packing, "result": len(packing["result"])}
+
+    telemetry = get_telemetry()
+    end_to_end = []
+    breakdown = {}
+    for query in queries:
+        with telemetry.trace("benchmark_query") as trace_id:
+            start = time.perf_counter()
+            agent.run_core_process(query)
+            end_to_end.append(time.perf_counter() - start)
+        for row in telemetry.get_breakdown(trace_id):
+            stage = breakdown.setdefault(row["stage"], {"calls": 0, "duration_s": 0.0, "prompt_tokens": 0})
+            stage["calls"] += row["calls"]
+            stage["duration_s"] += row["duration"]
+            stage["prompt_tokens"] += row["prompt_tokens"]
+    results["end_to_end_query"] = {
+        "best_s": min(end_to_end), "mean_s": sum(end_to_end) / len(end_to_end), "runs": len(end_to_end),
+        "stages": breakdown,
+    }
+
+    for value in results.values():
+        if isinstance(value, dict):
+            value.pop("result", None)
+    if not args.keep:
+        shutil.rmtree(src_path, ignore_errors=True)
+        shutil.rmtree(app_data_path, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="Repository sizes (files)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per fake LLM call")
+    parser.add_argument("--workers", type=int, default=8, help="Mapping workers")
+    parser.add_argument("--queries", type=int, default=5, help="Queries per query benchmark")
+    parser.add_argument("--search-modes", nargs="+", default=["lexical", "hybrid"], choices=CoreAgent.SEARCH_MODES)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per short measurement")
+    parser.add_argument("--modify-fraction", type=float, default=0.01, help="Share of files edited before the incremental run")
+    parser.add_argument("--max-mapping-files", type=int, default=20000,
+                        help="Larger repositories are not mapped through run_mapping_process (their mapping is filled directly)")
+    parser.add_argument("--no-summary", dest="summary", action="store_false", help="Skip the hierarchical summary")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", help="Where the repositories are generated (default: a temporary directory)")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated repositories")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="codeace_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+    results = {
+        "codeace_version": codeace.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("json", "work_dir", "keep")},
+        "sizes": [],
+    }
+    try:
+        with fake_llm_manager(latency=args.latency):
+            for num_files in args.sizes:
+                print(f"Benchmarking {num_files} files...")
+                size_results = bench_size(num_files, args, work_dir)
+                results["sizes"].append(size_results)
+                for name, value in size_results.items():
+                    if isinstance(value, dict) and "best_s" in value:
+                        print(f"  {name:<32} {value['best_s'] * 1000:12.2f} ms")
+    finally:
+        if not args.work_dir and not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
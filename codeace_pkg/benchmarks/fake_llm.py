@@ -0,0 +1,94 @@
+"""
+A deterministic stand-in for the chat models of LLMManager, so the mapping and query paths can be
+benchmarked offline. Replies depend only on the prompt: the mapping, symbols and relevance search
+prompts get valid JSON in their schemas, every other prompt a short text answer.
+"""
+import json
+import re
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional
+from unittest import mock
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import ConfigDict
+
+from codeace import LLMManager
+from codeace.managers.search_index import LexicalIndex
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Fake chat model with a configurable latency per call.
+    model_name and max_tokens are what TokenManager reads from a real model.
+    """
+
+    model_config = ConfigDict(protected_namespaces=())
+
+    model_name: str = "gpt-4o"
+    max_tokens: int = 4096
+    latency: float = 0.0
+    max_relevant_files: int = 5
+
+    @property
+    def _llm_type(self) -> str:
+        return "codeace-fake-chat"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs) -> ChatResult:
+        prompt = "\n".join(message.content if isinstance(message.content, str) else str(message.content)
+                           for message in messages)
+        if self.latency:
+            time.sleep(self.latency)
+        content = self.respond(prompt)
+        # Rough token counts (4 characters per token) - enough for the instrumentation to have numbers
+        usage = {"input_tokens": len(prompt) // 4, "output_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        message = AIMessage(content=content, usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def respond(self, prompt: str) -> str:
+        """The reply to a prompt of one of the PromptManager chains"""
+        if "Available Files Data:" in prompt:
+            return json.dumps({"files": self._relevant_files(prompt)})
+        if "Each symbol is given with its kind" in prompt:
+            names = re.findall(r"^\s*### \w+ (\S+)", prompt, re.M)
+            return json.dumps({"symbols": [{"name": name, "description": f"Implements {name}."} for name in names]})
+        if "Please analyze the following code file" in prompt:
+            file_name = re.search(r"File name: (.*)", prompt)
+            functions = list(dict.fromkeys(re.findall(r"(?:def|function|func|class)\s+(\w+)", prompt)))
+            return json.dumps({
+                "description": f"Synthetic module {file_name.group(1).strip() if file_name else ''} "
+                               f"implementing {', '.join(functions[:5])}.",
+                "functions": ",".join(functions),
+            })
+        return f"Answer based on a prompt of {len(prompt)} characters."
+
+    def _relevant_files(self, prompt: str) -> List[str]:
+        """Files of the search prompt whose name, description or functions share a term with the query"""
+        query = re.search(r"User Query: (.*)", prompt)
+        query_terms = set(LexicalIndex.tokenize(query.group(1))) if query else set()
+        # The mapping entries are rendered as Python dicts, one "{'file_name': ...}" per file
+        files = []
+        for entry in prompt.split("{'file_name': ")[1:]:
+            file_name = re.match(r"""(['"])(.*?)\1""", entry)
+            if file_name and query_terms & set(LexicalIndex.tokenize(entry)):
+                files.append(file_name.group(2))
+        return files[:self.max_relevant_files]
+
+
+@contextmanager
+def fake_llm_manager(latency: float = 0.0, **model_fields) -> Iterator[None]:
+    """
+    Make LLMManager.create_model_instance_by_name return a FakeChatModel for every provider
+    while the block runs.
+    """
+    def create_model_instance_by_name(self, model_type: str, _model_name: str = None) -> FakeChatModel:
+        if model_type not in self.supported_llms:
+            raise ValueError(f"Model {model_type} is not supported.")
+        return FakeChatModel(latency=latency, **model_fields)
+
+    with mock.patch.object(LLMManager, "create_model_instance_by_name", create_model_instance_by_name):
+        yield
@@ -0,0 +1,90 @@
+"""
+Deterministic synthetic source trees for the benchmarks.
+Files are spread over nested directories and named after a small domain vocabulary,
+so lexical and LLM relevance searches have realistic matches.
+"""
+import os
+import random
+from typing import List
+
+VERBS = ["load", "save", "validate", "parse", "render", "compute", "sync", "export", "import", "resolve",
+         "merge", "schedule", "notify", "encrypt", "index", "cache"]
+NOUNS = ["invoice", "customer", "order", "payment", "report", "session", "account", "shipment", "inventory",
+         "ticket", "profile", "token", "catalog", "ledger", "schedule", "webhook"]
+# extension -> share of the files
+LANGUAGES = [(".py", 0.6), (".js", 0.2), (".go", 0.1), (".java", 0.1)]
+
+FILES_PER_DIRECTORY = 20
+DIRECTORIES_PER_PACKAGE = 10
+
+
+def _function_source(extension: str, name: str, noun: str, index: int) -> str:
+    if extension == ".py":
+        return (f"def {name}(data):\n    \"\"\"{name.replace('_', ' ').capitalize()} for a {noun}.\"\"\"\n"
+                f"    result = dict(data)\n    result['step'] = {index}\n    return result\n")
+    if extension == ".js":
+        return (f"function {name}(data) {{\n  // {name} for a {noun}\n"
+                f"  const result = {{ ...data, step: {index} }};\n  return result;\n}}\n")
+    if extension == ".go":
+        return (f"func {name}(data map[string]int) map[string]int {{\n"
+                f"\tdata[\"step\"] = {index}\n\treturn data\n}}\n")
+    return f"    public static int {name}(int value) {{\n        return value + {index};\n    }}\n"
+
+
+def generate_file_content(extension: str, rng: random.Random, functions: int) -> str:
+    noun = rng.choice(NOUNS)
+    names = [f"{rng.choice(VERBS)}_{noun}_{i}" for i in range(functions)]
+    body = "\n".join(_function_source(extension, name, noun, i) for i, name in enumerate(names))
+    if extension == ".java":
+        return f"public class {noun.capitalize()}Service {{\n{body}}}\n"
+    if extension == ".go":
+        return f"package {noun}\n\n{body}"
+    return body
+
+
+def generate_repo(path: str, num_files: int, functions_per_file: int = 5, seed: int = 0) -> List[str]:
+    """
+    Write num_files source files under path (which must not contain other sources).
+
+    Returns:
+        List[str]: The written file paths
+    """
+    rng = random.Random(seed)
+    extensions = [extension for extension, _ in LANGUAGES]
+    weights = [weight for _, weight in LANGUAGES]
+    file_paths = []
+    for index in range(num_files):
+        directory_index = index // FILES_PER_DIRECTORY
+        directory = os.path.join(
+            path, f"pkg_{directory_index // DIRECTORIES_PER_PACKAGE:04d}", f"module_{directory_index % DIRECTORIES_PER_PACKAGE}"
+        )
+        os.makedirs(directory, exist_ok=True)
+        extension = rng.choices(extensions, weights)[0]
+        file_path = os.path.join(directory, f"{rng.choice(NOUNS)}_{rng.choice(VERBS)}_{index}{extension}")
+        with open(file_path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(generate_file_content(extension, rng, functions_per_file))
+        file_paths.append(file_path)
+    return file_paths
+
+
+def modify_files(file_paths: List[str], fraction: float, seed: int = 1) -> List[str]:
+    """
+    Append a function to a deterministic sample of the files, as an edit between two mapping runs.
+
+    Returns:
+        List[str]: The modified file paths
+    """
+    rng = random.Random(seed)
+    count = max(1, int(len(file_paths) * fraction)) if file_paths else 0
+    modified = rng.sample(file_paths, count)
+    for file_path in modified:
+        extension = os.path.splitext(file_path)[1]
+        with open(file_path, 'a', encoding='utf-8', newline='\n') as f:
+            f.write("\n" + generate_file_content(extension, rng, 1))
+    return modified
+
+
+def generate_queries(count: int, seed: int = 2) -> List[str]:
+    """Natural language questions built from the same vocabulary as the files"""
+    rng = random.Random(seed)
+    return [f"How does the code {rng.choice(VERBS)} the {rng.choice(NOUNS)}?" for _ in range(count)]
@@ -0,0 +1,23 @@
+from .agents.core_agent import CoreAgent
+from .agents.mapping_agent import MappingAgent
+from .agents.agent_pool import AgentPool, get_core_agent
+from .managers.llm_manager import LLMManager
+from .managers.history_manager import HistoryManager
+from .managers.cache_manager import QueryCache
+from .managers.telemetry import Telemetry, get_telemetry
+from .managers.file_scanner import FileScanner
+
+__version__ = "0.1.4"
+
+__all__ = [
+    "CoreAgent",
+    "MappingAgent",
+    "LLMManager",
+    "HistoryManager",
+    "QueryCache",
+    "Telemetry",
+    "get_telemetry",
+    "FileScanner",
+    "AgentPool",
+    "get_core_agent",
+]
@@ -0,0 +1,58 @@
+import os
+import threading
+from typing import Dict, Tuple
+from .core_agent import CoreAgent
+
+
+class AgentPool:
+    """
+    Process-wide registry of CoreAgent instances keyed by (model name, source path, options).
+    Building a CoreAgent loads the mapping, the summary, the LLM client and the tokenizer,
+    so the pool builds each agent once and hands out cheap session copies of it.
+    A pooled agent reloads its mapping when the mapping store revision changes.
+    """
+
+    def __init__(self):
+        self._agents: Dict[Tuple, CoreAgent] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _make_key(model_name: str, src_path: str, options: dict) -> Tuple:
+        return (model_name, os.path.abspath(src_path), tuple(sorted(options.items())))
+
+    def get_core_agent(self, model_name: str, src_path: str, **options) -> CoreAgent:
+        """
+        Get a session copy of the pooled CoreAgent for the given model and source.
+        options are passed to the CoreAgent constructor when the agent is first built.
+        """
+        key = self._make_key(model_name, src_path, options)
+        with self._lock:
+            agent = self._agents.get(key)
+            if agent is None:
+                agent = CoreAgent(model_name=model_name, src_path=src_path, **options)
+                self._agents[key] = agent
+            else:
+                agent.refresh_mapping()
+            return agent.session_copy()
+
+    def invalidate(self, src_path: str = None) -> None:
+        """
+        Drop pooled agents (all of them, or those of one source) so they are rebuilt on next use
+        """
+        with self._lock:
+            if src_path is None:
+                self._agents.clear()
+                return
+            src_path = os.path.abspath(src_path)
+            for key in [key for key in self._agents if key[1] == src_path]:
+                del self._agents[key]
+
+
+_default_pool = AgentPool()
+
+
+def get_core_agent(model_name: str, src_path: str, **options) -> CoreAgent:
+    """
+    Get a CoreAgent for the given model and source from the process-wide pool
+    """
+    return _default_pool.get_core_agent(model_name, src_path, **options)
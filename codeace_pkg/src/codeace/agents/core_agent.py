@@ -0,0 +1,582 @@
+import copy
+import hashlib
+import os
+from typing import Callable, Dict, Iterator, List, Tuple
+from ..managers.llm_manager import LLMManager
+from ..managers.file_manager import FileManager
+from ..managers.token_manager import TokenManager
+from ..managers.prompt_manager import PromptManager
+from ..managers.cache_manager import QueryCache
+from ..managers.search_index import LexicalIndex
+from ..managers.symbol_extractor import SymbolExtractor
+from ..managers.telemetry import Telemetry, get_telemetry
+from ..managers.documentation_index import get_documentation_index
+from ..utils.utils import Utils
+class CoreAgent:
+    # Relevance search modes:
+    # - llm: the LLM reads the whole mapping
+    # - hybrid: the lexical index pre-selects candidates, the LLM re-ranks them
+    # - lexical: the lexical index only, no LLM call
+    SEARCH_MODES = ("hybrid", "lexical", "llm")
+    # Answer strategies when the relevant code spans several windows:
+    # - refine: windows are analyzed one after another, each building on the previous answer
+    # - map_reduce: windows are analyzed concurrently and the partial answers combined in one call
+    ANSWER_STRATEGIES = ("refine", "map_reduce")
+
+    def __init__(self, model_name: str, src_path: str, app_data_path = None, extra_context_doc_path = None,
+                 search_mode: str = "hybrid", search_top_k: int = 40, lexical_max_files: int = 10,
+                 max_concurrency: int = 4, use_cache: bool = True, span_min_tokens: int = 4000,
+                 span_top_k: int = 5, span_context_lines: int = 3, telemetry: Telemetry = None):
+        """
+        Initialize the core agent with:
+        - LLM model name - supported list (openai, azure, ollama, gemini, anthropic)
+        - Source code path
+        - Optional: app_data_path for JSON files (if None, will be created automatically)
+        - Optional: search_mode (see SEARCH_MODES), the number of lexical candidates sent to the LLM
+          in hybrid mode and the number of files returned in lexical mode
+        - Optional: max_concurrency - the maximum number of LLM calls running in parallel
+        - Optional: use_cache - cache relevance searches and answers on disk (query_cache.db in app_data_path)
+        - Optional: span retrieval - of relevant files larger than span_min_tokens (0 disables it), only the
+          span_top_k symbols matching the query best are sent, with span_context_lines lines around them
+        - Optional: telemetry - where the stage and LLM call spans are recorded (default: the process-wide instance)
+        """
+        if search_mode not in self.SEARCH_MODES:
+            raise ValueError(f"Search mode {search_mode} is not supported.")
+        self.src_path = src_path
+        if app_data_path is None:
+            app_data_path = Utils.get_app_data_path(src_path)
+        
+        Utils.check_file_exists(app_data_path) # if not exist raise error
+        self.file_manager = FileManager(src_path, app_data_path)
+        llm_manager = LLMManager()
+        self.llm_model = llm_manager.create_model_instance_by_name(model_name)
+        self.mapping_revision = self.file_manager.get_mapping_revision()
+        self.mapping_data = self.file_manager.get_mapping_data()
+        self.search_index = self.file_manager.get_search_index(self.mapping_data)
+        self.search_mode = search_mode
+        self.search_top_k = search_top_k
+        self.lexical_max_files = lexical_max_files
+        self.max_concurrency = max_concurrency
+        self.span_min_tokens = span_min_tokens
+        self.span_top_k = span_top_k
+        self.span_context_lines = span_context_lines
+        self.sammry_data = self.file_manager.read_summary()
+        self.telemetry = telemetry or get_telemetry()
+        self.token_manager = TokenManager(self.llm_model, self.telemetry, self.file_manager.file_catalog)
+        self.prompt_manager = PromptManager()
+        self.extra_context_doc = self.file_manager.read_extra_context_doc(extra_context_doc_path)
+        self.model_id = f"{model_name}:{getattr(self.llm_model, 'model_name', '')}"
+        self.query_cache = QueryCache(os.path.join(app_data_path, "query_cache.db")) if use_cache else None
+        # Whether the last call of each cached stage ("relevant_files", "code_query", "dependencies_query") was a hit
+        self.last_cache_hits = {}
+        
+
+    def refresh_mapping(self, force: bool = False) -> bool:
+        """
+        Reload the mapping, search index and summary if the mapping store changed since they were loaded.
+        Returns True if the agent was refreshed.
+        """
+        revision = self.file_manager.get_mapping_revision()
+        if not force and revision == self.mapping_revision:
+            return False
+        mapping_data = self.file_manager.get_mapping_data()
+        self.search_index = self.file_manager.get_search_index(mapping_data)
+        self.mapping_data = mapping_data
+        self.sammry_data = self.file_manager.read_summary()
+        self.mapping_revision = revision
+        return True
+
+    def session_copy(self) -> "CoreAgent":
+        """
+        A cheap copy for one session or caller. It shares the LLM client, tokenizer, mapping and caches
+        with this agent, but has its own extra context and cache-hit state.
+        """
+        agent = copy.copy(self)
+        agent.last_cache_hits = {}
+        return agent
+
+    def run_core_process(self, user_query: str) -> str:
+        relevant_files_list = self.find_relevant_files(user_query)
+        if not relevant_files_list:
+            return "No relevant files found"
+        
+        last_respond = self.process_code_query(user_query, relevant_files_list)
+        return last_respond
+    
+    def find_relevant_files(self, user_query: str, search_mode: str = None) -> list:
+        """
+        Find relevant files based on user query by processing data in chunks that fit token limits.
+        search_mode overrides the agent's default mode (see SEARCH_MODES).
+        Returns a list of relevant file paths
+        """
+        search_mode = search_mode or self.search_mode
+        if search_mode not in self.SEARCH_MODES:
+            raise ValueError(f"Search mode {search_mode} is not supported.")
+
+        # The index signature changes whenever the mapping does
+        cache_key = QueryCache.make_key(
+            "relevant_files", QueryCache.normalize_query(user_query), search_mode,
+            self.search_index.signature, self.model_id, self.search_top_k, self.lexical_max_files
+        )
+        relevant_files = self._cached_call(
+            "relevant_files", cache_key, lambda: self._search_relevant_files(user_query, search_mode)
+        )
+        return [file_path for file_path in relevant_files if os.path.exists(file_path)]
+
+    def prefetch_files(self, file_paths: list) -> int:
+        """
+        Warm the content hash and token count caches of the given files, so that building the
+        answer cache key and packing the context windows later doesn't touch the disk again.
+        Safe to run in a worker thread. Returns the total token count of the readable files.
+        """
+        total_tokens = 0
+        with self.telemetry.span("prefetch", files=len(file_paths)) as span:
+            for file_path in file_paths:
+                try:
+                    self.file_manager.get_content_hash(file_path)
+                    total_tokens += self.token_manager.get_file_tokens(file_path)
+                except (OSError, UnicodeDecodeError) as e:
+                    print(f"Error prefetching {file_path}: {str(e)}")
+            span["tokens"] = total_tokens
+        return total_tokens
+
+    def _search_relevant_files(self, user_query: str, search_mode: str) -> list:
+        """Runs the relevance search itself (see find_relevant_files)"""
+        if search_mode == "llm":
+            candidates = self.mapping_data
+        else:
+            with self.telemetry.span("lexical_search", search_mode=search_mode) as span:
+                ranked_files = self.search_index.search(user_query, self.search_top_k)
+                span["candidates"] = len(ranked_files)
+            if search_mode == "lexical":
+                return self.file_manager.verify_files_list_paths(
+                    [file_name for file_name, _ in ranked_files[:self.lexical_max_files]]
+                )
+            # Candidates go to the LLM best-first; without any lexical match fall back to the whole mapping
+            items_by_name = {item['file_name']: item for item in self.mapping_data}
+            candidates = [items_by_name[file_name] for file_name, _ in ranked_files if file_name in items_by_name]
+            if not candidates:
+                candidates = self.mapping_data
+
+        # All chunks are searched concurrently; batch keeps the results in chunk order
+        chunks = self.token_manager.split_data(user_query, candidates)
+        search_chain = self.prompt_manager.create_mappint_searcher_promtp_chain(self.llm_model)
+        results = search_chain.batch(
+            [{"user_query": user_query, "mapping_data": self._to_search_entries(chunk)} for chunk in chunks],
+            config=[
+                self.telemetry.llm_config("relevance_search", index, max_concurrency=self.max_concurrency)
+                for index in range(len(chunks))
+            ]
+        )
+
+        all_relevant_files = []
+        for result in results:
+            list_of_files = result.get('files') if result else None
+            if list_of_files:
+                all_relevant_files.extend(list_of_files)
+        
+        # Remove duplicates while preserving order
+        if not all_relevant_files:
+            return []
+        return self.file_manager.verify_files_list_paths(all_relevant_files)
+    
+    @staticmethod
+    def _to_search_entries(items: list) -> list:
+        """Strip bookkeeping fields (token counts etc.) from mapping entries before they go into a prompt"""
+        return [
+            {"file_name": item['file_name'], "description": item['description'], "functions": item['functions']}
+            for item in items
+        ]
+    
+    def _process_code_query_logic(self, user_query: str, file_paths: list, query_chain, strategy: str = "refine",
+                                  stage: str = "code_query") -> str:
+        """
+        Core logic for processing code queries.
+        
+        Args:
+            user_query (str): The user's question about the code
+            file_paths (list): List of relevant file paths to analyze
+            query_chain: The chain to use for processing the query
+            strategy (str): How multiple content chunks are answered (see ANSWER_STRATEGIES)
+            stage (str): Stage name the LLM calls are recorded under
+            
+        Returns:
+            str: The response to the user's query
+        """
+        if strategy not in self.ANSWER_STRATEGIES:
+            raise ValueError(f"Answer strategy {strategy} is not supported.")
+        if not file_paths:
+            response = self.llm_model.invoke(user_query, config=self.telemetry.llm_config(stage))
+            return f"No relevant files found for query, will call the llm model with the query only.\n\n{response.content}"
+
+        content_chunks = self._get_content_chunks(user_query, file_paths)
+        if strategy == "map_reduce" and len(content_chunks) > 1:
+            return self._map_reduce_content_chunks(query_chain, content_chunks, user_query, stage)
+
+        previous_response = ""
+        final_response = []
+        
+        for index, content_chunk in enumerate(content_chunks):
+            result = self._process_content_chunk(
+                query_chain, 
+                content_chunk, 
+                user_query, 
+                previous_response, 
+                index < len(content_chunks) - 1,
+                self.telemetry.llm_config(stage, index)
+            )
+            
+            final_response.append(result)
+            previous_response = result
+        
+        return self._format_final_response(final_response)
+
+    def _map_content_chunks(self, chain, content_chunks: List[str], query: str, stage: str) -> List[str]:
+        """Analyzes all content chunks concurrently, returning one partial answer per chunk"""
+        return chain.batch(
+            [self._build_chunk_input(content, query, "", True) for content in content_chunks],
+            config=[
+                self.telemetry.llm_config(stage, index, max_concurrency=self.max_concurrency)
+                for index in range(len(content_chunks))
+            ]
+        )
+
+    def _build_combine_input(self, query: str, partial_answers: List[str]) -> dict:
+        return {
+            "context": self.prompt_manager.format_extra_context(self.extra_context_doc),
+            "user_query": query,
+            "partial_answers": self.prompt_manager.format_partial_answers(partial_answers)
+        }
+
+    def _map_reduce_content_chunks(self, chain, content_chunks: List[str], query: str, stage: str) -> str:
+        """Analyzes all content chunks concurrently, then combines the partial answers with a single call"""
+        partial_answers = self._map_content_chunks(chain, content_chunks, query, stage)
+        combine_chain = self.prompt_manager.create_answers_combine_chain(self.llm_model)
+        return combine_chain.invoke(
+            self._build_combine_input(query, partial_answers), config=self.telemetry.llm_config(f"{stage}_combine")
+        )
+
+    def _stream_code_query_logic(self, user_query: str, file_paths: list, query_chain, strategy: str = "refine",
+                                 stage: str = "code_query") -> Iterator[str]:
+        """
+        Same as _process_code_query_logic, but the final LLM call is streamed.
+        Earlier refine passes (or the map step) run to completion first.
+
+        Yields:
+            str: Pieces of the final response as they are generated
+        """
+        if strategy not in self.ANSWER_STRATEGIES:
+            raise ValueError(f"Answer strategy {strategy} is not supported.")
+        if not file_paths:
+            yield "No relevant files found for query, will call the llm model with the query only.\n\n"
+            for chunk in self.llm_model.stream(user_query, config=self.telemetry.llm_config(stage)):
+                yield chunk.content
+            return
+
+        content_chunks = self._get_content_chunks(user_query, file_paths)
+        if not content_chunks:
+            yield self._format_final_response([])
+            return
+
+        if strategy == "map_reduce" and len(content_chunks) > 1:
+            partial_answers = self._map_content_chunks(query_chain, content_chunks, user_query, stage)
+            combine_chain = self.prompt_manager.create_answers_combine_chain(self.llm_model)
+            yield from combine_chain.stream(
+                self._build_combine_input(user_query, partial_answers), config=self.telemetry.llm_config(f"{stage}_combine")
+            )
+            return
+
+        previous_response = ""
+        for index, content_chunk in enumerate(content_chunks[:-1]):
+            previous_response = self._process_content_chunk(
+                query_chain, content_chunk, user_query, previous_response, True, self.telemetry.llm_config(stage, index)
+            )
+        yield from query_chain.stream(
+            self._build_chunk_input(content_chunks[-1], user_query, previous_response, False),
+            config=self.telemetry.llm_config(stage, len(content_chunks) - 1)
+        )
+
+    def process_code_query(self, user_query: str, file_paths: list, strategy: str = "refine") -> str:
+        """
+        Process a user query about specific code files.
+        
+        Args:
+            user_query (str): The user's question about the code
+            file_paths (list): List of relevant file paths to analyze
+            strategy (str): "refine" or "map_reduce" (see ANSWER_STRATEGIES)
+            
+        Returns:
+            str: The response to the user's query
+        """
+        query_chain = self.prompt_manager.create_code_query_chain(self.llm_model)
+        return self._cached_call(
+            "code_query",
+            self._answer_cache_key("code_query", user_query, file_paths, strategy),
+            lambda: self._process_code_query_logic(user_query, file_paths, query_chain, strategy, "code_query")
+        )
+
+    def process_dependencies_query(self, user_query: str, file_paths: list, strategy: str = "refine") -> str:
+        """
+        Process a user query about code dependencies.
+        
+        Args:
+            user_query (str): The user's question about the code
+            file_paths (list): List of relevant file paths to analyze
+            strategy (str): "refine" or "map_reduce" (see ANSWER_STRATEGIES)
+            
+        Returns:
+            str: The response to the user's query
+        """
+        query_chain = self.prompt_manager.create_dependencies_analysis_chain(self.llm_model)
+        return self._cached_call(
+            "dependencies_query",
+            self._answer_cache_key("dependencies_query", user_query, file_paths, strategy),
+            lambda: self._process_code_query_logic(user_query, file_paths, query_chain, strategy, "dependencies_query")
+        )
+    
+    
+    def stream_code_query(self, user_query: str, file_paths: list, strategy: str = "refine") -> Iterator[str]:
+        """
+        Streaming variant of process_code_query.
+        
+        Yields:
+            str: Pieces of the response to the user's query as they are generated
+        """
+        query_chain = self.prompt_manager.create_code_query_chain(self.llm_model)
+        return self._cached_stream(
+            "code_query",
+            self._answer_cache_key("code_query", user_query, file_paths, strategy),
+            lambda: self._stream_code_query_logic(user_query, file_paths, query_chain, strategy, "code_query")
+        )
+
+    def stream_dependencies_query(self, user_query: str, file_paths: list, strategy: str = "refine") -> Iterator[str]:
+        """
+        Streaming variant of process_dependencies_query.
+        
+        Yields:
+            str: Pieces of the dependencies analysis as they are generated
+        """
+        query_chain = self.prompt_manager.create_dependencies_analysis_chain(self.llm_model)
+        return self._cached_stream(
+            "dependencies_query",
+            self._answer_cache_key("dependencies_query", user_query, file_paths, strategy),
+            lambda: self._stream_code_query_logic(user_query, file_paths, query_chain, strategy, "dependencies_query")
+        )
+
+    def _answer_cache_key(self, kind: str, user_query: str, file_paths: list, strategy: str) -> str:
+        """
+        Cache key of an answer - changes when the query, any file's content, the extra context,
+        the model, the strategy or the span retrieval settings change
+        """
+        file_hashes = []
+        for file_path in file_paths:
+            try:
+                file_hashes.append([file_path, self.file_manager.get_content_hash(file_path)])
+            except OSError:
+                file_hashes.append([file_path, None])
+        extra_context_hash = hashlib.sha256((self.extra_context_doc or "").encode('utf-8')).hexdigest()
+        span_settings = [self.span_min_tokens, self.span_top_k, self.span_context_lines]
+        return QueryCache.make_key(
+            kind, QueryCache.normalize_query(user_query), file_hashes, extra_context_hash, self.model_id, strategy,
+            span_settings
+        )
+
+    def _cached_call(self, kind: str, cache_key: str, compute: Callable):
+        """Returns the cached result for cache_key, computing and storing it on a miss - timed as a span of the stage"""
+        with self.telemetry.span(kind) as span:
+            if self.query_cache is None:
+                return compute()
+            cached = self.query_cache.get(cache_key)
+            span["cache_hit"] = self.last_cache_hits[kind] = cached is not None
+            if cached is not None:
+                return cached
+            result = compute()
+            self.query_cache.set(cache_key, result, kind)
+            return result
+
+    def _cached_stream(self, kind: str, cache_key: str, stream: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """Streams the cached response for cache_key, or streams a new one and stores it once complete"""
+        with self.telemetry.span(kind) as span:
+            if self.query_cache is None:
+                yield from stream()
+                return
+            cached = self.query_cache.get(cache_key)
+            span["cache_hit"] = self.last_cache_hits[kind] = cached is not None
+            if cached is not None:
+                yield cached
+                return
+            pieces = []
+            for piece in stream():
+                pieces.append(piece)
+                yield piece
+            self.query_cache.set(cache_key, "".join(pieces), kind)
+    
+    def add_extra_context(self, extra_context_doc: str, override: bool = False) -> None:
+        """
+        Add extra context document to the agent.
+        If override is True, the existing context will be replaced.
+        """
+        if override:
+            self.extra_context_doc = extra_context_doc
+        else:
+            self.extra_context_doc = f"{self.extra_context_doc}\n{extra_context_doc}"
+    def get_documentation_context(self, user_query: str, docs_path: str, doc_names: List[str] = None,
+                                  max_tokens: int = 2000) -> str:
+        """
+        The documentation sections most relevant to the query that fit max_tokens, instead of whole documents.
+        The documentation folder is split by heading and indexed once (see DocumentationIndex).
+
+        Args:
+            user_query (str): The user's question
+            docs_path (str): The documentation folder
+            doc_names (List[str]): Only use these documents (file names without extension, default: all)
+            max_tokens (int): Token budget of the injected sections
+
+        Returns:
+            str: The selected sections, labeled with their document and headings ("" if none matches)
+        """
+        with self.telemetry.span("documentation_search", documents=len(doc_names or [])) as span:
+            index = get_documentation_index(docs_path, self.token_manager.calculate_tokens)
+            sections = index.select_sections(user_query, max_tokens, doc_names)
+            span["sections"] = len(sections)
+            span["tokens"] = sum(section.tokens for section in sections)
+        return index.format_sections(sections)
+
+    #TODO - create a method to add the summary to the context
+    def add_extra_context_by_path(self, extra_context_doc_path :str = None, override: bool = False) -> None:
+        """
+        Add extra context document to the agent.
+        If override is True, the existing context will be replaced.
+        """
+        extra_context_doc = self.file_manager.read_extra_context_doc(extra_context_doc_path)
+        self.add_extra_context(extra_context_doc, override)
+
+    
+    def _get_content_chunks(self, user_query: str, file_paths: list) -> List[str]:
+        """Packs the file contents (or their relevant spans) into chunks that each fit within token limits"""
+        with self.telemetry.span("span_selection", files=len(file_paths)) as span:
+            file_spans = self._select_file_spans(user_query, file_paths)
+            span["span_files"] = len(file_spans)
+        packed = self.token_manager.pack_files_content(user_query, self.extra_context_doc, file_paths, file_spans)
+        return [content for content, _ in packed]
+
+    def _select_file_spans(self, user_query: str, file_paths: list) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        For relevant files larger than span_min_tokens, select the line ranges worth sending:
+        the file header (imports etc.) and the symbols matching the query best, with context lines around them.
+        Symbols are extracted from the current file content; their mapped descriptions are used for ranking.
+        Files without a matching symbol are not in the result and are sent whole.
+        """
+        if not self.span_min_tokens:
+            return {}
+        items_by_name = {item['file_name']: item for item in self.mapping_data}
+        file_spans = {}
+        for file_path in file_paths:
+            try:
+                if self.token_manager.get_file_tokens(file_path) <= self.span_min_tokens:
+                    continue
+                content = self.file_manager.read_file(file_path)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Error reading file {file_path}: {str(e)}")
+                continue
+            symbols = SymbolExtractor.extract(file_path, content)
+            if not symbols:
+                continue
+
+            mapped = items_by_name.get(os.path.relpath(file_path, self.src_path), {})
+            descriptions = {symbol['name']: symbol.get('description', '') for symbol in mapped.get('symbols', [])}
+            index = LexicalIndex.build([
+                {"file_name": symbol['name'], "functions": symbol['name'], "description": descriptions.get(symbol['name'], '')}
+                for symbol in symbols
+            ])
+            matched_names = {name for name, _ in index.search(user_query, self.span_top_k)}
+            if not matched_names:
+                continue
+
+            symbols_by_name = {symbol['name']: symbol for symbol in symbols}
+            line_count = content.count('\n') + 1
+            spans = []
+            if symbols[0]['start_line'] > 1:
+                spans.append((1, symbols[0]['start_line'] - 1))
+            for symbol in symbols:
+                if symbol['name'] not in matched_names:
+                    continue
+                # A matched class contributes its own code, not all of its methods
+                end_line = SymbolExtractor.get_own_end_line(symbol, symbols)
+                spans.append((
+                    max(1, symbol['start_line'] - self.span_context_lines),
+                    min(line_count, end_line + self.span_context_lines)
+                ))
+                # A method is shown with the line declaring its class
+                parent = symbols_by_name.get(symbol['name'].rpartition('.')[0])
+                if parent:
+                    spans.append((parent['start_line'], parent['start_line']))
+            file_spans[file_path] = self._merge_spans(spans)
+        return file_spans
+
+    @staticmethod
+    def _merge_spans(spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Merge overlapping and adjacent line ranges"""
+        merged = []
+        for first, last in sorted(spans):
+            if merged and first <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+            else:
+                merged.append((first, last))
+        return merged
+
+    def _process_content_chunk(
+        self, 
+        chain, 
+        content: str, 
+        query: str, 
+        previous_response: str, 
+        has_remaining_files: bool,
+        config: dict = None
+    ) -> str:
+        """Processes a single chunk of content through the LLM"""
+        return chain.invoke(self._build_chunk_input(content, query, previous_response, has_remaining_files), config=config)
+
+    def _build_chunk_input(self, content: str, query: str, previous_response: str, has_remaining_files: bool) -> dict:
+        """Builds the chain input for a single chunk of content"""
+        context = self.prompt_manager.prepare_query_context(previous_response, has_remaining_files)
+        
+        return {
+            "context": self.prompt_manager.format_extra_context(self.extra_context_doc),
+            "code_content": content,
+            "user_query": query,
+            **context
+        }
+
+    def _format_final_response(self, responses: list) -> str:
+        """Formats the final response from all chunks"""
+        if not responses:
+            return "Could not process any files due to token limitations or file access issues."
+        return responses[-1]
+
+    def improve_user_prompt(self, user_query: str) -> str:
+        """
+        Improves the user's prompt by incorporating context from documentation
+        and making it more structured for code generation.
+        
+        Args:
+            user_query (str): The original user query/prompt
+            
+        Returns:
+            str: An improved, more structured version of the prompt
+        """
+        improver_chain = self.prompt_manager.create_prompt_improver_chain(self.llm_model)
+        
+        # Combine project summary and extra context as documentation
+        documentation = f"""Project Summary:
+        {self.sammry_data}
+
+        Additional Context:
+        {self.extra_context_doc}"""
+        
+        improved_prompt = improver_chain.invoke({
+            "documentation": documentation,
+            "user_query": user_query
+        }, config=self.telemetry.llm_config("improve_prompt"))
+        
+        return improved_prompt
\ No newline at end of file
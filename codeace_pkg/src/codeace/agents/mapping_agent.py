@@ -0,0 +1,464 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from ..managers.llm_manager import LLMManager
+from ..managers.file_manager import FileManager
+from ..managers.file_scanner import FileScanner
+from ..managers.prompt_manager import PromptManager
+from ..managers.token_manager import TokenManager
+from ..managers.summary_tree import SummaryTree
+from ..managers.symbol_extractor import SymbolExtractor
+from ..managers.telemetry import Telemetry, get_telemetry
+from ..utils.utils import Utils
+from langchain_core.prompts import PromptTemplate
+from langchain_core.output_parsers import JsonOutputParser
+from pydantic import BaseModel, Field
+from typing import List, Dict, Tuple
+
+class MappingAgent:
+    # hierarchical - files are summarized independently, then merged per directory and into the project summary
+    # rolling - every mapped file is folded into the whole existing summary (serial)
+    SUMMARY_MODES = ("hierarchical", "rolling")
+    # Files above this many tokens are described symbol by symbol (in groups of at most this many tokens)
+    LARGE_FILE_TOKENS = 8000
+
+    def __init__(self, model_name: str, src_path: str, app_data_path: str = None, telemetry: Telemetry = None,
+                 scan_options: Dict = None):
+        """
+        Initialize the mapping agent with:
+        - LLM model name - supported list (openai, azure, ollama, gemini, anthropic)
+        - Source code path
+        - Output path for JSON files
+        - File manager instance
+        - Optional: telemetry - where the mapping spans are recorded (default: the process-wide instance)
+        - Optional: scan_options - which files are mapped (see FileScanner)
+        """
+        llm_manager = LLMManager()
+        self.prompt_manager = PromptManager()
+        self.llm_model = llm_manager.create_model_instance_by_name(model_name, 'AZ_OPENAI_LLM_4_O_MINI')
+        self.telemetry = telemetry or get_telemetry()
+        # Every mapping run is one trace - set explicitly, as files are described on worker threads
+        self.trace_id = None
+        self.src_path = src_path
+        if not app_data_path:
+            app_data_path = Utils.get_app_data_path(src_path)
+        
+        self.app_data_path = app_data_path
+        self.file_manager = FileManager(src_path, app_data_path, scan_options=scan_options)
+        self.token_manager = TokenManager(self.llm_model, self.telemetry, self.file_manager.file_catalog)
+        self.unmapped_files = []
+        # Scanned files that turned out binary or generated (checked only when they would be mapped)
+        self.skipped_files = []
+        self._pending_fingerprints = {}
+
+    def run_mapping_process(self, ovveride: bool = False, generate_summery = True, max_workers: int = 1,
+                            summary_mode: str = "hierarchical"):
+        """
+        Main function to run the entire mapping process:
+        1. Scan source directory
+        2. Process each file
+        3. Save mapping results
+
+        Args:
+            ovveride (bool): Re-map files that already exist in the mapping
+            generate_summery (bool): Update the project summary for every mapped file
+            max_workers (int): Number of files described by the LLM concurrently (1 = serial)
+            summary_mode (str): How the project summary is generated (see SUMMARY_MODES)
+
+        Yields:
+            str: Status message for each file being processed
+        """
+        if summary_mode not in self.SUMMARY_MODES:
+            raise ValueError(f"Summary mode {summary_mode} is not supported.")
+        self.trace_id = Telemetry.new_trace_id()
+        run_start = time.perf_counter()
+        
+        # Get all relevant files from FileManager
+        with self.telemetry.span("scan_directory", trace_id=self.trace_id) as span:
+            scanned_files = self.file_manager.scan_directory()
+            span["files"] = len(scanned_files)
+        
+        # Only new or modified files are mapped, deleted files are dropped from the mapping
+        with self.telemetry.span("mapping_plan", trace_id=self.trace_id) as span:
+            code_files, deleted_files = self._plan_mapping(scanned_files, ovveride)
+            span["files"] = len(code_files)
+        if self.skipped_files:
+            skipped = set(self.skipped_files)
+            scanned_files = [file_path for file_path in scanned_files if file_path not in skipped]
+            yield f"Skipped {len(skipped)} binary or generated files."
+        if deleted_files:
+            self.file_manager.remove_mappings(deleted_files)
+            yield f"Removed {len(deleted_files)} deleted files from the mapping."
+        
+        rolling_summary = generate_summery and summary_mode == "rolling"
+        if max_workers > 1:
+            yield from self._run_concurrent_mapping(code_files, rolling_summary, max_workers)
+        else:
+            # Process each file
+            for current_index, file_path in enumerate(code_files):
+                try:
+                    status_message = f"Processing {current_index + 1}/{len(code_files)}: {os.path.basename(file_path)}"
+                    yield status_message
+                    
+                    self.process_single_file(file_path, rolling_summary)
+                except Exception as e:
+                    error_message = f"Error processing file {file_path}: {str(e)}"
+                    yield error_message
+                    self.unmapped_files.append(file_path)
+                    continue
+
+        with self.telemetry.span("search_index", trace_id=self.trace_id):
+            self.file_manager.update_search_index()
+        yield "Search index updated."
+
+        if generate_summery and summary_mode == "hierarchical":
+            yield from self._update_hierarchical_summary(scanned_files, max_workers)
+
+        self.telemetry.record(
+            "mapping", time.perf_counter() - run_start, trace_id=self.trace_id,
+            files=len(code_files), unmapped=len(self.unmapped_files)
+        )
+        yield f"Mapping process completed. {len(self.unmapped_files)} files could not be processed."
+        for file in self.unmapped_files:
+            yield f"Unmapped file: {file}"
+
+    def _run_concurrent_mapping(self, code_files: List[str], generate_summery: bool, max_workers: int):
+        """
+        Describe files on a thread pool while saving the results in the calling thread.
+        At most 2 * max_workers files are in flight, and results are consumed in scan order,
+        so status messages stay ordered and the mapping file has a single writer.
+
+        Yields:
+            str: Status message for each file being processed
+        """
+        total = len(code_files)
+        pending = deque()
+        files_iter = iter(enumerate(code_files))
+
+        def submit_next(executor) -> None:
+            next_item = next(files_iter, None)
+            if next_item is not None:
+                index, file_path = next_item
+                pending.append((index, file_path, executor.submit(self._describe_file, file_path)))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                for _ in range(max_workers * 2):
+                    submit_next(executor)
+
+                while pending:
+                    current_index, file_path, future = pending.popleft()
+                    yield f"Processing {current_index + 1}/{total}: {os.path.basename(file_path)}"
+                    try:
+                        content, description = future.result()
+                        self._save_file_result(file_path, content, description, generate_summery)
+                    except Exception as e:
+                        yield f"Error processing file {file_path}: {str(e)}"
+                        self.unmapped_files.append(file_path)
+                    finally:
+                        submit_next(executor)
+            finally:
+                # The consumer may stop iterating early - don't start files nobody will save
+                for _, _, future in pending:
+                    future.cancel()
+    
+    def _plan_mapping(self, code_files: List[str], ovveride: bool = False) -> Tuple[List[str], List[str]]:
+        """
+        Compare the scanned files with the stored fingerprints.
+        A changed file keeps its old fingerprint until it is mapped again, so a failure is retried next run.
+        New or changed files that look binary or generated are skipped (and dropped from the mapping).
+
+        Returns:
+            Tuple[List[str], List[str]]: Files to (re)map and relative names of deleted files
+        """
+        mapped_files = set(self.file_manager.get_mapped_files())
+        previous_fingerprints = self.file_manager.get_fingerprints()
+        self._pending_fingerprints = {}
+        self.skipped_files = []
+
+        files_to_map = []
+        refreshed_fingerprints = {}
+        current_files = set()
+        for file_path in code_files:
+            relative_path = os.path.relpath(file_path, self.src_path)
+            current_files.add(relative_path)
+            previous = previous_fingerprints.get(relative_path)
+            try:
+                fingerprint = self.file_manager.compute_fingerprint(file_path, previous)
+            except OSError:
+                continue
+
+            if relative_path not in mapped_files:
+                changed = True
+            elif previous is None:
+                # Mapped before fingerprints existed - adopt the current state
+                changed = False
+            else:
+                changed = fingerprint["hash"] != previous["hash"]
+
+            if (ovveride or changed) and FileScanner.is_binary_or_generated(file_path):
+                self.skipped_files.append(file_path)
+                current_files.discard(relative_path)
+                continue
+            if ovveride or changed:
+                files_to_map.append(file_path)
+                self._pending_fingerprints[relative_path] = fingerprint
+            elif fingerprint is not previous:
+                # Same content with a new mtime (or a newly adopted file) - store it to skip re-hashing
+                refreshed_fingerprints[relative_path] = fingerprint
+
+        self.file_manager.save_fingerprints(refreshed_fingerprints)
+        deleted_files = sorted((mapped_files | set(previous_fingerprints)) - current_files)
+        return files_to_map, deleted_files
+
+    def _record_fingerprint(self, file_path: str) -> None:
+        """
+        Store the fingerprint of a file that was just mapped
+        """
+        relative_path = os.path.relpath(file_path, self.src_path)
+        fingerprint = self._pending_fingerprints.pop(relative_path, None)
+        if fingerprint is not None:
+            self.file_manager.save_fingerprints({relative_path: fingerprint})
+
+    def process_single_file(self, file_path: str, generate_summery = True) -> None:
+        """
+        Process a single file and save mapping results
+        """
+        content, description = self._describe_file(file_path)
+        self._save_file_result(file_path, content, description, generate_summery)
+
+    def _describe_file(self, file_path: str) -> Tuple[str, Dict]:
+        """
+        Read a file and generate its description using LLM.
+        Safe to run from worker threads - it does not touch the mapping or summary files.
+        """
+        # Get file content from FileManager
+        content = self.file_manager.read_file(file_path)
+        symbols = SymbolExtractor.extract(file_path, content)
+        
+        # Generate description using LLM
+        if symbols and self.token_manager.calculate_tokens(content) > self.LARGE_FILE_TOKENS:
+            description = self._describe_large_file(content, file_path, symbols)
+        else:
+            description = self._generate_file_description(content, file_path)
+        description["symbols"] = symbols
+        return content, description
+
+    def _describe_large_file(self, content: str, file_path: str, symbols: List[Dict]) -> Dict:
+        """
+        Describe a large file at symbol level: the symbols' code is described in groups that fit
+        LARGE_FILE_TOKENS (concurrently), then the file itself is described from the symbols outline.
+        The symbols get a 'description' field.
+        """
+        lines = content.splitlines(keepends=True)
+        groups = []
+        current_group = []
+        current_tokens = 0
+        for symbol in symbols:
+            # A class is sent up to its first method - the methods are sent on their own
+            end_line = SymbolExtractor.get_own_end_line(symbol, symbols)
+            code, tokens = self._truncate_to_tokens(lines[symbol["start_line"] - 1:end_line], self.LARGE_FILE_TOKENS)
+            if current_group and current_tokens + tokens > self.LARGE_FILE_TOKENS:
+                groups.append(current_group)
+                current_group = []
+                current_tokens = 0
+            current_group.append({**symbol, "code": code})
+            current_tokens += tokens
+        if current_group:
+            groups.append(current_group)
+
+        symbols_chain = self.prompt_manager.create_symbols_mapping_chain(self.llm_model)
+        results = symbols_chain.batch(
+            [
+                {"file_name": file_path, "symbols_content": self.prompt_manager.format_symbols_content(group)}
+                for group in groups
+            ],
+            config=[self.telemetry.llm_config("symbols_description", index, self.trace_id) for index in range(len(groups))]
+        )
+        descriptions = {}
+        for result in results:
+            for item in (result or {}).get("symbols", []):
+                if isinstance(item, dict) and item.get("name"):
+                    descriptions[item["name"]] = item.get("description", "")
+        for symbol in symbols:
+            symbol["description"] = descriptions.get(symbol["name"], "")
+
+        return self._generate_file_description(self.prompt_manager.format_symbols_outline(symbols), file_path)
+
+    def _truncate_to_tokens(self, lines: List[str], max_tokens: int) -> Tuple[str, int]:
+        """Join lines, keeping as many leading lines as fit max_tokens"""
+        code = "".join(lines)
+        tokens = self.token_manager.calculate_tokens(code)
+        if tokens <= max_tokens:
+            return code, tokens
+        kept = []
+        tokens = 0
+        for line in lines:
+            line_tokens = self.token_manager.calculate_tokens(line)
+            if tokens + line_tokens > max_tokens:
+                break
+            kept.append(line)
+            tokens += line_tokens
+        return "".join(kept), tokens
+
+    def _save_file_result(self, file_path: str, content: str, description: Dict, generate_summery = True) -> None:
+        """
+        Update the summary (optional) and save the mapping of a described file
+        """
+        if generate_summery:
+            # Generate summary using LLM
+            self._generate_summary(content, file_path)
+
+        # Create mapping structure
+        mapping_data = self._create_mapping_structure(file_path,description)
+        
+        # Save mapping using FileManager
+        self.file_manager.save_mapping(mapping_data)
+        self._record_fingerprint(file_path)
+            
+
+    def _generate_file_description(self, content: str, file_path: str) -> Dict:
+        """
+        Use LLM to generate file description based on content
+        Uses predefined prompt template
+        """
+        # Run LLM to generate description
+        mapping_chain = self.prompt_manager.create_mapping_chain(self.llm_model)
+        result = mapping_chain.invoke(
+            input={'file_name': file_path, "file_content": content},
+            config=self.telemetry.llm_config("file_description", trace_id=self.trace_id)
+        )
+
+        return result
+    
+    def _generate_summary(self, content: str, file_path: str) -> None:
+        """
+        Use LLM to generate summary based on content
+        """
+        # Run summarization chain
+        last_summary = self.file_manager.read_summary()
+        summary_chain = self.prompt_manager.create_summery_update_chain(self.llm_model)
+        summary = summary_chain.invoke(
+            input={"existing_summary": last_summary,"file_name":file_path , "file_content":content},
+            config=self.telemetry.llm_config("summary_update", trace_id=self.trace_id)
+        )
+        self.file_manager.save_summary(summary)
+    
+    def _update_hierarchical_summary(self, code_files: List[str], max_workers: int = 1):
+        """
+        Bring the hierarchical summary up to date and save the project-level summary.
+        Stale files are summarized concurrently, then every directory whose children changed is
+        re-merged level by level (deepest first, all directories of a level concurrently).
+        Unchanged nodes come from the summary tree cache, so no LLM call is made for them.
+
+        Yields:
+            str: Status messages
+        """
+        tree = SummaryTree(self.file_manager.summary_tree_path)
+        paths = {}
+        file_hashes = {}
+        for file_path in code_files:
+            node = SummaryTree.node_name(os.path.relpath(file_path, self.src_path))
+            try:
+                file_hashes[node] = self.file_manager.get_content_hash(file_path)
+            except OSError:
+                continue
+            paths[node] = file_path
+        tree.prune(file_hashes)
+
+        stale_files = tree.get_stale_files(file_hashes)
+        file_chain = self.prompt_manager.create_file_summary_chain(self.llm_model)
+        # Files are read and summarized in groups, and the tree is saved after each, so an interrupted run keeps its progress
+        group_size = max(max_workers, 1) * 4
+        for start in range(0, len(stale_files), group_size):
+            yield f"Summarizing files {start + 1}-{min(start + group_size, len(stale_files))}/{len(stale_files)}"
+            inputs = []
+            group = []
+            for node in stale_files[start:start + group_size]:
+                try:
+                    inputs.append({"file_name": node, "file_content": self.file_manager.read_file(paths[node])})
+                    group.append(node)
+                except Exception as e:
+                    yield f"Error summarizing file {node}: {str(e)}"
+            results = file_chain.batch(
+                inputs,
+                config=self.telemetry.llm_config("file_summary", trace_id=self.trace_id, max_concurrency=max_workers),
+                return_exceptions=True
+            )
+            for node, result in zip(group, results):
+                if isinstance(result, Exception):
+                    yield f"Error summarizing file {node}: {str(result)}"
+                else:
+                    tree.set_file_summary(node, file_hashes[node], result)
+            tree.save()
+
+        merge_chain = self.prompt_manager.create_summary_merge_chain(self.llm_model)
+        project_name = os.path.basename(os.path.abspath(self.src_path))
+        for level in tree.get_directory_levels():
+            to_merge = []
+            for directory in level:
+                children = tree.get_children(directory)
+                key = SummaryTree.compute_key(children)
+                if not children or tree.is_directory_current(directory, key):
+                    continue
+                if len(children) == 1 and directory != SummaryTree.ROOT:
+                    # A directory with a single child says nothing more than that child
+                    name, kind, _ = children[0]
+                    tree.set_directory_summary(directory, key, tree.get_summary(name, kind))
+                    continue
+                to_merge.append((directory, key, children))
+            if not to_merge:
+                continue
+
+            yield f"Merging summaries of {len(to_merge)} directories"
+            results = merge_chain.batch(
+                [
+                    {
+                        "node_type": "project" if directory == SummaryTree.ROOT else "directory",
+                        "node_name": project_name if directory == SummaryTree.ROOT else directory,
+                        "child_summaries": tree.format_children(children),
+                    }
+                    for directory, _, children in to_merge
+                ],
+                config=self.telemetry.llm_config("summary_merge", trace_id=self.trace_id, max_concurrency=max_workers),
+                return_exceptions=True
+            )
+            for (directory, key, _), result in zip(to_merge, results):
+                if isinstance(result, Exception):
+                    yield f"Error merging summary of {directory or project_name}: {str(result)}"
+                else:
+                    tree.set_directory_summary(directory, key, result)
+        tree.save()
+
+        project_summary = tree.get_summary(SummaryTree.ROOT)
+        if project_summary:
+            self.file_manager.save_summary(project_summary)
+            yield "Project summary updated."
+
+    # TODO - Is this function needed?
+    def _create_mapping_structure(self, 
+                                file_path: str, 
+                                description: Dict) -> dict:
+        """
+        Create standardized mapping structure to save in JSON
+        """
+        # save file_path to relative path from src_path
+        file_path = os.path.relpath(file_path, self.src_path)
+        return self.token_manager.annotate_mapping_item({ 
+            "file_name": file_path,
+            "description": description["description"],
+            "functions": description["functions"],
+            "symbols": description.get("symbols", []),
+        })
+    
+
+
+if __name__ == "__main__":
+    agent = MappingAgent(
+        model_name="azure",
+        src_path=r"C:\CodeAce\src\codeace\agents",
+    )
+    for status in agent.run_mapping_process():
+        print(status)
\ No newline at end of file
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+
+class QueryCache:
+    """
+    A disk-backed (SQLite) cache for relevance searches and answers, with LRU eviction
+    bounded by the number of entries and their total size.
+    Keys are hashes of everything the cached value depends on, so a change in any
+    input (e.g. a file's content hash) simply produces a new key and the stale entry ages out.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 1000, max_bytes: int = 50 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, kind TEXT, value TEXT NOT NULL, size INTEGER, created REAL, last_access REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_last_access ON cache (last_access)")
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Lower-case the query and collapse whitespace, so trivially different spellings share an entry"""
+        return re.sub(r"\s+", " ", (query or "").strip().lower())
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a cache key from JSON-serializable parts"""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get(self, key: str, max_age: float = None) -> Optional[Any]:
+        """Return the cached value, or None on a miss or if it is older than max_age seconds"""
+        try:
+            with self._lock, self._conn:
+                row = self._conn.execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                if max_age is not None and time.time() - row[1] > max_age:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    return None
+                self._conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            print(f"Error reading query cache at {self.db_path}: {str(e)}")
+            return None
+
+    def set(self, key: str, value: Any, kind: str = "") -> None:
+        """Store a value and evict least recently used entries beyond the limits"""
+        data = json.dumps(value)
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, kind, value, size, created, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, kind, data, len(data), now, now)
+                )
+                self._evict()
+        except sqlite3.Error as e:
+            print(f"Error writing query cache at {self.db_path}: {str(e)}")
+
+    def _evict(self) -> None:
+        count, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        while count > self.max_entries or total_bytes > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT key, size FROM cache ORDER BY last_access, rowid LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (row[0],))
+            count -= 1
+            total_bytes -= row[1]
+
+    def clear(self) -> None:
+        """Remove all cached entries"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache")
@@ -0,0 +1,120 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List
+from PyPDF2 import PdfReader
+from ..utils.utils import Utils
+
+# PDFs with at least this many pages are extracted on a process pool
+PARALLEL_MIN_PAGES = 64
+
+
+def _extract_page_range(path: str, start: int, end: int) -> List[str]:
+    """Text of the pages [start, end) of a PDF (runs in a worker process)"""
+    with open(path, 'rb') as file:
+        reader = PdfReader(file)
+        return [reader.pages[index].extract_text() or "" for index in range(start, end)]
+
+
+def extract_pdf_text(path: str, max_workers: int = None, parallel_min_pages: int = PARALLEL_MIN_PAGES) -> str:
+    """
+    Extract the text of a PDF. Large documents are split into page ranges that are extracted
+    on a process pool (each worker parses the file itself, as readers can't be shared between processes).
+
+    Args:
+        path (str): The PDF file
+        max_workers (int): Worker processes (default: the CPU count)
+        parallel_min_pages (int): Smaller documents are extracted in the calling process
+
+    Returns:
+        str: The text of all pages, in page order
+    """
+    with open(path, 'rb') as file:
+        reader = PdfReader(file)
+        num_pages = len(reader.pages)
+        workers = min(max_workers or os.cpu_count() or 1, num_pages)
+        if num_pages < parallel_min_pages or workers < 2:
+            return "".join(page.extract_text() or "" for page in reader.pages)
+
+    # A few ranges per worker, so a slow range doesn't leave the other workers idle
+    range_size = max(1, -(-num_pages // (workers * 4)))
+    starts = list(range(0, num_pages, range_size))
+    ends = [min(start + range_size, num_pages) for start in starts]
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(_extract_page_range, [path] * len(starts), starts, ends))
+    except (OSError, BrokenProcessPool) as e:
+        print(f"Error extracting PDF pages in parallel at {path}: {str(e)} - extracting serially")
+        parts = [_extract_page_range(path, 0, num_pages)]
+    return "".join(text for part in parts for text in part)
+
+
+class DocumentCache:
+    """
+    Text of the context documents (PDFs, markdown and text files) that are sent along with queries.
+    - In memory: the last max_entries documents, keyed by path and invalidated when the file's mtime or size changes
+    - On disk (for documents whose extraction is expensive, i.e. PDFs): the extracted text in cache_dir,
+      keyed by the SHA-256 of the file, so a restart or a copy of the same document doesn't parse it again
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = 32):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # path -> ((mtime_ns, size), text)
+        self._memory: OrderedDict = OrderedDict()
+
+    def get_text(self, path: str, extract: Callable[[str], str], persist: bool = False) -> str:
+        """
+        The text of a document, extracted with extract(path) only if it isn't cached.
+
+        Args:
+            path (str): The document
+            extract (Callable[[str], str]): Reads the text of the document
+            persist (bool): Also cache the text on disk (for expensive extractions)
+        """
+        stat = os.stat(path)
+        file_key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._memory.get(path)
+            if cached and cached[0] == file_key:
+                self._memory.move_to_end(path)
+                return cached[1]
+
+        text = self._read_persisted(path, extract) if persist else extract(path)
+        with self._lock:
+            self._memory[path] = (file_key, text)
+            self._memory.move_to_end(path)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+        return text
+
+    def _read_persisted(self, path: str, extract: Callable[[str], str]) -> str:
+        cache_path = os.path.join(self.cache_dir, f"{Utils.hash_file(path)}.txt")
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as file:
+                return file.read()
+        except FileNotFoundError:
+            pass
+
+        text = extract(path)
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                file.write(text)
+            os.replace(tmp_path, cache_path)
+        except IOError as e:
+            # The text is still returned - it's only extracted again next time
+            print(f"Error caching extracted text at {cache_path}: {str(e)}")
+        return text
+
+    def invalidate(self, path: str = None) -> None:
+        """Drop a document (or all documents) from the memory cache"""
+        with self._lock:
+            if path is None:
+                self._memory.clear()
+            else:
+                self._memory.pop(path, None)
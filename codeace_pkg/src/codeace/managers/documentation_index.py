@@ -0,0 +1,189 @@
+import os
+import re
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from .search_index import LexicalIndex
+
+
+class DocSection(NamedTuple):
+    """A heading-level section of a documentation file"""
+    doc_name: str
+    # The headings above the section and its own, e.g. "Commands and Usage > Flash Operations"
+    heading: str
+    text: str
+    tokens: int
+    # Position of the section in its document
+    order: int
+
+
+class SectionIndex(LexicalIndex):
+    """BM25 index over documentation sections - entries are {"file_name": section id, "heading", "text"}"""
+
+    FIELD_WEIGHTS = {"heading": 2, "text": 1}
+
+
+class DocumentationIndex:
+    """
+    The markdown files of a documentation folder, split by heading into sections and indexed locally,
+    so only the sections relevant to a question are sent to the LLM instead of whole documents.
+    Documents are named after their file name without extension (as the GUI's context tags are).
+    The index is rebuilt when a file of the folder is added, removed or modified.
+    """
+
+    DOC_EXTENSIONS = ('.md', '.markdown', '.txt')
+    _HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+
+    def __init__(self, docs_path: str, count_tokens: Callable[[str], int],
+                 read_text: Callable[[str], str] = None, max_section_tokens: int = 800):
+        """
+        Args:
+            docs_path (str): The documentation folder
+            count_tokens (Callable[[str], int]): Token counter of the model the sections are sent to
+            read_text (Callable[[str], str]): Reads a document (default: plain UTF-8 read)
+            max_section_tokens (int): Longer sections are split at paragraph boundaries
+        """
+        self.docs_path = docs_path
+        self.count_tokens = count_tokens
+        self.read_text = read_text or self._read_text
+        self.max_section_tokens = max_section_tokens
+        self.sections: List[DocSection] = []
+        self._index: Optional[SectionIndex] = None
+        self._signature: Optional[Tuple] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _read_text(path: str) -> str:
+        with open(path, 'r', encoding='utf-8') as file:
+            return file.read()
+
+    def _list_documents(self) -> List[Tuple[str, str, int, int]]:
+        """(document name, path, mtime, size) of every document in the folder"""
+        documents = []
+        for root, _, files in os.walk(self.docs_path):
+            for file in sorted(files):
+                if os.path.splitext(file)[1].lower() in self.DOC_EXTENSIONS:
+                    path = os.path.join(root, file)
+                    stat = os.stat(path)
+                    documents.append((file.split(".")[0], path, stat.st_mtime_ns, stat.st_size))
+        return sorted(documents)
+
+    def refresh(self) -> bool:
+        """
+        Rebuild the index if the documents changed. Returns True if it was rebuilt.
+        """
+        documents = self._list_documents()
+        signature = tuple((path, mtime, size) for _, path, mtime, size in documents)
+        with self._lock:
+            if signature == self._signature:
+                return False
+            sections = []
+            for doc_name, path, _, _ in documents:
+                try:
+                    sections.extend(self.split_sections(doc_name, self.read_text(path)))
+                except (IOError, ValueError) as e:
+                    print(f"Error indexing documentation file {path}: {str(e)}")
+            self._index = SectionIndex.build([
+                {"file_name": str(section_id), "heading": section.heading, "text": section.text}
+                for section_id, section in enumerate(sections)
+            ])
+            self.sections = sections
+            self._signature = signature
+        return True
+
+    def split_sections(self, doc_name: str, content: str) -> List[DocSection]:
+        """
+        Split a markdown document at its headings. Text before the first heading is a section named after
+        the document, sections above max_section_tokens are split into parts at blank lines.
+        """
+        sections = []
+        headings: List[Tuple[int, str]] = []
+        lines: List[str] = []
+
+        def flush() -> None:
+            text = "\n".join(lines).strip()
+            if text:
+                heading = " > ".join(title for _, title in headings) or doc_name
+                for part in self._split_long_text(text):
+                    sections.append(DocSection(doc_name, heading, part, self.count_tokens(part), len(sections)))
+
+        in_code_block = False
+        for line in content.splitlines():
+            if line.lstrip().startswith("```"):
+                in_code_block = not in_code_block
+            match = None if in_code_block else self._HEADING_RE.match(line)
+            if match:
+                flush()
+                lines = []
+                level = len(match.group(1))
+                headings = [(heading_level, title) for heading_level, title in headings if heading_level < level]
+                headings.append((level, match.group(2)))
+            else:
+                lines.append(line)
+        flush()
+        return sections
+
+    def _split_long_text(self, text: str) -> List[str]:
+        if self.count_tokens(text) <= self.max_section_tokens:
+            return [text]
+        parts = []
+        current: List[str] = []
+        current_tokens = 0
+        for paragraph in re.split(r"\n\s*\n", text):
+            paragraph_tokens = self.count_tokens(paragraph)
+            if current and current_tokens + paragraph_tokens > self.max_section_tokens:
+                parts.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            current.append(paragraph)
+            current_tokens += paragraph_tokens
+        if current:
+            parts.append("\n\n".join(current))
+        return parts
+
+    def select_sections(self, query: str, max_tokens: int, doc_names: List[str] = None) -> List[DocSection]:
+        """
+        The best scoring sections for a query that fit max_tokens together (a section that doesn't fit
+        is skipped in favour of smaller, lower ranked ones), in document order.
+
+        Args:
+            query (str): The user's question
+            max_tokens (int): Token budget of the selected sections
+            doc_names (List[str]): Only search these documents (default: all)
+        """
+        self.refresh()
+        with self._lock:
+            index, sections = self._index, self.sections
+        if index is None or max_tokens <= 0:
+            return []
+        allowed = set(doc_names) if doc_names is not None else None
+        selected = []
+        remaining_tokens = max_tokens
+        for section_id, _ in index.search(query, top_k=len(sections)):
+            section = sections[int(section_id)]
+            if allowed is not None and section.doc_name not in allowed:
+                continue
+            if section.tokens <= remaining_tokens:
+                selected.append(section)
+                remaining_tokens -= section.tokens
+        return sorted(selected, key=lambda section: (section.doc_name, section.order))
+
+    @staticmethod
+    def format_sections(sections: List[DocSection]) -> str:
+        """The selected sections as extra context, each labeled with its document and headings"""
+        return "\n\n".join(f"[{section.doc_name}: {section.heading}]\n{section.text}" for section in sections)
+
+    def get_context(self, query: str, max_tokens: int, doc_names: List[str] = None) -> str:
+        return self.format_sections(self.select_sections(query, max_tokens, doc_names))
+
+
+_indexes: Dict[str, DocumentationIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_documentation_index(docs_path: str, count_tokens: Callable[[str], int],
+                            read_text: Callable[[str], str] = None) -> DocumentationIndex:
+    """The process-wide index of a documentation folder (built on first use)"""
+    key = os.path.abspath(docs_path)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = DocumentationIndex(docs_path, count_tokens, read_text)
+        return _indexes[key]
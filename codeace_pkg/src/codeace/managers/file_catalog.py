@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from ..utils.utils import Utils
+from .file_scanner import FileScanner
+
+
+class CatalogEntry:
+    """
+    One file of the catalog: its stat and the values derived from its content
+    (content hash, token counts per encoding), which are dropped when the file changes
+    """
+
+    def __init__(self, path: str, rel_path: str, size: int, mtime: int):
+        self.path = path
+        self.rel_path = rel_path
+        self.size = size
+        self.mtime = mtime
+        self.content_hash: Optional[str] = None
+        # tokenizer encoding name -> token count
+        self.tokens: Dict[str, int] = {}
+
+    def update_stat(self, size: int, mtime: int) -> bool:
+        """
+        Store a new stat of the file, forgetting the derived values if it differs.
+        Returns True if the file changed.
+        """
+        if size == self.size and mtime == self.mtime:
+            return False
+        self.size = size
+        self.mtime = mtime
+        self.content_hash = None
+        self.tokens = {}
+        return True
+
+
+class FileCatalog:
+    """
+    In-memory catalog of the source files (as listed by FileScanner): relative path, basename -> paths,
+    size, mtime, content hash and token counts. It is built by one scan and refreshed incrementally -
+    entries of unchanged files (and the hashes and token counts computed for them) are kept.
+
+    Derived values are always checked against a fresh os.stat of the file, so they are never stale.
+    Files outside the scan (e.g. an extra context document) can be hashed and counted as well,
+    they are just not part of the path index.
+    """
+
+    def __init__(self, scanner: FileScanner = None, max_age: float = 5.0):
+        """
+        Args:
+            scanner (FileScanner): Lists the cataloged files (None for a catalog of derived values only)
+            max_age (float): Seconds after which a path lookup that misses rescans the source
+        """
+        self.scanner = scanner
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # full path -> entry, in scan order
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._by_rel_path: Dict[str, CatalogEntry] = {}
+        self._by_name: Dict[str, List[CatalogEntry]] = {}
+        # Entries of files that are not part of the scan
+        self._other_entries: Dict[str, CatalogEntry] = {}
+        self._refreshed_at: Optional[float] = None
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Rescan the source, keeping the entries of unchanged files.
+        Unless forced, a catalog younger than max_age is not rescanned.
+        Returns True if the source was rescanned.
+        """
+        if self.scanner is None:
+            return False
+        if not force and self._refreshed_at is not None and time.monotonic() - self._refreshed_at < self.max_age:
+            return False
+
+        scanned_files = self.scanner.scan_files()
+        with self._lock:
+            entries = {}
+            by_name = {}
+            for scanned in scanned_files:
+                entry = self._entries.get(scanned.path)
+                if entry is None:
+                    entry = CatalogEntry(scanned.path, scanned.rel_path, scanned.size, scanned.mtime)
+                else:
+                    entry.update_stat(scanned.size, scanned.mtime)
+                entries[scanned.path] = entry
+                by_name.setdefault(scanned.rel_path.rpartition("/")[2], []).append(entry)
+            self._entries = entries
+            self._by_rel_path = {entry.rel_path: entry for entry in entries.values()}
+            self._by_name = by_name
+            self._refreshed_at = time.monotonic()
+        return True
+
+    def _ensure_built(self) -> None:
+        if self._refreshed_at is None:
+            self.refresh()
+
+    def get_paths(self) -> List[str]:
+        """Full paths of the cataloged files, in scan order"""
+        self._ensure_built()
+        return list(self._entries)
+
+    def get_entry(self, path: str) -> Optional[CatalogEntry]:
+        """The entry of a cataloged file as of the last refresh (None if it isn't cataloged)"""
+        self._ensure_built()
+        return self._entries.get(path)
+
+    def resolve(self, file_path: str) -> Optional[str]:
+        """
+        Find a cataloged file from a possibly inexact path (e.g. suggested by an LLM).
+        The path is matched as a relative path first, then by its basename - among several files with
+        that name, the one sharing the longest trailing part of the path wins (scan order breaks ties).
+        Rescans once (see max_age) before giving up.
+
+        Returns:
+            Optional[str]: The full path of the file, or None if no cataloged file has that name
+        """
+        self._ensure_built()
+        parts = [part for part in file_path.replace("\\", "/").split("/") if part and part != "."]
+        if not parts:
+            return None
+        resolved = self._lookup(parts)
+        if resolved is None and self.refresh():
+            resolved = self._lookup(parts)
+        return resolved
+
+    def _lookup(self, parts: List[str]) -> Optional[str]:
+        with self._lock:
+            entry = self._by_rel_path.get("/".join(parts))
+            if entry is not None:
+                return entry.path
+            candidates = self._by_name.get(parts[-1])
+        if not candidates:
+            return None
+
+        def shared_suffix(entry: CatalogEntry) -> int:
+            entry_parts = entry.rel_path.split("/")
+            count = 0
+            while count < min(len(parts), len(entry_parts)) and parts[-1 - count] == entry_parts[-1 - count]:
+                count += 1
+            return count
+
+        # max keeps the first of equally good candidates
+        return max(candidates, key=shared_suffix).path
+
+    def _current_entry(self, path: str) -> CatalogEntry:
+        """The entry of a file, updated to its current stat (raises OSError if it can't be read)"""
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path) or self._other_entries.get(path)
+            if entry is None:
+                entry = CatalogEntry(path, os.path.basename(path), stat.st_size, stat.st_mtime_ns)
+                self._other_entries[path] = entry
+            else:
+                entry.update_stat(stat.st_size, stat.st_mtime_ns)
+        return entry
+
+    def get_content_hash(self, path: str) -> str:
+        """SHA-256 of a file's content, re-hashed only when its size or mtime changed"""
+        entry = self._current_entry(path)
+        if entry.content_hash is None:
+            entry.content_hash = Utils.hash_file(path)
+        return entry.content_hash
+
+    def get_tokens(self, path: str, encoding_name: str, count_tokens: Callable[[], int]) -> int:
+        """
+        Token count of a file for one tokenizer encoding, counted (with count_tokens) only when the
+        file changed or wasn't counted with that encoding yet
+        """
+        entry = self._current_entry(path)
+        tokens = entry.tokens.get(encoding_name)
+        if tokens is None:
+            tokens = count_tokens()
+            entry.tokens[encoding_name] = tokens
+        return tokens
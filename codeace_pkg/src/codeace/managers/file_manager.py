@@ -0,0 +1,257 @@
+import os
+from typing import List, Dict
+from .mapping_store import create_mapping_store
+from .search_index import LexicalIndex
+from .file_scanner import FileScanner
+from .file_catalog import FileCatalog
+from .document_cache import DocumentCache, extract_pdf_text
+
+
+class FileManager:
+    def __init__(self, src_path: str, app_data_path: str, store_backend: str = "sqlite", scan_options: Dict = None):
+        """
+        Initialize FileManager with source and output paths.
+        store_backend selects where the mapping is kept (see MAPPING_STORE_BACKENDS).
+        scan_options are passed to the FileScanner (extensions, excluded_dirs, max_file_size, use_git, ...).
+        """
+        if not os.path.exists(src_path):
+            raise FileNotFoundError(f"Source path not found: {src_path}")
+        self.src_path = src_path
+        self.app_data_path = app_data_path
+        self._create_app_data_dir()
+        self.summary_doc_path = os.path.join(self.app_data_path, "summary_doc.md")
+        self.summary_tree_path = os.path.join(self.app_data_path, "summary_tree.json")
+        self.search_index_path = os.path.join(self.app_data_path, "search_index.json")
+        self.mapping_store = create_mapping_store(store_backend, self.app_data_path)
+        self.file_scanner = FileScanner(src_path, **(scan_options or {}))
+        # Scanned once, refreshed incrementally - also caches content hashes and token counts
+        self.file_catalog = FileCatalog(self.file_scanner)
+        # Context documents stay in memory between queries, extracted PDF text is also kept on disk
+        self.document_cache = DocumentCache(os.path.join(self.app_data_path, "doc_cache"))
+    
+    def _create_app_data_dir(self) -> None:
+        """Create app_data directory if it doesn't exist"""
+        os.makedirs(self.app_data_path, exist_ok=True)
+
+    def scan_directory(self) -> List[str]:
+        """
+        Recursively scan directory and return list of code files.
+        Honors .gitignore files and the project ignore file (.codeaceignore), see FileScanner.
+        Always rescans - the file catalog is refreshed with the result.
+        """
+        self.file_catalog.refresh(force=True)
+        return self.file_catalog.get_paths()
+    
+    def read_extra_context_doc(self, extra_context_doc_path: str) -> str:
+        """
+        Read and return extra context document content, supporting both text and PDF files
+        """
+        if not extra_context_doc_path:
+            extra_context_doc_path = self.summary_doc_path
+        
+        if extra_context_doc_path.endswith('.pdf'):
+            content = self.read_pdf_file(extra_context_doc_path)
+        else:
+            try:
+                content = self.document_cache.get_text(extra_context_doc_path, self.read_file)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"File not found at path: {extra_context_doc_path}")
+        
+        return content
+
+    def read_pdf_file(self, path: str) -> str:
+        """
+        Read and return text content from a PDF file.
+        The extracted text is cached (see DocumentCache), so a document is parsed once per content.
+        """
+        try:
+            content = self.document_cache.get_text(path, extract_pdf_text, persist=True)
+            if not content:
+                raise ValueError(f"PDF file {path} is empty or unreadable")
+            return content
+        except FileNotFoundError:
+            raise FileNotFoundError(f"PDF file not found at path: {path}")
+        except Exception as e:
+            raise IOError(f"Error reading PDF file at {path}: {str(e)}")
+
+    @staticmethod
+    def _read_text(path: str) -> str:
+        with open(path, 'r', encoding='utf-8') as file:
+            return file.read()
+
+    def read_file(self, path: str) -> str:
+        """
+        Read and return file content
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                content = file.read()
+                if not content:
+                    raise ValueError(f"File {path} is empty")
+                return content
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found at path: {path}")
+        except IOError as e:
+            raise IOError(f"Error reading file at {path}: {str(e)}")
+
+    def save_mapping(self, mapping_data: Dict) -> None:
+        """
+        Add or update mapping data in the mapping store
+        """
+        self.mapping_store.upsert(mapping_data)
+
+    def remove_mappings(self, file_names: List[str]) -> None:
+        """
+        Remove the mapping entries and fingerprints of the given files (relative paths)
+        """
+        if file_names:
+            self.mapping_store.remove(file_names)
+
+    def compute_fingerprint(self, path: str, previous: Dict = None) -> Dict:
+        """
+        Compute the fingerprint (size, mtime and content hash) of a file.
+        If the size and mtime match the previous fingerprint, the file is not re-hashed.
+        Cataloged files use the stat of the last scan instead of another os.stat.
+        """
+        entry = self.file_catalog.get_entry(path)
+        if entry is not None:
+            size, mtime = entry.size, entry.mtime
+        else:
+            stat = os.stat(path)
+            size, mtime = stat.st_size, stat.st_mtime_ns
+        if previous and previous.get('size') == size and previous.get('mtime') == mtime:
+            if entry is not None and entry.content_hash is None:
+                # Same stat as when the hash was stored - later get_content_hash calls needn't re-hash
+                entry.content_hash = previous.get('hash')
+            return previous
+        return {
+            "size": size,
+            "mtime": mtime,
+            "hash": self.file_catalog.get_content_hash(path),
+        }
+
+    def get_content_hash(self, path: str) -> str:
+        """
+        Get the SHA-256 hash of a file's content, re-hashing only when its mtime or size changed
+        """
+        return self.file_catalog.get_content_hash(path)
+
+    def get_fingerprints(self) -> Dict[str, Dict]:
+        """
+        Get the stored file fingerprints, keyed by the file path relative to src_path
+        """
+        return self.mapping_store.get_fingerprints()
+
+    def save_fingerprints(self, fingerprints: Dict[str, Dict]) -> None:
+        """
+        Add or update file fingerprints next to the mapping
+        """
+        if fingerprints:
+            self.mapping_store.save_fingerprints(fingerprints)
+
+    def get_mapped_files(self) -> List[str]:
+        """
+        Get list of mapped files from the mapping store
+        """
+        return self.mapping_store.get_file_names()
+    
+    def get_mapping_data(self) -> List[Dict]:
+        """
+        Get mapping data from the mapping store
+        """
+        return self.mapping_store.get_all()
+    
+    def update_search_index(self, mapping_data: List[Dict] = None) -> LexicalIndex:
+        """
+        Build the lexical search index from the mapping and persist it in the app_data dir
+        """
+        if mapping_data is None:
+            mapping_data = self.get_mapping_data()
+        index = LexicalIndex.build(mapping_data)
+        index.save(self.search_index_path)
+        return index
+
+    def get_search_index(self, mapping_data: List[Dict] = None) -> LexicalIndex:
+        """
+        Load the persisted search index, rebuilding it if it is missing or out of date with the mapping
+        """
+        if mapping_data is None:
+            mapping_data = self.get_mapping_data()
+        index = LexicalIndex.load(self.search_index_path)
+        if index is None or index.signature != LexicalIndex.compute_signature(mapping_data):
+            index = self.update_search_index(mapping_data)
+        return index
+    
+    def get_mapping_revision(self) -> int:
+        """
+        Get the mapping store revision - it changes whenever mapping entries are saved or removed
+        """
+        return self.mapping_store.get_revision()
+
+    def save_summary(self, summary: str) -> None:
+        """
+        Save summary to a markdown file
+        """
+        try:
+            with open(self.summary_doc_path, 'w', encoding='utf-8') as f:
+                f.write(summary)
+        except IOError as e:
+            raise IOError(f"Error saving summary to {self.summary_doc_path}: {str(e)}")
+    
+    def read_summary(self) -> str:
+        """
+        Read and return summary content (cached in memory until the summary file changes)
+        """
+        try:
+            return self.document_cache.get_text(self.summary_doc_path, self._read_text)
+        except FileNotFoundError:
+            with open(self.summary_doc_path, 'w', encoding='utf-8') as file:
+                file.write("This document contains summaries of the codebase files.")
+        except IOError as e:
+            raise IOError(f"Error reading file at {self.summary_doc_path}: {str(e)}")
+
+    def get_summary_data(self) -> str:
+        """
+        Get summary data from markdown file
+        """
+        try:
+            with open(self.summary_doc_path, 'r', encoding='utf-8') as f:
+                summary = f.read()
+                return summary
+        except IOError as e:
+            raise IOError(f"Error reading summary file at {self.summary_doc_path}: {str(e)}")
+
+    def verify_files_list_paths(self, file_paths: List[str]) -> List[str]:
+        """
+        Verify and correct file paths in the given list.
+        If a path doesn't exist, the file is looked up by name in the file catalog
+        (the best match of the path's trailing directories wins).
+        Returns a list of corrected paths, removing invalid ones.
+        
+        Args:
+            file_paths: List of file paths to verify
+            
+        Returns:
+            List of verified and corrected file paths
+        """
+        verified_paths = []
+        
+        for file_path in file_paths:
+            full_path = os.path.join(self.src_path, file_path)
+            if os.path.exists(full_path):
+                verified_paths.append(full_path)
+            else:
+                # Look the file up by its (partial) path or name in the file catalog
+                resolved_path = self.file_catalog.resolve(file_path)
+                if resolved_path:
+                    verified_paths.append(resolved_path)
+                # If file wasn't found, it will be skipped
+        # Filter out duplicates
+        verified_paths = list(dict.fromkeys(verified_paths))
+        return verified_paths
+
+#Tests...
+if __name__ == "__main__":
+    file_m = FileManager(r"C:\CodeAce",r"C:\CodeAce\CodeAceData")
+    files_list = file_m.scan_directory()
+    print(file_m.read_file(files_list[0]))
\ No newline at end of file
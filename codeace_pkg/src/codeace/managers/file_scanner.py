@@ -0,0 +1,357 @@
+import fnmatch
+import os
+import re
+import subprocess
+from typing import Iterable, List, NamedTuple, Optional, Pattern, Tuple
+
+
+def _has_wildcard(pattern: str) -> bool:
+    return any(char in pattern for char in '*?[')
+
+
+class _RuleGroup(NamedTuple):
+    """
+    Consecutive ignore patterns of the same polarity, compiled into one regex per target.
+    Patterns without a '/' only look at the name, the others at the relative path.
+    """
+    negate: bool
+    file_names: Optional[Pattern]
+    file_paths: Optional[Pattern]
+    dir_names: Optional[Pattern]
+    dir_paths: Optional[Pattern]
+
+
+class ScannedFile(NamedTuple):
+    """A file found by FileScanner, with its stat at scan time"""
+    path: str
+    # '/' separated, relative to the scan root
+    rel_path: str
+    size: int
+    mtime: int
+
+
+class IgnoreRules:
+    """
+    Patterns of one ignore file in .gitignore syntax, matched against paths relative to the
+    directory of that file ('/' separated). Supported: comments, '!' negation, trailing '/' for
+    directories only, leading or inner '/' anchoring, '*', '?', '[...]' and '**'.
+    Consecutive patterns of the same polarity are combined into a single regex, so matching a path
+    costs a regex search per negation switch rather than per pattern.
+    """
+
+    def __init__(self, base: str = "", lines: Iterable[str] = ()):
+        """
+        Args:
+            base (str): Directory of the ignore file, relative to the scan root ('' for the root)
+            lines (Iterable[str]): The lines of the ignore file
+        """
+        self.base = base
+        # (negate, directories only, anchored, regex)
+        self._patterns: List[Tuple[bool, bool, bool, str]] = []
+        self._groups: Optional[List[_RuleGroup]] = None
+        for line in lines:
+            self.add(line)
+
+    @classmethod
+    def from_file(cls, path: str, base: str = "") -> "IgnoreRules":
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                return cls(base, f.read().splitlines())
+        except OSError as e:
+            print(f"Error reading ignore file at {path}: {str(e)}")
+            return cls(base)
+
+    def add(self, line: str) -> None:
+        """Add a pattern line (comments and blank lines are skipped)"""
+        line = line.rstrip("\n\r")
+        if not line.endswith("\\ "):
+            line = line.rstrip(" ")
+        if not line or line.startswith("#"):
+            return
+        negate = line.startswith("!")
+        if negate or line.startswith("\\!") or line.startswith("\\#"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            return
+        self._patterns.append((negate, dir_only, "/" in line, self._translate(line.lstrip("/"))))
+        self._groups = None
+
+    @staticmethod
+    def _translate(pattern: str) -> str:
+        """Regex (without anchors) of a gitignore pattern"""
+        regex = []
+        index = 0
+        while index < len(pattern):
+            char = pattern[index]
+            if pattern.startswith("**/", index):
+                regex.append("(?:.*/)?")
+                index += 3
+                continue
+            if pattern.startswith("/**", index) and index + 3 == len(pattern):
+                regex.append("/.*")
+                index += 3
+                continue
+            if pattern.startswith("**", index):
+                regex.append(".*")
+                index += 2
+                continue
+            if char == "*":
+                regex.append("[^/]*")
+            elif char == "?":
+                regex.append("[^/]")
+            elif char == "[":
+                end = pattern.find("]", index + 2)
+                if end == -1:
+                    regex.append(re.escape(char))
+                else:
+                    body = pattern[index + 1:end]
+                    if body.startswith("!"):
+                        body = "^" + body[1:]
+                    regex.append(f"[{body}]")
+                    index = end
+            elif char == "\\" and index + 1 < len(pattern):
+                index += 1
+                regex.append(re.escape(pattern[index]))
+            else:
+                regex.append(re.escape(char))
+            index += 1
+        return "".join(regex)
+
+    @staticmethod
+    def _combine(regexes: List[str]) -> Optional[Pattern]:
+        return re.compile(f"(?:{'|'.join(regexes)})\\Z") if regexes else None
+
+    def _compile(self) -> List[_RuleGroup]:
+        groups = []
+        start = 0
+        while start < len(self._patterns):
+            negate = self._patterns[start][0]
+            end = start
+            while end < len(self._patterns) and self._patterns[end][0] == negate:
+                end += 1
+            patterns = self._patterns[start:end]
+            groups.append(_RuleGroup(
+                negate,
+                self._combine([regex for _, dir_only, anchored, regex in patterns if not dir_only and not anchored]),
+                self._combine([regex for _, dir_only, anchored, regex in patterns if not dir_only and anchored]),
+                self._combine([regex for _, _, anchored, regex in patterns if not anchored]),
+                self._combine([regex for _, _, anchored, regex in patterns if anchored]),
+            ))
+            start = end
+        return groups
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Whether the rules ignore a path (relative to the scan root): True (ignored), False (re-included
+        by a negation) or None (no pattern matches). The last matching pattern wins.
+        """
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return None
+            rel_path = rel_path[len(self.base) + 1:]
+        if self._groups is None:
+            self._groups = self._compile()
+        name = rel_path[rel_path.rfind("/") + 1:]
+        for group in reversed(self._groups):
+            names, paths = (group.dir_names, group.dir_paths) if is_dir else (group.file_names, group.file_paths)
+            if (names is not None and names.match(name)) or (paths is not None and paths.match(rel_path)):
+                return not group.negate
+        return None
+
+
+class FileScanner:
+    """
+    Lists the source files worth mapping, using os.scandir (or 'git ls-files' for git checkouts).
+    Skipped are: excluded directory names, paths ignored by .gitignore files (nested ones included,
+    plus .git/info/exclude) and by the project ignore file (.codeaceignore, same syntax), files with other
+    extensions, files larger than max_file_size and files named like generated code (e.g. *.min.js, *_pb2.py).
+    Content checks (binary files, generated-code headers) need to open the file, so they are not part of the
+    scan - see is_binary_or_generated.
+    """
+
+    DEFAULT_EXTENSIONS = ('.py', '.js', '.ts', '.java', '.cpp', '.cs', '.rb', '.go')
+    DEFAULT_EXCLUDED_DIRS = (
+        '.git', '.hg', '.svn', '__pycache__', 'node_modules', 'venv', '.venv', '.env', '.tox',
+        '.mypy_cache', '.pytest_cache',
+    )
+    DEFAULT_GENERATED_PATTERNS = (
+        '*.min.js', '*_pb2.py', '*_pb2_grpc.py', '*.pb.go', '*.pb.cc', '*.g.cs', '*.designer.cs',
+        '*.generated.*', '*.gen.go', '*.bundle.js',
+    )
+    # Markers of generated code in the first bytes of a file (compared lower-case)
+    GENERATED_MARKERS = (b'@generated', b'<auto-generated', b'auto-generated', b'autogenerated', b'do not edit')
+    PROJECT_IGNORE_FILE = '.codeaceignore'
+
+    def __init__(self, src_path: str, extensions: Iterable[str] = DEFAULT_EXTENSIONS,
+                 excluded_dirs: Iterable[str] = DEFAULT_EXCLUDED_DIRS, max_file_size: int = 1024 * 1024,
+                 generated_patterns: Iterable[str] = DEFAULT_GENERATED_PATTERNS, use_gitignore: bool = True,
+                 use_git: bool = False):
+        """
+        Args:
+            src_path (str): Root directory to scan
+            extensions (Iterable[str]): File extensions to include (None for all)
+            excluded_dirs (Iterable[str]): Directory names that are never entered
+            max_file_size (int): Larger files are skipped (bytes, 0 for no limit)
+            generated_patterns (Iterable[str]): File name globs of generated code
+            use_gitignore (bool): Honor .gitignore files and .git/info/exclude
+            use_git (bool): List the files with 'git ls-files' when src_path is a git checkout
+        """
+        self.src_path = src_path
+        self.extensions = {extension.lower() for extension in extensions} if extensions is not None else None
+        self.excluded_dirs = set(excluded_dirs)
+        self.max_file_size = max_file_size
+        self.use_gitignore = use_gitignore
+        self.use_git = use_git
+        # '*<suffix>' patterns are checked with str.endswith, which is much cheaper than a regex per file
+        generated_patterns = [pattern.lower() for pattern in generated_patterns]
+        self._generated_suffixes = tuple(
+            pattern[1:] for pattern in generated_patterns if pattern.startswith('*') and not _has_wildcard(pattern[1:])
+        )
+        other_patterns = [pattern for pattern in generated_patterns if pattern[1:] not in self._generated_suffixes]
+        self._generated_re = re.compile(
+            "|".join(fnmatch.translate(pattern) for pattern in other_patterns)
+        ) if other_patterns else None
+
+    def scan(self) -> List[str]:
+        """
+        Returns:
+            List[str]: Full paths of the files to map, in a stable (sorted, depth-first) order
+        """
+        return [scanned.path for scanned in self.scan_files()]
+
+    def scan_files(self) -> List[ScannedFile]:
+        """
+        Like scan, with the relative path, size and mtime (ns) of every file
+        """
+        if self.use_git and os.path.exists(os.path.join(self.src_path, '.git')):
+            files = self._scan_git()
+            if files is not None:
+                return files
+        return self._scan_tree()
+
+    def _root_rules(self) -> List[IgnoreRules]:
+        rules = []
+        project_ignore = os.path.join(self.src_path, self.PROJECT_IGNORE_FILE)
+        if os.path.isfile(project_ignore):
+            rules.append(IgnoreRules.from_file(project_ignore))
+        git_exclude = os.path.join(self.src_path, '.git', 'info', 'exclude')
+        if self.use_gitignore and os.path.isfile(git_exclude):
+            rules.append(IgnoreRules.from_file(git_exclude))
+        return rules
+
+    @staticmethod
+    def _is_ignored(rules: List[IgnoreRules], rel_path: str, is_dir: bool) -> bool:
+        # Deeper ignore files take precedence over the ones above them
+        for rule in reversed(rules):
+            result = rule.match(rel_path, is_dir)
+            if result is not None:
+                return result
+        return False
+
+    def _is_wanted_name(self, name: str) -> bool:
+        name = name.lower()
+        if self.extensions is not None:
+            dot = name.rfind('.')
+            if dot <= 0 or name[dot:] not in self.extensions:
+                return False
+        if name.endswith(self._generated_suffixes):
+            return False
+        return not (self._generated_re and self._generated_re.match(name))
+
+    def _scan_tree(self) -> List[ScannedFile]:
+        files = []
+        # (directory path, path relative to the root, ignore rules in effect)
+        stack = [(self.src_path, "", self._root_rules())]
+        while stack:
+            directory, rel_directory, rules = stack.pop()
+            try:
+                with os.scandir(directory) as iterator:
+                    entries = sorted(iterator, key=lambda entry: entry.name)
+            except OSError as e:
+                print(f"Error scanning directory {directory}: {str(e)}")
+                continue
+
+            if self.use_gitignore and any(entry.name == '.gitignore' for entry in entries):
+                rules = rules + [IgnoreRules.from_file(os.path.join(directory, '.gitignore'), rel_directory)]
+
+            subdirectories = []
+            for entry in entries:
+                rel_path = f"{rel_directory}/{entry.name}" if rel_directory else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in self.excluded_dirs and not self._is_ignored(rules, rel_path, True):
+                            subdirectories.append((entry.path, rel_path, rules))
+                        continue
+                    if not entry.is_file() or not self._is_wanted_name(entry.name):
+                        continue
+                    if self._is_ignored(rules, rel_path, False):
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if self.max_file_size and stat.st_size > self.max_file_size:
+                    continue
+                files.append(ScannedFile(entry.path, rel_path, stat.st_size, stat.st_mtime_ns))
+            # Reversed, so the stack visits subdirectories in sorted order
+            stack.extend(reversed(subdirectories))
+        return files
+
+    def _scan_git(self) -> Optional[List[ScannedFile]]:
+        """
+        Tracked and untracked-but-not-ignored files from git (git applies all its ignore files itself).
+        Returns None if git can't list the files, so the caller falls back to walking the tree.
+        """
+        try:
+            output = subprocess.run(
+                ['git', '-C', self.src_path, 'ls-files', '-z', '--cached', '--others', '--exclude-standard'],
+                capture_output=True, check=True
+            ).stdout
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Error listing files with git in {self.src_path}: {str(e)}")
+            return None
+
+        project_ignore = os.path.join(self.src_path, self.PROJECT_IGNORE_FILE)
+        project_rules = [IgnoreRules.from_file(project_ignore)] if os.path.isfile(project_ignore) else []
+        files = []
+        for rel_path in sorted(set(output.decode('utf-8', errors='replace').split('\0'))):
+            if not rel_path:
+                continue
+            parts = rel_path.split('/')
+            if not self._is_wanted_name(parts[-1]) or any(part in self.excluded_dirs for part in parts[:-1]):
+                continue
+            if project_rules and self._is_ignored_with_parents(project_rules, parts):
+                continue
+            full_path = os.path.join(self.src_path, *parts)
+            try:
+                stat = os.stat(full_path)
+            except OSError:
+                # Deleted from the working tree but still in the index
+                continue
+            if self.max_file_size and stat.st_size > self.max_file_size:
+                continue
+            files.append(ScannedFile(full_path, rel_path, stat.st_size, stat.st_mtime_ns))
+        return files
+
+    def _is_ignored_with_parents(self, rules: List[IgnoreRules], parts: List[str]) -> bool:
+        """Whether a file or any of its parent directories is ignored"""
+        for depth in range(1, len(parts)):
+            if self._is_ignored(rules, "/".join(parts[:depth]), True):
+                return True
+        return self._is_ignored(rules, "/".join(parts), False)
+
+    @classmethod
+    def is_binary_or_generated(cls, path: str, sniff_bytes: int = 1024) -> bool:
+        """
+        Whether a file looks binary (NUL bytes) or carries a generated-code marker in its first bytes
+        """
+        try:
+            with open(path, 'rb') as f:
+                head = f.read(sniff_bytes)
+        except OSError:
+            return False
+        if b'\0' in head:
+            return True
+        head = head.lower()
+        return any(marker in head for marker in cls.GENERATED_MARKERS)
@@ -0,0 +1,210 @@
+import hashlib
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple
+from langchain_core.messages import SystemMessage
+from .token_manager import TokenManager
+from .prompt_manager import PromptManager
+
+_summary_executor = None
+_summary_executor_lock = threading.Lock()
+
+
+def get_summary_executor() -> Executor:
+    """The thread pool shared by all history managers for their background summaries"""
+    global _summary_executor
+    with _summary_executor_lock:
+        if _summary_executor is None:
+            _summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="codeace-history")
+        return _summary_executor
+
+
+class HistoryManager:
+    """
+    Keeps a conversation within a token budget before it is sent to the model:
+    - Leading system messages and the last keep_turns turns (a turn starts at a user message) are kept verbatim
+    - Turns before them are folded into a rolling summary. The summary is updated in the background,
+      so no turn waits for it; older turns it doesn't cover yet are sent meanwhile, budget permitting,
+      with their tool outputs truncated to tool_output_tokens
+    Works with chat dicts ({"role", "content"}) and LangChain message objects alike.
+    """
+
+    SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+    def __init__(self, llm: Any, max_tokens: int = None, keep_turns: int = 4, tool_output_tokens: int = 500,
+                 executor: Executor = None):
+        """
+        Args:
+            llm (Any): The chat model - used for token counting and for the rolling summary
+            max_tokens (int): Token budget of the compacted history (default: half the model's limit)
+            keep_turns (int): Number of most recent turns kept verbatim
+            tool_output_tokens (int): Tool outputs of older turns are truncated to this many tokens
+            executor (Executor): Runs the summary updates (default: the pool shared by all history managers)
+        """
+        self.llm = llm
+        self.token_manager = TokenManager(llm)
+        self.prompt_manager = PromptManager()
+        self.max_tokens = max_tokens or self.token_manager.max_tokens // 2
+        self.keep_turns = max(keep_turns, 1)
+        self.tool_output_tokens = tool_output_tokens
+        self.summary = ""
+        self.summarized_turns = 0
+        # Hash of the last summarized turn - tells whether the summary still belongs to the conversation
+        self._summary_anchor: Optional[str] = None
+        self._lock = threading.Lock()
+        # At most one summary update per conversation is pending (see _schedule_summary)
+        self._executor = executor or get_summary_executor()
+        self._pending: Optional[Future] = None
+        # content hash -> tokens
+        self._tokens_cache = {}
+
+    @staticmethod
+    def get_role(message: Any) -> str:
+        """The message role: system, user, assistant or tool"""
+        role = message.get("role", "") if isinstance(message, dict) else getattr(message, "type", "")
+        return {"human": "user", "ai": "assistant"}.get(role, role)
+
+    @staticmethod
+    def get_content(message: Any) -> str:
+        content = message.get("content", "") if isinstance(message, dict) else message.content
+        return content if isinstance(content, str) else str(content)
+
+    @staticmethod
+    def _with_content(message: Any, content: str) -> Any:
+        if isinstance(message, dict):
+            return {**message, "content": content}
+        return message.model_copy(update={"content": content})
+
+    def _message_tokens(self, message: Any) -> int:
+        content = self.get_content(message)
+        key = hashlib.sha256(content.encode('utf-8')).digest()
+        tokens = self._tokens_cache.get(key)
+        if tokens is None:
+            # A few tokens of per-message overhead (role, separators)
+            tokens = self.token_manager.calculate_tokens(content) + 4
+            self._tokens_cache[key] = tokens
+        return tokens
+
+    def _tokens(self, messages: List[Any]) -> int:
+        return sum(self._message_tokens(message) for message in messages)
+
+    def _split_turns(self, messages: List[Any]) -> Tuple[List[Any], List[List[Any]]]:
+        """Split messages into the leading system messages and turns"""
+        index = 0
+        while index < len(messages) and self.get_role(messages[index]) == "system":
+            index += 1
+        turns = []
+        for message in messages[index:]:
+            if not turns or self.get_role(message) == "user":
+                turns.append([])
+            turns[-1].append(message)
+        return messages[:index], turns
+
+    def _turn_hash(self, turn: List[Any]) -> str:
+        digest = hashlib.sha256()
+        for message in turn:
+            digest.update(f"{self.get_role(message)}\0{self.get_content(message)}\0".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _truncate_tool_outputs(self, turn: List[Any]) -> List[Any]:
+        return [
+            self._with_content(message, self.token_manager.truncate_text(self.get_content(message), self.tool_output_tokens))
+            if self.get_role(message) == "tool" else message
+            for message in turn
+        ]
+
+    def compact(self, messages: List[Any]) -> List[Any]:
+        """
+        Return the messages to send to the model: system messages, the rolling summary (if any)
+        and as many recent turns as fit the budget. The input list is not modified.
+        A background summary update is scheduled when turns fall out of the verbatim window.
+        """
+        system_messages, turns = self._split_turns(messages)
+        self._collect_summary(turns)
+        with self._lock:
+            summarized_turns, summary = self.summarized_turns, self.summary
+
+        kept_start = max(len(turns) - self.keep_turns, 0)
+        old_turns = [self._truncate_tool_outputs(turn) for turn in turns[summarized_turns:kept_start]]
+        kept_turns = turns[kept_start:]
+
+        prefix = list(system_messages)
+        if summary:
+            content = self.SUMMARY_PREFIX + summary
+            prefix.append(
+                {"role": "system", "content": content} if not messages or isinstance(messages[0], dict)
+                else SystemMessage(content=content)
+            )
+        budget = self.max_tokens - self._tokens(prefix)
+
+        def total(turn_list: List[List[Any]]) -> int:
+            return sum(self._tokens(turn) for turn in turn_list)
+
+        # Degrade step by step: drop unsummarized turns, truncate tool outputs of kept turns,
+        # drop kept turns - the last turn always stays
+        while old_turns and total(old_turns) + total(kept_turns) > budget:
+            old_turns.pop(0)
+        if total(kept_turns) > budget:
+            kept_turns = [self._truncate_tool_outputs(turn) for turn in kept_turns[:-1]] + kept_turns[-1:]
+        while len(kept_turns) > 1 and total(kept_turns) > budget:
+            kept_turns.pop(0)
+        if kept_turns and total(kept_turns) > budget:
+            kept_turns = [self._truncate_tool_outputs(kept_turns[-1])]
+
+        if kept_start > summarized_turns:
+            self._schedule_summary(turns[summarized_turns:kept_start], summarized_turns, kept_start, summary)
+
+        return prefix + [message for turn in old_turns + kept_turns for message in turn]
+
+    def _collect_summary(self, turns: List[List[Any]]) -> None:
+        """Apply a finished background summary and drop a summary that doesn't match the conversation"""
+        with self._lock:
+            if self._pending is not None and self._pending.done():
+                future, self._pending = self._pending, None
+                try:
+                    summary, base_turns, covered_turns, anchor = future.result()
+                    # Only a summary extending the current one is applied
+                    if base_turns == self.summarized_turns:
+                        self.summary, self.summarized_turns, self._summary_anchor = summary, covered_turns, anchor
+                except Exception as e:
+                    print(f"Error summarizing the conversation history: {str(e)}")
+
+            if self.summarized_turns and (
+                self.summarized_turns > len(turns)
+                or self._turn_hash(turns[self.summarized_turns - 1]) != self._summary_anchor
+            ):
+                # The conversation was replaced (new chat, loaded history)
+                self.summary, self.summarized_turns, self._summary_anchor = "", 0, None
+
+    def _schedule_summary(self, new_turns: List[List[Any]], base_turns: int, covered_turns: int, summary: str) -> None:
+        with self._lock:
+            if self._pending is not None:
+                return
+            anchor = self._turn_hash(new_turns[-1])
+            self._pending = self._executor.submit(
+                self._summarize, new_turns, base_turns, covered_turns, anchor, summary
+            )
+
+    def _summarize(self, new_turns: List[List[Any]], base_turns: int, covered_turns: int, anchor: str, summary: str):
+        new_messages = "\n\n".join(
+            f"{self.get_role(message)}: {self.get_content(message)}"
+            for turn in new_turns for message in self._truncate_tool_outputs(turn)
+        )
+        summary_chain = self.prompt_manager.create_history_summary_chain(self.llm)
+        updated_summary = summary_chain.invoke(
+            {"existing_summary": summary or "(none)", "new_messages": new_messages},
+            config=self.token_manager.telemetry.llm_config("history_summary")
+        )
+        return updated_summary, base_turns, covered_turns, anchor
+
+    def wait_for_summary(self, timeout: float = None) -> None:
+        """Block until a running summary update is finished (it is applied on the next compact)"""
+        with self._lock:
+            pending = self._pending
+        if pending is not None:
+            pending.exception(timeout)
+
+    def reset(self) -> None:
+        """Forget the rolling summary, e.g. when a new chat starts"""
+        with self._lock:
+            self.summary, self.summarized_turns, self._summary_anchor = "", 0, None
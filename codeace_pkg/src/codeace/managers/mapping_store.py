@@ -0,0 +1,267 @@
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+
+class MappingStore(ABC):
+    """
+    Base class for mapping storage backends.
+    A backend keeps one mapping entry and one fingerprint per file, keyed by the
+    file path relative to the source directory (the mapping 'file_name').
+    """
+
+    @abstractmethod
+    def upsert(self, mapping_data: Dict) -> None:
+        """Add or update a mapping entry"""
+
+    @abstractmethod
+    def remove(self, file_names: List[str]) -> None:
+        """Remove the mapping entries and fingerprints of the given files"""
+
+    @abstractmethod
+    def get_all(self) -> List[Dict]:
+        """Return all mapping entries in insertion order"""
+
+    @abstractmethod
+    def get_file_names(self) -> List[str]:
+        """Return the names of all mapped files"""
+
+    @abstractmethod
+    def get_fingerprints(self) -> Dict[str, Dict]:
+        """Return the stored fingerprints keyed by file name"""
+
+    @abstractmethod
+    def get_revision(self) -> int:
+        """Return a value that changes whenever the mapping entries change"""
+
+    @abstractmethod
+    def save_fingerprints(self, fingerprints: Dict[str, Dict]) -> None:
+        """Add or update the given fingerprints"""
+
+
+class JsonMappingStore(MappingStore):
+    """
+    Legacy backend - the whole mapping lives in code_mapping.json and is rewritten on every update.
+    """
+
+    def __init__(self, app_data_path: str):
+        self.main_json_path = os.path.join(app_data_path, "code_mapping.json")
+        self.fingerprints_path = os.path.join(app_data_path, "file_fingerprints.json")
+        self._lock = threading.Lock()
+        if not os.path.exists(self.main_json_path):
+            self._write_json(self.main_json_path, [])
+
+    @staticmethod
+    def _write_json(path: str, data, indent: int = None) -> None:
+        """Write JSON to a temp file and swap it in, so a crash never leaves a truncated file"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent)
+        os.replace(tmp_path, path)
+
+    def _read_mappings(self) -> List[Dict]:
+        try:
+            with open(self.main_json_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+        except IOError as e:
+            raise IOError(f"Error reading mapping file at {self.main_json_path}: {str(e)}")
+
+    def upsert(self, mapping_data: Dict) -> None:
+        try:
+            with self._lock:
+                mappings = self._read_mappings()
+                file_path = mapping_data.get('file_name')
+                existing_index = next(
+                    (index for (index, d) in enumerate(mappings)
+                    if d.get('file_name') == file_path),
+                    None
+                )
+                if existing_index is not None:
+                    mappings[existing_index] = mapping_data
+                else:
+                    mappings.append(mapping_data)
+                self._write_json(self.main_json_path, mappings, indent=2)
+        except IOError as e:
+            raise IOError(f"Error updating mapping file at {self.main_json_path}: {str(e)}")
+
+    def remove(self, file_names: List[str]) -> None:
+        to_remove = set(file_names)
+        try:
+            with self._lock:
+                mappings = [m for m in self._read_mappings() if m.get('file_name') not in to_remove]
+                self._write_json(self.main_json_path, mappings, indent=2)
+                fingerprints = self.get_fingerprints()
+                for file_name in to_remove:
+                    fingerprints.pop(file_name, None)
+                self._write_json(self.fingerprints_path, fingerprints)
+        except IOError as e:
+            raise IOError(f"Error updating mapping file at {self.main_json_path}: {str(e)}")
+
+    def get_all(self) -> List[Dict]:
+        return self._read_mappings()
+
+    def get_revision(self) -> int:
+        try:
+            stat = os.stat(self.main_json_path)
+        except FileNotFoundError:
+            return 0
+        # Every write swaps in a new file, so the inode changes even where two writes share an mtime tick
+        return hash((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+
+    def get_file_names(self) -> List[str]:
+        return [m['file_name'] for m in self._read_mappings()]
+
+    def get_fingerprints(self) -> Dict[str, Dict]:
+        try:
+            with open(self.fingerprints_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (IOError, ValueError) as e:
+            raise IOError(f"Error reading fingerprints file at {self.fingerprints_path}: {str(e)}")
+
+    def save_fingerprints(self, fingerprints: Dict[str, Dict]) -> None:
+        try:
+            with self._lock:
+                stored = self.get_fingerprints()
+                stored.update(fingerprints)
+                self._write_json(self.fingerprints_path, stored)
+        except IOError as e:
+            raise IOError(f"Error saving fingerprints to {self.fingerprints_path}: {str(e)}")
+
+
+class SqliteMappingStore(MappingStore):
+    """
+    SQLite backend with a primary key on file_name.
+    Every update is a single O(1) upsert committed in its own transaction (WAL journal),
+    so a killed mapping run keeps everything saved up to that point.
+    An existing code_mapping.json / file_fingerprints.json is imported on first use.
+    """
+
+    def __init__(self, app_data_path: str):
+        self.db_path = os.path.join(app_data_path, "code_mapping.db")
+        self.main_json_path = os.path.join(app_data_path, "code_mapping.json")
+        self.fingerprints_path = os.path.join(app_data_path, "file_fingerprints.json")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS mappings (file_name TEXT PRIMARY KEY, data TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints "
+                "(file_name TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, hash TEXT)"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._import_legacy_json()
+
+    def _import_legacy_json(self) -> None:
+        """Import mappings and fingerprints written by the JSON backend (only once)"""
+        with self._lock:
+            imported = self._conn.execute("SELECT value FROM meta WHERE key = 'legacy_json_imported'").fetchone()
+            if imported:
+                return
+            mappings = []
+            fingerprints = {}
+            try:
+                if os.path.exists(self.main_json_path):
+                    with open(self.main_json_path, 'r', encoding='utf-8') as f:
+                        mappings = json.load(f)
+                if os.path.exists(self.fingerprints_path):
+                    with open(self.fingerprints_path, 'r', encoding='utf-8') as f:
+                        fingerprints = json.load(f)
+            except (IOError, ValueError) as e:
+                raise IOError(f"Error importing legacy mapping files from {self.main_json_path}: {str(e)}")
+
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO mappings (file_name, data) VALUES (?, ?)",
+                    [(m['file_name'], json.dumps(m)) for m in mappings if m.get('file_name')]
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO fingerprints (file_name, size, mtime, hash) VALUES (?, ?, ?, ?)",
+                    [(name, fp['size'], fp['mtime'], fp['hash']) for name, fp in fingerprints.items()]
+                )
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_json_imported', '1')")
+                self._bump_revision()
+
+    def _bump_revision(self) -> None:
+        """Increment the mapping revision - must run inside the writing transaction"""
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('revision', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+        )
+
+    def upsert(self, mapping_data: Dict) -> None:
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT INTO mappings (file_name, data) VALUES (?, ?) "
+                    "ON CONFLICT(file_name) DO UPDATE SET data = excluded.data",
+                    (mapping_data['file_name'], json.dumps(mapping_data))
+                )
+                self._bump_revision()
+        except sqlite3.Error as e:
+            raise IOError(f"Error updating mapping database at {self.db_path}: {str(e)}")
+
+    def remove(self, file_names: List[str]) -> None:
+        rows = [(file_name,) for file_name in file_names]
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany("DELETE FROM mappings WHERE file_name = ?", rows)
+                self._conn.executemany("DELETE FROM fingerprints WHERE file_name = ?", rows)
+                self._bump_revision()
+        except sqlite3.Error as e:
+            raise IOError(f"Error updating mapping database at {self.db_path}: {str(e)}")
+
+    def get_all(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM mappings ORDER BY rowid").fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def get_revision(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return int(row[0]) if row else 0
+
+    def get_file_names(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT file_name FROM mappings ORDER BY rowid").fetchall()
+        return [file_name for (file_name,) in rows]
+
+    def get_fingerprints(self) -> Dict[str, Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT file_name, size, mtime, hash FROM fingerprints").fetchall()
+        return {name: {"size": size, "mtime": mtime, "hash": hash_} for name, size, mtime, hash_ in rows}
+
+    def save_fingerprints(self, fingerprints: Dict[str, Dict]) -> None:
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO fingerprints (file_name, size, mtime, hash) VALUES (?, ?, ?, ?)",
+                    [(name, fp['size'], fp['mtime'], fp['hash']) for name, fp in fingerprints.items()]
+                )
+        except sqlite3.Error as e:
+            raise IOError(f"Error saving fingerprints to {self.db_path}: {str(e)}")
+
+
+MAPPING_STORE_BACKENDS = {
+    "sqlite": SqliteMappingStore,
+    "json": JsonMappingStore,
+}
+
+
+def create_mapping_store(backend: str, app_data_path: str) -> MappingStore:
+    """
+    Create a mapping store by backend name (see MAPPING_STORE_BACKENDS)
+    """
+    if backend not in MAPPING_STORE_BACKENDS:
+        raise ValueError(f"Mapping store backend {backend} is not supported.")
+    return MAPPING_STORE_BACKENDS[backend](app_data_path)
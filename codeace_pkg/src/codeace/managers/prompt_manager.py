@@ -0,0 +1,414 @@
+from typing import List, Dict, Optional
+from langchain_core.prompts import PromptTemplate
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+from pydantic import BaseModel, Field
+from langchain_core.runnables import RunnableSequence
+
+class CodeFileAnalysis(BaseModel):
+    """Schema for code file analysis output"""
+    description: str = Field(description="A deep and clear description of what the file does or represents")
+    functions: str = Field(description="Comma-separated list of function names implemented in the file")
+
+class SymbolDescription(BaseModel):
+    """Schema for a single symbol description"""
+    name: str = Field(description="The symbol name exactly as given")
+    description: str = Field(description="A short, clear description of what the symbol does")
+
+class CodeSymbolsAnalysis(BaseModel):
+    """Schema for symbols analysis output"""
+    symbols: List[SymbolDescription] = Field(description="One description per given symbol")
+
+class RelevantFiles(BaseModel):
+    """Schema for relevant files output"""
+    files: List[str] = Field(description="List of relevant file names that match the user query")
+
+class PromptManager:
+    """Manager class for handling different prompt templates"""
+    
+    def __init__(self):
+        pass
+        
+    def create_mapping_chain(self, llm)-> RunnableSequence:
+        """Creates a mapping chain combining prompt template, LLM, and parser"""
+        # Initialize the JSON parser with our schema
+        parser = JsonOutputParser(pydantic_object=CodeFileAnalysis)
+        
+        # Define the system prompt
+        system_prompt = """You are an expert developer in the programming language specified by the user (default is C#). 
+                                Your task is to analyze code files and provide detailed information about them. 
+                                You have a deep understanding of software architecture, design patterns, 
+                                and best practices in software development.
+
+                                When assigning tags, focus exclusively on the specific functionality, feature, or domain that the code addresses. 
+                                Ignore the type or purpose of the file (e.g., test, manager, helper) and concentrate on the core content and what it actually does or represents in terms of business logic or system functionality."""
+
+        # Define the mapping prompt template
+        mapping_prompt = PromptTemplate(
+            template="""
+                {system_prompt}
+
+                Please analyze the following code file and provide the following information in JSON format:
+
+                1. description: A deep and clear description of what the file does or represents
+                2. functions: An array of function names implemented in the file in ONE line split by ',' 
+                - Focus on the core content and purpose of the code, not the type of file it is.
+
+                Here is the file:
+
+                File name: {file_name}
+                {file_content}
+
+                {format_instructions}
+                """,
+            input_variables=["file_content"],
+            partial_variables={
+                "system_prompt": system_prompt,
+                "format_instructions": parser.get_format_instructions()
+            }
+        )
+        
+        return mapping_prompt | llm | parser
+    
+
+    def create_symbols_mapping_chain(self, llm) -> RunnableSequence:
+        """Creates a chain that describes a group of symbols (classes, functions, methods) of a large file"""
+        parser = JsonOutputParser(pydantic_object=CodeSymbolsAnalysis)
+        prompt_template = PromptTemplate(
+            template="""
+                You are an expert developer. The following symbols are part of the file {file_name},
+                which is too large to analyze at once. Each symbol is given with its kind, name, line range and code.
+
+                For every symbol, write a short, clear description (1-2 sentences) of what it does.
+                Focus on the functionality and business logic, not on the kind of symbol.
+
+                {symbols_content}
+
+                {format_instructions}
+                """,
+            input_variables=["file_name", "symbols_content"],
+            partial_variables={"format_instructions": parser.get_format_instructions()}
+        )
+
+        return prompt_template | llm | parser
+
+    def format_symbols_content(self, blocks: List[Dict]) -> str:
+        """Formats symbol code blocks (kind, name, start_line, end_line, code) for the symbols mapping prompt"""
+        return "\n\n".join(
+            f"### {block['kind']} {block['name']} (lines {block['start_line']}-{block['end_line']})\n{block['code']}"
+            for block in blocks
+        )
+
+    def format_symbols_outline(self, symbols: List[Dict]) -> str:
+        """Formats described symbols as a file outline for the mapping prompt"""
+        return "\n".join(
+            f"{symbol['kind']} {symbol['name']} (lines {symbol['start_line']}-{symbol['end_line']}): {symbol.get('description', '')}"
+            for symbol in symbols
+        )
+
+    def create_summery_update_chain(self, llm)-> RunnableSequence:
+        """Creates a mapping chain combining prompt template, LLM, and parser"""
+         # Define a prompt template for updating the summary
+        prompt_template = PromptTemplate(
+            template=(
+                "You are a professional technical writer. Your task is to maintain a comprehensive, "
+                "cohesive, and natural language description of a software project. This description should "
+                "explain the purpose, functionality, and structure of the project in simple terms for developers, "
+                "managers, and stakeholders. It should not include code snippets.\n\n"
+                "Below is the current project summary, followed by the content of a new file.\n\n"
+                "1. **Read the existing project summary** to understand the overall context.\n"
+                "2. **Incorporate relevant details** from the new file's content into the project summary.\n"
+                "3. Ensure the updated summary is easy to read, written in natural language, and avoids code snippets.\n\n"
+                "Current Project Summary:\n{existing_summary}\n\n"
+                "New File:\n{file_name}\n\n"
+                "File Content:\n{file_content}\n\n"
+                "Updated Project Summary (natural language only):"
+            ),
+            input_variables=["existing_summary", "file_name", "file_content"],
+        )
+
+        # Combine the components: prompt template, LLM, and output parser
+        return prompt_template | llm | StrOutputParser()
+
+    def create_file_summary_chain(self, llm) -> RunnableSequence:
+        """Creates a chain that summarizes a single file on its own (leaf of the hierarchical summary)"""
+        prompt_template = PromptTemplate(
+            template=(
+                "You are a professional technical writer. Describe the role of the following file "
+                "within its software project in a short paragraph (3-5 sentences) of natural language. "
+                "Explain what it is responsible for and how it is likely used by the rest of the project. "
+                "Do not include code snippets.\n\n"
+                "File:\n{file_name}\n\n"
+                "File Content:\n{file_content}\n\n"
+                "File Summary (natural language only):"
+            ),
+            input_variables=["file_name", "file_content"],
+        )
+
+        return prompt_template | llm | StrOutputParser()
+
+    def create_summary_merge_chain(self, llm) -> RunnableSequence:
+        """Creates a chain that merges the summaries of a directory's files and subdirectories"""
+        prompt_template = PromptTemplate(
+            template=(
+                "You are a professional technical writer. Your task is to write a cohesive, natural language "
+                "description of the {node_type} '{node_name}' of a software project, based on the summaries of "
+                "its files and subdirectories below. Explain its purpose, functionality and structure in simple "
+                "terms for developers, managers, and stakeholders.\n\n"
+                "1. **Combine** the summaries into a single description - do not list them one by one.\n"
+                "2. **Keep** the important responsibilities and how the parts work together.\n"
+                "3. Ensure the description is easy to read, written in natural language, and avoids code snippets.\n\n"
+                "Summaries:\n{child_summaries}\n\n"
+                "Description of the {node_type} (natural language only):"
+            ),
+            input_variables=["node_type", "node_name", "child_summaries"],
+        )
+
+        return prompt_template | llm | StrOutputParser()
+
+    def create_history_summary_chain(self, llm) -> RunnableSequence:
+        """Creates a chain that folds older conversation turns into a rolling summary"""
+        prompt_template = PromptTemplate(
+            template=(
+                "You are summarizing a conversation between a user and an AI assistant about a software project, "
+                "so it can continue without the full history.\n\n"
+                "1. **Start from the existing summary** and add the new messages to it.\n"
+                "2. **Keep** the user's goals, decisions, file and function names, facts found by tools and open questions.\n"
+                "3. **Drop** greetings, repetitions and raw tool output that was already used.\n"
+                "4. Be concise - no more than a few short paragraphs.\n\n"
+                "Existing Summary:\n{existing_summary}\n\n"
+                "New Messages:\n{new_messages}\n\n"
+                "Updated Summary:"
+            ),
+            input_variables=["existing_summary", "new_messages"],
+        )
+
+        return prompt_template | llm | StrOutputParser()
+
+    def create_mappint_searcher_promtp_chain(self, llm)-> RunnableSequence:
+        """Creates a mapping chain combining prompt template, LLM, and parser"""
+        parser = JsonOutputParser(pydantic_object=RelevantFiles)
+        
+        # Updated search prompt to be more strict about relevance
+        search_prompt = PromptTemplate(
+            template="""You are an AI assistant helping users find relevant files in a codebase.
+                Analyze the user query carefully - if it's just a greeting or doesn't contain a specific
+                technical question or request, return an empty list of files.
+                
+                The JSON data contains file information in this format:
+                [
+                    {{
+                        "file_name": "path/to/file",
+                        "description": "description of the file",
+                        "functions": "func1,func2,..."
+                    }},
+                    ...
+                ]
+
+                User Query: {user_query}
+                Available Files Data: {mapping_data}
+
+                Return files ONLY if the query contains a specific technical question or request.
+                For greetings or general conversation, return an empty list.
+                {format_instructions}
+                """,
+            input_variables=["user_query", "mapping_data"],
+            partial_variables={
+                "format_instructions": parser.get_format_instructions()
+            }
+        )
+        
+        return search_prompt | llm | parser
+
+    def create_code_query_chain(self, llm) -> RunnableSequence:
+        """Creates a chain for answering queries based on code content"""
+        prompt_template = PromptTemplate(
+            template=self._get_code_query_prompt_template(),
+            input_variables=["context", "code_content", "user_query", "previous_response_context", "continuation_context", "response_type"]
+        )
+        
+        return prompt_template | llm | StrOutputParser()
+
+    def _get_code_query_prompt_template(self) -> str:
+        """Returns the template for code query prompts"""
+        return """You are an expert software developer and code analyst. 
+        
+        Guidelines:
+        1. For general greetings or non-technical queries, respond briefly and naturally
+        2. For technical questions:
+            - Analyze the code thoroughly
+            - Reference specific parts of the code when relevant
+            - Provide code examples if needed
+            - Acknowledge any uncertainties
+            - Focus on the specific files and code provided
+        3. Keep responses concise and relevant to the query's complexity
+        4. If this is a continuation of a previous response, build upon it without repeating information
+        
+        {context}
+
+        {previous_response_context}
+        
+        Code Files Content:
+        {code_content}
+        
+        User Question: {user_query}
+        
+        {continuation_context}
+        
+        Please provide a{response_type} answer that matches the complexity and nature of the query:"""
+
+    def format_extra_context(self, extra_context_doc: str) -> str:
+        """Formats the extra context (documentation sections, user notes) for the query prompts"""
+        extra_context_doc = (extra_context_doc or "").strip()
+        return f"Additional Context:\n{extra_context_doc}" if extra_context_doc else ""
+
+    def prepare_query_context(self, previous_response: str, has_remaining_files: bool) -> Dict[str, str]:
+        """Prepares context information for the code query"""
+        previous_response_context = f"Previous partial response:\n{previous_response}" if previous_response else ""
+        
+        continuation_context = ""
+        response_type = " complete"
+        if has_remaining_files:
+            continuation_context = (
+                "NOTE: There are more files to analyze after this. "
+                "Please provide a partial response based on the current files only. "
+                "Your response will be combined with analysis of the remaining files."
+            )
+            response_type = " partial"
+        
+        return {
+            "previous_response_context": previous_response_context,
+            "continuation_context": continuation_context,
+            "response_type": response_type
+        }
+
+    def _get_dependencies_analysis_prompt_template(self) -> str:
+        """Returns the template for analyzing project dependencies and modules"""
+        return """You are an expert software architect analyzing project dependencies and modules.
+
+        Your task is to create a concise analysis focusing on reusable code components:
+
+        1. Identify and extract code snippets that could be useful for future implementations
+        2. For each relevant code section:
+           - Extract the exact code snippet
+           - Add a brief description of its purpose
+           - Note any dependencies or requirements
+        3. Focus only on code that could be directly reused or adapted
+        4. Create a compact summary that can serve as a self-contained reference
+
+        Guidelines:
+        - Include complete, working code snippets that can be used without referring back to source files
+        - Keep descriptions brief but clear
+        - Include only the most relevant and reusable components
+        - Format code snippets with proper markdown for easy extraction
+
+        {context}
+        
+        Dependencies and Modules Content:
+        {code_content}
+        
+        User Question: {user_query}
+        
+        {continuation_context}
+        
+        Please provide a{response_type} analysis in this format:
+        1. Brief overview of found functionality (2-3 sentences max)
+        2. Relevant code snippets formatted as:       ```language
+           // Purpose: [brief description]
+           // Dependencies: [if any]
+           [exact code]       ```
+        3. Quick reference of integration points (if applicable)"""
+
+    def create_dependencies_analysis_chain(self, llm) -> RunnableSequence:
+        """Creates a chain for analyzing project dependencies and modules"""
+        prompt_template = PromptTemplate(
+            template=self._get_dependencies_analysis_prompt_template(),
+            input_variables=["context", "code_content", "user_query", "continuation_context", "response_type"]
+        )
+        
+        return prompt_template | llm | StrOutputParser()
+
+    def create_answers_combine_chain(self, llm) -> RunnableSequence:
+        """Creates a chain that merges partial answers (one per code chunk) into a single answer"""
+        prompt_template = PromptTemplate(
+            template="""You are an expert software developer and code analyst.
+
+            The user's question was answered separately for several parts of the codebase.
+            Each partial answer below is based only on the code files of its part.
+
+            Guidelines:
+            1. Combine the partial answers into one complete, coherent answer to the question
+            2. Keep every relevant detail, code reference and code example from the partial answers
+            3. Remove repetitions and statements that a part could not answer
+            4. If partial answers contradict each other, mention it
+            5. Do not add information that is not in the partial answers
+
+            {context}
+
+            User Question: {user_query}
+
+            Partial Answers:
+            {partial_answers}
+
+            Please provide the combined answer:""",
+            input_variables=["context", "user_query", "partial_answers"]
+        )
+        
+        return prompt_template | llm | StrOutputParser()
+
+    def format_partial_answers(self, partial_answers: List[str]) -> str:
+        """Formats partial answers for the combine prompt"""
+        return "\n\n".join(
+            f"--- Part {index + 1} of {len(partial_answers)} ---\n{answer}"
+            for index, answer in enumerate(partial_answers)
+        )
+
+    def create_prompt_improver_chain(self, llm) -> RunnableSequence:
+        """Creates a chain for improving user prompts with documentation context"""
+        prompt_template = PromptTemplate(
+            template="""You are an expert prompt engineer. Your task is to improve and restructure the user's query
+            into a clear, concise prompt that will be used to generate code.
+
+            Guidelines:
+            1. Analyze both the user query and provided documentation
+            2. Create a structured prompt that:
+               - Maintains the original intent
+               - Is more specific and detailed
+               - Includes relevant technical context
+               - Remains concise (no more than 2-3 sentences)
+            3. DO NOT:
+               - Add unnecessary complexity
+               - Deviate from the original request
+               - Make assumptions beyond the provided information
+
+            Documentation Context:
+            {documentation}
+
+            Original User Query:
+            {user_query}
+
+            Please provide an improved prompt that is clear, specific, and ready for code generation:""",
+            input_variables=["documentation", "user_query"]
+        )
+        
+        return prompt_template | llm | StrOutputParser()
+
+if __name__ == "__main__":
+    prompt_manager = PromptManager()
+    prompt_template = PromptTemplate(
+            template=(
+                "You are a professional technical writer. Your task is to maintain a comprehensive, "
+                "cohesive, and natural language description of a software project. This description should "
+                "explain the purpose, functionality, and structure of the project in simple terms for developers, "
+                "managers, and stakeholders. It should not include code snippets.\n\n"
+                "Below is the current project summary, followed by the content of a new file.\n\n"
+                "1. **Read the existing project summary** to understand the overall context.\n"
+                "2. **Incorporate relevant details** from the new file's content into the project summary.\n"
+                "3. Ensure the updated summary is easy to read, written in natural language, and avoids code snippets.\n\n"
+                "Current Project Summary:\n{existing_summary}\n\n"
+                "New File:\n{file_name}\n\n"
+                "File Content:\n{file_content}\n\n"
+                "Updated Project Summary (natural language only):"
+            ),
+            input_variables=["existing_summary", "file_name", "file_content"],
+        )
+    
\ No newline at end of file
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+
+class LexicalIndex:
+    """
+    A local BM25 inverted index over the mapping entries (file_name, description, functions).
+    Used to pre-select candidate files before (or instead of) asking the LLM for relevance.
+    """
+
+    INDEX_VERSION = 1
+    # How many times the tokens of each field are counted - file and function names are stronger signals
+    FIELD_WEIGHTS = {"file_name": 3, "functions": 2, "description": 1}
+    STOPWORDS = {
+        "a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for", "from", "how", "in", "is",
+        "it", "of", "on", "or", "that", "the", "this", "to", "what", "when", "where", "which", "who",
+        "why", "with", "can", "file", "files", "code", "py",
+    }
+    _WORD_RE = re.compile(r"[A-Za-z0-9_]+")
+    _PART_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_names: List[str] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.avg_doc_length = 0.0
+        self.signature = ""
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        """
+        Split text into lower-case terms, breaking identifiers on camelCase and snake_case.
+        Multi-part identifiers are also kept whole, so an exact identifier in the query scores higher.
+        """
+        tokens = []
+        for word in cls._WORD_RE.findall(text or ""):
+            parts = [part.lower() for chunk in word.split('_') for part in cls._PART_RE.findall(chunk)]
+            if len(parts) > 1:
+                tokens.append("".join(parts))
+            tokens.extend(parts)
+        return [cls._fold_plural(token) for token in tokens if len(token) > 1 and token not in cls.STOPWORDS]
+
+    @staticmethod
+    def _fold_plural(token: str) -> str:
+        """Cheap plural folding so 'tokens' matches 'token' (applied to queries and documents alike)"""
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            return token[:-1]
+        return token
+
+    @staticmethod
+    def _field_text(value) -> str:
+        if isinstance(value, (list, tuple)):
+            return " ".join(str(v) for v in value)
+        return str(value or "")
+
+    @staticmethod
+    def compute_signature(mapping_data: List[Dict]) -> str:
+        """
+        Hash of the indexed fields, used to detect an index that is out of date with the mapping
+        """
+        digest = hashlib.sha256()
+        for item in mapping_data:
+            digest.update(json.dumps(
+                [item.get('file_name'), item.get('description'), item.get('functions')]
+            ).encode('utf-8'))
+        return digest.hexdigest()
+
+    @classmethod
+    def build(cls, mapping_data: List[Dict], **kwargs) -> "LexicalIndex":
+        """
+        Build the index from mapping entries
+        """
+        index = cls(**kwargs)
+        postings = defaultdict(list)
+        for doc_id, item in enumerate(mapping_data):
+            terms = Counter()
+            for field, weight in cls.FIELD_WEIGHTS.items():
+                for token in cls.tokenize(cls._field_text(item.get(field))):
+                    terms[token] += weight
+            index.doc_names.append(item['file_name'])
+            index.doc_lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                postings[term].append((doc_id, frequency))
+        index.postings = dict(postings)
+        index.avg_doc_length = sum(index.doc_lengths) / len(index.doc_lengths) if index.doc_lengths else 0.0
+        index.signature = cls.compute_signature(mapping_data)
+        return index
+
+    def search(self, query: str, top_k: int = 20) -> List[Tuple[str, float]]:
+        """
+        Rank the indexed files against the query.
+
+        Returns:
+            List[Tuple[str, float]]: Up to top_k (file_name, score) pairs, best first
+        """
+        total_docs = len(self.doc_names)
+        if not total_docs:
+            return []
+        scores = defaultdict(float)
+        for term in set(self.tokenize(query)):
+            term_postings = self.postings.get(term)
+            if not term_postings:
+                continue
+            doc_frequency = len(term_postings)
+            idf = math.log(1 + (total_docs - doc_frequency + 0.5) / (doc_frequency + 0.5))
+            for doc_id, frequency in term_postings:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_id] / (self.avg_doc_length or 1)
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+        return [(self.doc_names[doc_id], score) for doc_id, score in ranked]
+
+    def save(self, path: str) -> None:
+        """
+        Persist the index as JSON (written atomically)
+        """
+        data = {
+            "version": self.INDEX_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "signature": self.signature,
+            "doc_names": self.doc_names,
+            "doc_lengths": self.doc_lengths,
+            "postings": self.postings,
+        }
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except IOError as e:
+            raise IOError(f"Error saving search index to {path}: {str(e)}")
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        """
+        Load a persisted index. Returns None if it is missing or written by another index version.
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if data.get("version") != cls.INDEX_VERSION:
+            return None
+        index = cls(k1=data["k1"], b=data["b"])
+        index.signature = data["signature"]
+        index.doc_names = data["doc_names"]
+        index.doc_lengths = data["doc_lengths"]
+        index.postings = {term: [tuple(p) for p in postings] for term, postings in data["postings"].items()}
+        index.avg_doc_length = sum(index.doc_lengths) / len(index.doc_lengths) if index.doc_lengths else 0.0
+        return index
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+
+class SummaryTree:
+    """
+    Cache of the hierarchical project summary: file -> directory -> project.
+    File nodes are keyed by the file's content hash, directory nodes by a hash of their
+    children's keys, so a changed file only invalidates the nodes on its path to the root.
+    Node names are POSIX relative paths; the project root is the directory "".
+    """
+
+    TREE_VERSION = 1
+    ROOT = ""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, Dict] = {}
+        self.dirs: Dict[str, Dict] = {}
+        # directory -> (child files, child directories), built by get_directory_levels
+        self._children: Dict[str, Tuple[List[str], List[str]]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get("version") != self.TREE_VERSION:
+            return
+        self.files = data.get("files", {})
+        self.dirs = data.get("dirs", {})
+
+    def save(self) -> None:
+        """
+        Persist the tree as JSON (written atomically)
+        """
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": self.TREE_VERSION, "files": self.files, "dirs": self.dirs}, f)
+            os.replace(tmp_path, self.path)
+        except IOError as e:
+            raise IOError(f"Error saving summary tree to {self.path}: {str(e)}")
+
+    @staticmethod
+    def node_name(relative_path: str) -> str:
+        return relative_path.replace(os.sep, "/")
+
+    @staticmethod
+    def parent_of(node: str) -> str:
+        return node.rpartition("/")[0]
+
+    def prune(self, file_hashes: Dict[str, str]) -> None:
+        """Drop the file nodes of files that no longer exist"""
+        for node in list(self.files):
+            if node not in file_hashes:
+                del self.files[node]
+
+    def get_stale_files(self, file_hashes: Dict[str, str]) -> List[str]:
+        """Return the files whose summary is missing or was made from other content"""
+        return [
+            node for node, content_hash in file_hashes.items()
+            if self.files.get(node, {}).get("hash") != content_hash
+        ]
+
+    def set_file_summary(self, node: str, content_hash: str, summary: str) -> None:
+        self.files[node] = {"hash": content_hash, "summary": summary}
+
+    def get_directory_levels(self) -> List[List[str]]:
+        """
+        Return all directories that contain summarized files, grouped by depth, deepest first.
+        Every directory of a level only depends on directories of the previous levels.
+        """
+        self._children = {self.ROOT: ([], [])}
+        known = {self.ROOT}
+        for node in sorted(self.files):
+            parent = self.parent_of(node)
+            self._children.setdefault(parent, ([], []))[0].append(node)
+            # Register the missing ancestors up to the first known one
+            while parent not in known:
+                known.add(parent)
+                grandparent = self.parent_of(parent)
+                self._children.setdefault(grandparent, ([], []))[1].append(parent)
+                parent = grandparent
+        directories = set(self._children)
+        # Directories that no longer exist are dropped with their cached summaries
+        for directory in list(self.dirs):
+            if directory not in directories:
+                del self.dirs[directory]
+
+        levels: Dict[int, List[str]] = {}
+        for directory in directories:
+            depth = directory.count("/") + 1 if directory else 0
+            levels.setdefault(depth, []).append(directory)
+        return [sorted(levels[depth]) for depth in sorted(levels, reverse=True)]
+
+    def get_children(self, directory: str) -> List[Tuple[str, str, str]]:
+        """
+        Return (name, kind, key) of the direct children of a directory, kind being 'file' or 'directory'.
+        Subdirectories are summarized first (see get_directory_levels); one without a summary is left out.
+        """
+        files, subdirectories = self._children.get(directory, ([], []))
+        children = [(node, "file", self.files[node]["hash"]) for node in files]
+        children += [(node, "directory", self.dirs[node]["key"]) for node in subdirectories if node in self.dirs]
+        return sorted(children)
+
+    @staticmethod
+    def compute_key(children: List[Tuple[str, str, str]]) -> str:
+        return hashlib.sha256(json.dumps(children).encode('utf-8')).hexdigest()
+
+    def is_directory_current(self, directory: str, key: str) -> bool:
+        return self.dirs.get(directory, {}).get("key") == key
+
+    def set_directory_summary(self, directory: str, key: str, summary: str) -> None:
+        self.dirs[directory] = {"key": key, "summary": summary}
+
+    def get_summary(self, node: str, kind: str = "directory") -> Optional[str]:
+        entry = (self.files if kind == "file" else self.dirs).get(node)
+        return entry["summary"] if entry else None
+
+    def format_children(self, children: List[Tuple[str, str, str]]) -> str:
+        """Formats the children summaries of a directory for the merge prompt"""
+        return "\n\n".join(
+            f"### {name} ({kind})\n{self.get_summary(name, kind)}" for name, kind, _ in children
+        )
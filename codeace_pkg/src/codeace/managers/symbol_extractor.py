@@ -0,0 +1,173 @@
+import ast
+import os
+import re
+from typing import Dict, List, Optional
+
+
+class SymbolExtractor:
+    """
+    Splits source files into symbols (classes, functions, methods) with 1-based, inclusive line ranges.
+    Python files are parsed with ast; the other supported languages use a line based heuristic
+    (definition patterns, with the body delimited by braces or by a matching 'end' in Ruby).
+    """
+
+    _CLASS_RE = re.compile(
+        r"^\s*(?:export\s+)?(?:default\s+)?(?:(?:public|private|protected|internal|static|abstract|final|sealed|partial)\s+)*"
+        r"(?:class|interface|struct|enum|record)\s+(\w+)"
+    )
+    _FUNCTION_RES = [
+        # JavaScript / TypeScript functions and arrow functions
+        re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*(\w+)\s*\("),
+        re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s+)?(?:\([^)]*\)|\w+)\s*=>"),
+        # Go functions and methods
+        re.compile(r"^func\s+(?:\([^)]*\)\s*)?(\w+)\s*\("),
+        # Java / C# / C++ / TypeScript methods: a return type (or modifiers) followed by name(...)
+        re.compile(r"^\s*(?:[\w<>\[\],.:*&?]+\s+)+[*&]?(\w+)\s*\([^;]*$"),
+        # JavaScript / TypeScript class methods
+        re.compile(r"^\s*(?:(?:public|private|protected|static|async|get|set)\s+)*(\w+)\s*\([^;]*\)\s*(?::\s*[^{]+)?\{\s*$"),
+    ]
+    _RUBY_RE = re.compile(r"^(\s*)(def|class|module)\s+(?:self\.)?([\w.?!=]+)")
+    _CONTROL_KEYWORDS = {"if", "for", "while", "switch", "catch", "return", "else", "new", "using", "lock", "foreach", "do", "sizeof"}
+
+    @classmethod
+    def extract(cls, file_path: str, content: str) -> List[Dict]:
+        """
+        Extract the symbols of a file.
+
+        Returns:
+            List[Dict]: Symbols (name, kind, start_line, end_line) ordered by start line.
+            Methods are named '<class>.<method>'.
+        """
+        extension = os.path.splitext(file_path)[1].lower()
+        symbols = None
+        if extension == '.py':
+            symbols = cls._extract_python(content)
+        if symbols is None:
+            lines = content.splitlines()
+            if extension == '.rb':
+                symbols = cls._extract_ruby(lines)
+            else:
+                symbols = cls._extract_braces(lines)
+        return sorted(symbols, key=lambda s: (s["start_line"], -s["end_line"]))
+
+    @staticmethod
+    def get_own_end_line(symbol: Dict, symbols: List[Dict]) -> int:
+        """Last line of a symbol without its members - a class ends right before its first method"""
+        return next(
+            (s["start_line"] - 1 for s in symbols
+             if s is not symbol and symbol["start_line"] < s["start_line"] <= symbol["end_line"]),
+            symbol["end_line"]
+        )
+
+    @staticmethod
+    def _extract_python(content: str) -> Optional[List[Dict]]:
+        """Symbols of a Python file, or None if it doesn't parse"""
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            return None
+
+        symbols = []
+
+        def visit(nodes, prefix: str, in_class: bool) -> None:
+            for node in nodes:
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    is_class = isinstance(node, ast.ClassDef)
+                    start_line = min([node.lineno] + [d.lineno for d in node.decorator_list])
+                    symbols.append({
+                        "name": f"{prefix}{node.name}",
+                        "kind": "class" if is_class else ("method" if in_class else "function"),
+                        "start_line": start_line,
+                        "end_line": node.end_lineno,
+                    })
+                    # Nested functions belong to their function's span; methods get their own
+                    if is_class:
+                        visit(node.body, f"{prefix}{node.name}.", True)
+
+        visit(tree.body, "", False)
+        return symbols
+
+    @classmethod
+    def _match_definition(cls, line: str):
+        match = cls._CLASS_RE.match(line)
+        if match:
+            return match.group(1), "class"
+        for pattern in cls._FUNCTION_RES:
+            match = pattern.match(line)
+            if match and match.group(1) not in cls._CONTROL_KEYWORDS:
+                return match.group(1), "function"
+        return None
+
+    @staticmethod
+    def _find_block_end(lines: List[str], start: int, lookahead: int = 3) -> Optional[int]:
+        """Index of the line closing the brace block opened at (or just after) lines[start]"""
+        depth = 0
+        opened = False
+        for index in range(start, len(lines)):
+            # Strings and comments are removed crudely so braces inside them don't count
+            code = re.sub(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|//.*$', '', lines[index])
+            for char in code:
+                if char == '{':
+                    depth += 1
+                    opened = True
+                elif char == '}':
+                    depth -= 1
+            if opened and depth <= 0:
+                return index
+            if not opened and (index - start >= lookahead or code.rstrip().endswith(';')):
+                return None
+        return len(lines) - 1 if opened else None
+
+    @classmethod
+    def _extract_braces(cls, lines: List[str]) -> List[Dict]:
+        symbols = []
+        enclosing = []  # (name, end index) of the classes containing the current line
+        for index, line in enumerate(lines):
+            while enclosing and index > enclosing[-1][1]:
+                enclosing.pop()
+            definition = cls._match_definition(line)
+            if not definition:
+                continue
+            name, kind = definition
+            end = cls._find_block_end(lines, index)
+            if end is None:
+                continue
+            if enclosing:
+                name = f"{enclosing[-1][0]}.{name}"
+                kind = "method" if kind == "function" else kind
+            symbols.append({"name": name, "kind": kind, "start_line": index + 1, "end_line": end + 1})
+            if kind == "class":
+                enclosing.append((name, end))
+        # Functions nested in functions are part of their parent's span
+        return [
+            s for s in symbols
+            if not any(
+                o["kind"] != "class" and o is not s and o["start_line"] <= s["start_line"] and s["end_line"] <= o["end_line"]
+                for o in symbols
+            )
+        ]
+
+    @classmethod
+    def _extract_ruby(cls, lines: List[str]) -> List[Dict]:
+        symbols = []
+        enclosing = []
+        for index, line in enumerate(lines):
+            while enclosing and index > enclosing[-1][1]:
+                enclosing.pop()
+            match = cls._RUBY_RE.match(line)
+            if not match:
+                continue
+            indent, keyword, name = match.groups()
+            end_pattern = re.compile(rf"^{re.escape(indent)}end\b")
+            end = next((i for i in range(index + 1, len(lines)) if end_pattern.match(lines[i])), None)
+            if end is None:
+                # One-line definitions (def x = ...) or unbalanced code
+                end = index
+            kind = "function" if keyword == "def" else "class"
+            if enclosing:
+                name = f"{enclosing[-1][0]}.{name}"
+                kind = "method" if kind == "function" else kind
+            symbols.append({"name": name, "kind": kind, "start_line": index + 1, "end_line": end + 1})
+            if kind == "class":
+                enclosing.append((name, end))
+        return symbols
@@ -0,0 +1,255 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from langchain_core.callbacks import BaseCallbackHandler
+
+# The trace (e.g. one user query) that spans are recorded under - see Telemetry.trace
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("codeace_trace_id", default=None)
+
+
+class LLMSpanHandler(BaseCallbackHandler):
+    """
+    LangChain callback recording a span for every LLM call of a chain invoked with Telemetry.llm_config.
+    The stage, chunk index and trace come from the run metadata; LLM stages are prefixed with 'llm:'.
+    Token counts are taken from the provider's usage report (None when the provider sends none).
+    """
+
+    def __init__(self, telemetry: "Telemetry"):
+        self.telemetry = telemetry
+        self._runs: Dict[Any, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: Any, metadata: Optional[Dict]) -> None:
+        metadata = metadata or {}
+        with self._lock:
+            self._runs[run_id] = {
+                "stage": metadata.get("codeace_stage", "chat"),
+                "chunk_index": metadata.get("codeace_chunk_index"),
+                # LangGraph runs carry their conversation thread in the metadata
+                "trace_id": metadata.get("codeace_trace_id") or metadata.get("thread_id"),
+                "start": time.perf_counter(),
+            }
+
+    def on_chat_model_start(self, serialized: Dict, messages: List, *, run_id: Any, metadata: Dict = None, **kwargs) -> None:
+        self._start(run_id, metadata)
+
+    def on_llm_start(self, serialized: Dict, prompts: List[str], *, run_id: Any, metadata: Dict = None, **kwargs) -> None:
+        self._start(run_id, metadata)
+
+    def _finish(self, run_id: Any, status: str, prompt_tokens: int = None, completion_tokens: int = None) -> None:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        self.telemetry.record(
+            f"llm:{run['stage']}", time.perf_counter() - run["start"], status=status, trace_id=run["trace_id"],
+            chunk_index=run["chunk_index"], prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+            cache_hit=False
+        )
+
+    def on_llm_end(self, response: Any, *, run_id: Any, **kwargs) -> None:
+        self._finish(run_id, "ok", *self.get_token_usage(response))
+
+    def on_llm_error(self, error: BaseException, *, run_id: Any, **kwargs) -> None:
+        self._finish(run_id, "error")
+
+    @staticmethod
+    def get_token_usage(response: Any) -> Tuple[Optional[int], Optional[int]]:
+        """Prompt and completion tokens of an LLM result - OpenAI style llm_output or the message usage metadata"""
+        usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+        if usage:
+            return usage.get("prompt_tokens"), usage.get("completion_tokens")
+        for generations in getattr(response, "generations", None) or []:
+            for generation in generations:
+                usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage_metadata:
+                    return usage_metadata.get("input_tokens"), usage_metadata.get("output_tokens")
+        return None, None
+
+
+class Telemetry:
+    """
+    Per-stage latency and token instrumentation.
+    A span is one timed step: stage, trace id, start time, duration, status and optional fields
+    (prompt_tokens, completion_tokens, chunk_index, cache_hit, ...). Spans of one query share a trace id,
+    so they can be shown together; running totals per stage are kept for the Prometheus export.
+    The most recent max_spans spans are kept in memory; with jsonl_path every span is also appended to that file.
+    Thread safe.
+    """
+
+    PROMETHEUS_PREFIX = "codeace"
+
+    def __init__(self, max_spans: int = 10000, jsonl_path: str = None):
+        self.jsonl_path = jsonl_path
+        self._spans = deque(maxlen=max_spans)
+        # stage -> running totals
+        self._totals: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self.llm_handler = LLMSpanHandler(self)
+
+    @staticmethod
+    def new_trace_id() -> str:
+        return uuid.uuid4().hex[:16]
+
+    @staticmethod
+    def current_trace_id() -> Optional[str]:
+        return _current_trace.get()
+
+    @contextmanager
+    def trace(self, name: str = "query", trace_id: str = None) -> Iterator[str]:
+        """
+        Record the spans of the block (and of threads started with its context) under one trace.
+        The whole block is recorded as a span named name.
+
+        Yields:
+            str: The trace id
+        """
+        trace_id = trace_id or self.new_trace_id()
+        token = _current_trace.set(trace_id)
+        try:
+            with self.span(name, trace_id=trace_id):
+                yield trace_id
+        finally:
+            _current_trace.reset(token)
+
+    @contextmanager
+    def span(self, stage: str, trace_id: str = None, **fields) -> Iterator[Dict]:
+        """
+        Time the block as a span of the current trace. The yielded dict holds the span fields,
+        so the block can add to them (e.g. span["cache_hit"] = True).
+        """
+        trace_id = trace_id or self.current_trace_id()
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield fields
+        except GeneratorExit:
+            # A stream that was closed before its end
+            status = "cancelled"
+            raise
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - start, status=status, trace_id=trace_id, **fields)
+
+    def record(self, stage: str, duration: float, status: str = "ok", trace_id: str = None, **fields) -> Dict:
+        """Record a finished span"""
+        span = {
+            "trace_id": trace_id or self.current_trace_id(),
+            "stage": stage,
+            "start": time.time() - duration,
+            "duration": duration,
+            "status": status,
+            **{key: value for key, value in fields.items() if value is not None},
+        }
+        with self._lock:
+            self._spans.append(span)
+            totals = self._totals.setdefault(stage, {
+                "calls": 0, "errors": 0, "duration": 0.0, "prompt_tokens": 0, "completion_tokens": 0, "cache_hits": 0
+            })
+            totals["calls"] += 1
+            totals["errors"] += status == "error"
+            totals["duration"] += duration
+            totals["prompt_tokens"] += span.get("prompt_tokens") or 0
+            totals["completion_tokens"] += span.get("completion_tokens") or 0
+            totals["cache_hits"] += bool(span.get("cache_hit"))
+            if self.jsonl_path:
+                try:
+                    with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(span, default=str) + "\n")
+                except IOError as e:
+                    print(f"Error writing telemetry at {self.jsonl_path}: {str(e)}")
+        return span
+
+    def llm_config(self, stage: str, chunk_index: int = None, trace_id: str = None, **config) -> Dict:
+        """
+        A runnable config that records the LLM calls of a chain invocation as spans.
+        Extra keyword arguments (e.g. max_concurrency) are added to the config.
+        """
+        metadata = {"codeace_stage": stage, "codeace_trace_id": trace_id or self.current_trace_id()}
+        if chunk_index is not None:
+            metadata["codeace_chunk_index"] = chunk_index
+        return {"callbacks": [self.llm_handler], "metadata": metadata, **config}
+
+    def get_spans(self, trace_id: str = None) -> List[Dict]:
+        """The recorded spans (of one trace, if given), oldest first"""
+        with self._lock:
+            spans = list(self._spans)
+        return spans if trace_id is None else [span for span in spans if span["trace_id"] == trace_id]
+
+    def get_breakdown(self, trace_id: str) -> List[Dict]:
+        """
+        Totals per stage of a trace, in the order the stages first finished:
+        calls, duration (seconds), prompt_tokens, completion_tokens, cache_hits, errors
+        """
+        rows: Dict[str, Dict] = {}
+        for span in self.get_spans(trace_id):
+            row = rows.setdefault(span["stage"], {
+                "stage": span["stage"], "calls": 0, "duration": 0.0, "prompt_tokens": 0, "completion_tokens": 0,
+                "cache_hits": 0, "errors": 0
+            })
+            row["calls"] += 1
+            row["duration"] += span["duration"]
+            row["prompt_tokens"] += span.get("prompt_tokens") or 0
+            row["completion_tokens"] += span.get("completion_tokens") or 0
+            row["cache_hits"] += bool(span.get("cache_hit"))
+            row["errors"] += span["status"] == "error"
+        return list(rows.values())
+
+    def to_jsonl(self, trace_id: str = None) -> str:
+        """The recorded spans as JSON lines"""
+        return "".join(json.dumps(span, default=str) + "\n" for span in self.get_spans(trace_id))
+
+    def export_jsonl(self, path: str, trace_id: str = None) -> None:
+        """Write the recorded spans (of one trace, if given) to a JSONL file"""
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.to_jsonl(trace_id))
+        except IOError as e:
+            raise IOError(f"Error exporting telemetry at {path}: {str(e)}")
+
+    def to_prometheus(self) -> str:
+        """Running totals per stage in the Prometheus text exposition format"""
+        with self._lock:
+            totals = {stage: dict(values) for stage, values in self._totals.items()}
+        metrics = [
+            ("stage_calls_total", "counter", "Number of recorded spans", "calls"),
+            ("stage_errors_total", "counter", "Number of failed spans", "errors"),
+            ("stage_duration_seconds_total", "counter", "Total time spent in the stage", "duration"),
+            ("llm_prompt_tokens_total", "counter", "Prompt tokens reported by the LLM provider", "prompt_tokens"),
+            ("llm_completion_tokens_total", "counter", "Completion tokens reported by the LLM provider", "completion_tokens"),
+            ("cache_hits_total", "counter", "Spans served from a cache", "cache_hits"),
+        ]
+        lines = []
+        for name, metric_type, help_text, field in metrics:
+            full_name = f"{self.PROMETHEUS_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            for stage in sorted(totals):
+                label = stage.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{full_name}{{stage="{label}"}} {totals[stage][field]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Drop all recorded spans and totals"""
+        with self._lock:
+            self._spans.clear()
+            self._totals.clear()
+
+
+_default_telemetry = Telemetry(jsonl_path=os.getenv("CODEACE_TELEMETRY_PATH"))
+
+
+def get_telemetry() -> Telemetry:
+    """
+    The process-wide telemetry instance used by the agents.
+    Set CODEACE_TELEMETRY_PATH to also append every span to a JSONL file.
+    """
+    return _default_telemetry
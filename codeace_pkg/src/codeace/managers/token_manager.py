@@ -0,0 +1,316 @@
+import json
+from bisect import bisect_right
+from itertools import accumulate
+import tiktoken  # For OpenAI tokenization
+from typing import Any, Dict, List, Tuple
+from .telemetry import Telemetry, get_telemetry
+from .file_catalog import FileCatalog
+
+
+class TokenManager:
+    """
+    A utility class for managing token usage in LLM-based applications.
+    Supports OpenAI and Hugging Face models, with the ability to calculate
+    token usage and manage input limits.
+    """
+
+    def __init__(self, llm: Any, telemetry: Telemetry = None, file_catalog: FileCatalog = None):
+        """
+        Initialize the TokenManager with an LLM instance.
+
+        Args:
+            llm (Any): An LLM instance (e.g., OpenAI, Hugging Face, or custom).
+            telemetry (Telemetry): Where the packing spans are recorded (default: the process-wide instance)
+            file_catalog (FileCatalog): Where file token counts are cached (default: a private catalog)
+        """
+        self.llm = llm
+        self.telemetry = telemetry or get_telemetry()
+        self.tokenizer, self.max_tokens = self._get_tokenizer_and_limits()
+        self.file_catalog = file_catalog or FileCatalog()
+
+    def _get_tokenizer_and_limits(self) -> Tuple[Any, int]:
+        """
+        Identify the tokenizer and maximum token limit for the LLM.
+
+        Returns:
+            Tuple[Any, int]: The tokenizer and maximum token limit.
+        """
+        
+        encoding = tiktoken.encoding_for_model(self.llm.model_name)
+        max_tokens = self.llm.max_tokens
+        return encoding, 128000
+        
+       
+
+    def calculate_tokens(self, text: str) -> int:
+        """
+        Calculate the number of tokens in a given text.
+
+        Args:
+            text (str): The input text.
+
+        Returns:
+            int: The number of tokens in the text.
+        """
+        if isinstance(self.tokenizer, tiktoken.Encoding):
+            return len(self.tokenizer.encode(text))
+        
+    @staticmethod
+    def format_mapping_item(item: Dict) -> str:
+        """
+        The text of a mapping entry as it is counted against the token budget
+        """
+        return f"file_name: {item['file_name']}\nDescription: {item['description']}\nFunctions: {item['functions']}"
+
+    def annotate_mapping_item(self, item: Dict) -> Dict:
+        """
+        Store the entry's token count (and the encoding it was counted with) on the entry itself.
+        Called at mapping time so queries never have to re-tokenize the mapping.
+        """
+        item['tokens'] = self.calculate_tokens(self.format_mapping_item(item))
+        item['token_encoding'] = self.tokenizer.name
+        return item
+
+    def get_item_tokens(self, item: Dict) -> int:
+        """
+        Token count of a mapping entry - the stored count when it matches this tokenizer,
+        otherwise counted once and stored on the entry
+        """
+        if item.get('token_encoding') != self.tokenizer.name or 'tokens' not in item:
+            self.annotate_mapping_item(item)
+        return item['tokens']
+
+    def get_cumulative_tokens(self, json_data: list) -> List[int]:
+        """
+        Prefix sums of the entries' token counts (cumulative[i] = tokens of items 0..i)
+        """
+        return list(accumulate(self.get_item_tokens(item) for item in json_data))
+
+    def get_possible_data(self, user_query: str, json_data: list) -> Tuple[list, list]:
+        """
+        Select items from a JSON array based on token constraints.
+
+        Args:
+            user_query (str): The user's query
+            json_data (list): List of dictionaries containing file information
+
+        Returns:
+            Tuple[list, list]: Selected items and remaining items
+        """
+        remaining_tokens = self.max_tokens - self.calculate_tokens(f"{user_query}")
+        end = bisect_right(self.get_cumulative_tokens(json_data), remaining_tokens)
+        return json_data[:end], json_data[end:]
+
+    def split_data(self, user_query: str, json_data: list) -> List[list]:
+        """
+        Partition JSON items into consecutive chunks that each fit the token limit.
+
+        Args:
+            user_query (str): The user's query
+            json_data (list): List of dictionaries containing file information
+
+        Returns:
+            List[list]: The chunks, in the original item order
+        """
+        remaining_tokens = self.max_tokens - self.calculate_tokens(f"{user_query}")
+        cumulative = self.get_cumulative_tokens(json_data)
+
+        chunks = []
+        start = 0
+        while start < len(json_data):
+            consumed = cumulative[start - 1] if start else 0
+            end = bisect_right(cumulative, consumed + remaining_tokens, lo=start)
+            if end == start:
+                # An item larger than the whole window still gets a chunk of its own
+                end = start + 1
+            chunks.append(json_data[start:end])
+            start = end
+        return chunks
+
+    def truncate_text(self, text: str, max_tokens: int, marker: str = "\n...[truncated]") -> str:
+        """
+        Cut text down to at most max_tokens tokens (plus the marker), returning it unchanged if it fits.
+        """
+        tokens = self.tokenizer.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return self.tokenizer.decode(tokens[:max_tokens]) + marker
+
+    def validate_prompt(self, prompt: str) -> bool:
+        """
+        Validate if a given prompt fits within the model's token constraints.
+
+        Args:
+            prompt (str): The prompt to validate.
+
+        Returns:
+            bool: True if the prompt is valid, False otherwise.
+        """
+        prompt_tokens = self.calculate_tokens(prompt)
+        return prompt_tokens <= self.max_tokens
+
+    def get_file_tokens(self, file_path: str) -> int:
+        """
+        Token count of a file's prompt block ("File: <path>" header, content and separator).
+        Counts are cached in the file catalog by (path, mtime, size), so unchanged files are never re-tokenized.
+        """
+        def count_tokens() -> int:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return self.calculate_tokens(self._format_file_block(file_path, f.read()))
+
+        return self.file_catalog.get_tokens(file_path, self.tokenizer.name, count_tokens)
+
+    @staticmethod
+    def _format_file_block(file_path: str, content: str, line_range: Tuple[int, int] = None) -> str:
+        header = f"File: {file_path}" if line_range is None else f"File: {file_path} (lines {line_range[0]}-{line_range[1]})"
+        return f"{header}\n{content}\n---\n"
+
+    def _split_file(self, file_path: str, budget: int) -> List[Tuple[str, int]]:
+        """
+        Split a file that doesn't fit a single window into line ranges that do.
+
+        Returns:
+            List[Tuple[str, int]]: (prompt block, tokens) for every part
+        """
+        with open(file_path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines(keepends=True)
+        # Leave room for the per-part header and for tokens merging across line boundaries
+        part_budget = int(budget * 0.95) - self.calculate_tokens(f"File: {file_path} (lines 000000-000000)\n---\n")
+
+        parts = []
+        start = 0
+        current_tokens = 0
+        for index, line in enumerate(lines):
+            line_tokens = self.calculate_tokens(line)
+            if current_tokens + line_tokens > part_budget and index > start:
+                parts.append((start, index))
+                start = index
+                current_tokens = 0
+            current_tokens += line_tokens
+        if start < len(lines):
+            parts.append((start, len(lines)))
+
+        blocks = []
+        for first, last in parts:
+            block = self._format_file_block(file_path, "".join(lines[first:last]), (first + 1, last))
+            blocks.append((block, self.calculate_tokens(block)))
+        return blocks
+
+    def _span_blocks(self, file_path: str, spans: List[Tuple[int, int]]) -> List[Tuple[str, int]]:
+        """
+        Prompt blocks of the given line ranges (1-based, inclusive) of a file.
+
+        Returns:
+            List[Tuple[str, int]]: (prompt block, tokens) for every span
+        """
+        with open(file_path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines(keepends=True)
+        blocks = []
+        for first, last in spans:
+            last = min(last, len(lines))
+            if first > last:
+                continue
+            block = self._format_file_block(file_path, "".join(lines[first - 1:last]), (first, last))
+            blocks.append((block, self.calculate_tokens(block)))
+        return blocks
+
+    def pack_files_content(self, user_query: str, extra_context_doc: str, file_paths: list,
+                           file_spans: Dict[str, List[Tuple[int, int]]] = None) -> List[Tuple[str, list]]:
+        """
+        Pack file contents into as few token windows as possible (first-fit-decreasing,
+        relevance order as the tiebreak). Files larger than a window are split into line ranges.
+
+        Args:
+            user_query (str): The user's query
+            extra_context_doc (str): Context sent along with every window
+            file_paths (list): Relevant file paths, most relevant first
+            file_spans (dict): Optional line ranges (1-based, inclusive) per file - only these
+                parts of the file are sent instead of the whole file
+
+        Returns:
+            List[Tuple[str, list]]: For each window, the concatenated content and the files it contains,
+            ordered by the relevance of the files they hold
+        """
+        user_query_tokens = self.calculate_tokens(f"{user_query}")
+        extra_context_tokens = self.calculate_tokens(extra_context_doc or "")
+        budget = self.max_tokens - (user_query_tokens + extra_context_tokens)
+        if budget <= 0:
+            raise ValueError("User query and extra context exceed token limit")
+
+        # (tokens, relevance order, part order, file path, block - None until rendered)
+        items = []
+        file_spans = file_spans or {}
+        with self.telemetry.span("tokenization", files=len(file_paths)) as span:
+            for order, file_path in enumerate(file_paths):
+                try:
+                    if file_spans.get(file_path):
+                        for part, (block, part_tokens) in enumerate(self._span_blocks(file_path, file_spans[file_path])):
+                            items.append((part_tokens, order, part, file_path, block))
+                        continue
+                    tokens = self.get_file_tokens(file_path)
+                    if tokens <= budget:
+                        items.append((tokens, order, 0, file_path, None))
+                    else:
+                        for part, (block, part_tokens) in enumerate(self._split_file(file_path, budget)):
+                            items.append((part_tokens, order, part, file_path, block))
+                except Exception as e:
+                    print(f"Error reading file {file_path}: {str(e)}")
+            span["tokens"] = sum(item[0] for item in items)
+
+        bins = []
+        for item in sorted(items, key=lambda item: (-item[0], item[1], item[2])):
+            target = next((b for b in bins if b["tokens"] + item[0] <= budget), None)
+            if target is None:
+                target = {"tokens": 0, "items": []}
+                bins.append(target)
+            target["tokens"] += item[0]
+            target["items"].append(item)
+
+        for b in bins:
+            b["items"].sort(key=lambda item: (item[1], item[2]))
+
+        packed = []
+        with self.telemetry.span("file_loading", chunks=len(bins)):
+            for b in sorted(bins, key=lambda b: (b["items"][0][1], b["items"][0][2])):
+                blocks = []
+                for _, _, _, file_path, block in b["items"]:
+                    if block is None:
+                        with open(file_path, 'r', encoding='utf-8') as f:
+                            block = self._format_file_block(file_path, f.read())
+                    blocks.append(block)
+                files = list(dict.fromkeys(item[3] for item in b["items"]))
+                packed.append(('\n'.join(blocks), files))
+        return packed
+
+    def get_possible_files_content(self, user_query: str, extra_context_doc: str, file_paths: list) -> Tuple[str, list]:
+        """
+        Select and concatenate file contents based on token constraints.
+
+        Args:
+            user_query (str): The user's query
+            file_paths (list): List of file paths to process
+
+        Returns:
+            Tuple[str, list]: Concatenated content of the first packed window and the file paths
+            that are not (completely) contained in it
+        """
+        packed = self.pack_files_content(user_query, extra_context_doc, file_paths)
+        if not packed:
+            raise ValueError("No files selected due to token constraints")
+        content, _ = packed[0]
+        later_files = {file_path for _, files in packed[1:] for file_path in files}
+        remaining_files = [file_path for file_path in file_paths if file_path in later_files]
+        return content, remaining_files
+
+
+# Example Usage
+if __name__ == "__main__":
+    # Example: OpenAI model
+    from llm_manager import LLMManager
+    llm_manager = LLMManager()
+    llm_openai = llm_manager.create_model_instance_by_name("azure")
+    token_manager = TokenManager(llm_openai)
+
+    user_query = "What is the weather in Tel Aviv today?"
+    json_data = {"temperature": "25°C", "humidity": "60%", "condition": "Clear skies"}
+    print(token_manager.calculate_tokens(user_query))
@@ -0,0 +1,60 @@
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+PKG_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run against the source tree (codeace need not be installed) and reuse the benchmarks' offline chat model
+for path in (os.path.join(PKG_ROOT, "src"), os.path.join(PKG_ROOT, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from codeace import CoreAgent  # noqa: E402
+from fake_llm import FakeChatModel, fake_llm_manager  # noqa: E402
+
+
+def _write_file(root, rel_path: str, content: str) -> str:
+    path = os.path.join(str(root), rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+@pytest.fixture
+def write_file():
+    """write_file(root, rel_path, content) -> the full path of the written file"""
+    return _write_file
+
+
+@pytest.fixture
+def prompts():
+    """Every prompt sent to a FakeChatModel while the test runs"""
+    sent = []
+    respond = FakeChatModel.respond
+
+    def recording_respond(self, prompt):
+        sent.append(prompt)
+        return respond(self, prompt)
+
+    with fake_llm_manager(), mock.patch.object(FakeChatModel, "respond", recording_respond):
+        yield sent
+
+
+@pytest.fixture
+def make_agent(tmp_path, prompts):
+    """Creates CoreAgents on a source folder in tmp_path, backed by the fake chat model"""
+    src_path = tmp_path / "src"
+    app_data_path = tmp_path / "app_data"
+    src_path.mkdir()
+    app_data_path.mkdir()
+
+    def make(**kwargs) -> CoreAgent:
+        kwargs.setdefault("use_cache", False)
+        return CoreAgent("azure", str(src_path), str(app_data_path), **kwargs)
+
+    make.src_path = str(src_path)
+    make.app_data_path = str(app_data_path)
+    return make
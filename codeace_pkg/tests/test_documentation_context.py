@@ -0,0 +1,64 @@
+FLASHING_DOC = """# Device Guide
+
+## Flash Operations
+
+Use the bootloader command to flash the firmware image over the serial port.
+
+## Power Management
+
+Sleep states are configured through the power controller registers.
+"""
+
+
+def add_documentation(write_file, tmp_path, agent):
+    docs_path = tmp_path / "docs"
+    write_file(docs_path, "device.md", FLASHING_DOC)
+    context = agent.get_documentation_context("How do I flash the firmware?", str(docs_path), max_tokens=1000)
+    agent.add_extra_context(context, override=True)
+    return context
+
+
+def test_selected_sections_are_rendered_in_code_query_prompt(make_agent, write_file, tmp_path, prompts):
+    source = write_file(make_agent.src_path, "flash.py", "def flash_firmware(image):\n    return image\n")
+    agent = make_agent()
+    context = add_documentation(write_file, tmp_path, agent)
+
+    assert "[device: Device Guide > Flash Operations]" in context
+    assert "Power Management" not in context
+
+    agent.process_code_query("How do I flash the firmware?", [source])
+    assert len(prompts) == 1
+    assert "Additional Context:" in prompts[0]
+    assert "Use the bootloader command to flash the firmware image" in prompts[0]
+    assert "def flash_firmware" in prompts[0]
+
+
+def test_selected_sections_are_rendered_in_dependencies_and_combine_prompts(make_agent, write_file, tmp_path, prompts):
+    sources = [
+        write_file(make_agent.src_path, f"module_{index}.py", f"def flash_step_{index}():\n    pass\n")
+        for index in range(2)
+    ]
+    agent = make_agent()
+    add_documentation(write_file, tmp_path, agent)
+
+    agent.process_dependencies_query("How do I flash the firmware?", sources)
+    assert prompts and all("Use the bootloader command" in prompt for prompt in prompts)
+
+    prompts.clear()
+    # One file per window, so the partial answers have to be combined
+    agent.token_manager.max_tokens = agent.token_manager.calculate_tokens(
+        f"How do I flash the firmware?{agent.extra_context_doc}"
+    ) + 40
+    agent.process_code_query("How do I flash the firmware?", sources, strategy="map_reduce")
+    combine_prompts = [prompt for prompt in prompts if "Partial Answers:" in prompt]
+    assert len(combine_prompts) == 1
+    assert "Use the bootloader command" in combine_prompts[0]
+
+
+def test_no_context_section_without_extra_context(make_agent, write_file, prompts):
+    source = write_file(make_agent.src_path, "flash.py", "def flash_firmware(image):\n    return image\n")
+    agent = make_agent()
+    agent.add_extra_context("", override=True)
+
+    agent.process_code_query("How do I flash the firmware?", [source])
+    assert "Additional Context:" not in prompts[0]
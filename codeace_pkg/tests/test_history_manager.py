@@ -0,0 +1,53 @@
+import warnings
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from codeace import HistoryManager
+from codeace.managers.history_manager import get_summary_executor
+from fake_llm import FakeChatModel
+
+
+def conversation(turns: int):
+    messages = [SystemMessage(content="You are a helpful assistant.")]
+    for index in range(turns):
+        messages += [
+            HumanMessage(content=f"Question {index} " + "word " * 20),
+            AIMessage(content="", tool_calls=[{"name": "web_search", "args": {"query": "q"}, "id": f"call-{index}"}]),
+            ToolMessage(content="tool output " * 200, tool_call_id=f"call-{index}"),
+            AIMessage(content=f"Answer {index} " + "word " * 20),
+        ]
+    return messages
+
+
+def test_old_tool_outputs_are_truncated_without_deprecation_warnings(prompts):
+    manager = HistoryManager(FakeChatModel(), keep_turns=1, tool_output_tokens=10)
+    messages = conversation(3)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        compacted = manager.compact(messages)
+        manager.wait_for_summary(timeout=10)
+
+    tool_messages = [message for message in compacted if isinstance(message, ToolMessage)]
+    assert len(tool_messages) == 3
+    # Older turns are truncated, the last turn is kept verbatim
+    assert all(len(message.content) < len(messages[3].content) for message in tool_messages[:-1])
+    assert tool_messages[-1].content == messages[-2].content
+    assert [message.tool_call_id for message in tool_messages] == ["call-0", "call-1", "call-2"]
+    # The input messages are not modified
+    assert messages[3].content == "tool output " * 200
+
+
+def test_summaries_run_on_the_shared_executor(prompts):
+    managers = [HistoryManager(FakeChatModel(), keep_turns=1) for _ in range(3)]
+    assert all(manager._executor is get_summary_executor() for manager in managers)
+
+    messages = conversation(3)
+    for manager in managers:
+        manager.compact(messages)
+    for manager in managers:
+        manager.wait_for_summary(timeout=10)
+        compacted = manager.compact(messages)
+        assert manager.summarized_turns == 2
+        assert compacted[1].content.startswith(HistoryManager.SUMMARY_PREFIX)
+    assert len(prompts) == 3
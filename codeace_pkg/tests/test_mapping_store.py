@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from codeace.managers.mapping_store import (
+    JsonMappingStore, MappingStore, SqliteMappingStore, create_mapping_store
+)
+
+
+def mapping(file_name, description="A module."):
+    return {"file_name": file_name, "description": description, "functions": "main"}
+
+
+def fingerprint(size):
+    return {"size": size, "mtime": 1000 + size, "hash": f"hash-{size}"}
+
+
+@pytest.fixture(params=["sqlite", "json"])
+def store(request, tmp_path):
+    return create_mapping_store(request.param, str(tmp_path))
+
+
+def test_upsert_replaces_entry_in_place(store):
+    for name in ("a.py", "b.py", "c.py"):
+        store.upsert(mapping(name))
+    store.upsert(mapping("b.py", "Updated."))
+
+    assert store.get_file_names() == ["a.py", "b.py", "c.py"]
+    assert store.get_all()[1] == mapping("b.py", "Updated.")
+    assert len(store.get_all()) == 3
+
+
+def test_remove_drops_mapping_and_fingerprint(store):
+    store.upsert(mapping("a.py"))
+    store.upsert(mapping("b.py"))
+    store.save_fingerprints({"a.py": fingerprint(1), "b.py": fingerprint(2)})
+
+    store.remove(["a.py", "missing.py"])
+    assert store.get_file_names() == ["b.py"]
+    assert store.get_fingerprints() == {"b.py": fingerprint(2)}
+
+
+def test_save_fingerprints_merges(store):
+    store.save_fingerprints({"a.py": fingerprint(1), "b.py": fingerprint(2)})
+    store.save_fingerprints({"b.py": fingerprint(3)})
+    assert store.get_fingerprints() == {"a.py": fingerprint(1), "b.py": fingerprint(3)}
+
+
+def test_revision_changes_on_every_write(store):
+    revisions = [store.get_revision()]
+    store.upsert(mapping("a.py"))
+    revisions.append(store.get_revision())
+    store.upsert(mapping("a.py", "Updated."))
+    revisions.append(store.get_revision())
+    store.upsert(mapping("b.py"))
+    revisions.append(store.get_revision())
+    store.remove(["a.py"])
+    revisions.append(store.get_revision())
+    assert len(set(revisions)) == len(revisions)
+    # Reading doesn't change it
+    store.get_all()
+    assert store.get_revision() == revisions[-1]
+
+
+def test_sqlite_store_imports_legacy_json_once(tmp_path):
+    legacy_mappings = [mapping("a.py"), mapping("b.py")]
+    (tmp_path / "code_mapping.json").write_text(json.dumps(legacy_mappings), encoding="utf-8")
+    (tmp_path / "file_fingerprints.json").write_text(json.dumps({"a.py": fingerprint(1)}), encoding="utf-8")
+
+    store = SqliteMappingStore(str(tmp_path))
+    assert store.get_all() == legacy_mappings
+    assert store.get_fingerprints() == {"a.py": fingerprint(1)}
+    store.remove(["a.py"])
+    store.upsert(mapping("c.py"))
+    store._conn.close()
+
+    # The JSON files are still there, but they aren't imported over the newer database content again
+    store = SqliteMappingStore(str(tmp_path))
+    assert store.get_file_names() == ["b.py", "c.py"]
+    assert store.get_fingerprints() == {}
+
+
+def test_json_store_writes_code_mapping_json(tmp_path):
+    store = JsonMappingStore(str(tmp_path))
+    store.upsert(mapping("a.py"))
+    with open(tmp_path / "code_mapping.json", encoding="utf-8") as f:
+        assert json.load(f) == [mapping("a.py")]
+
+
+def test_store_without_all_methods_cannot_be_created():
+    class PartialStore(MappingStore):
+        def upsert(self, mapping_data):
+            pass
+
+    with pytest.raises(TypeError):
+        PartialStore()
+
+
+def test_unknown_backend(tmp_path):
+    with pytest.raises(ValueError):
+        create_mapping_store("redis", str(tmp_path))
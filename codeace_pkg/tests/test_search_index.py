@@ -0,0 +1,98 @@
+import os
+
+from codeace.managers.file_manager import FileManager
+from codeace.managers.search_index import LexicalIndex
+
+
+MAPPING = [
+    {
+        "file_name": "managers/token_manager.py",
+        "description": "Counts tokens and packs file contents into windows that fit the model context.",
+        "functions": "calculate_tokens,pack_files_content,split_data",
+    },
+    {
+        "file_name": "managers/file_manager.py",
+        "description": "Reads source files and saves the mapping of the codebase.",
+        "functions": "read_file,save_mapping,scan_directory",
+    },
+    {
+        "file_name": "agents/core_agent.py",
+        "description": "Answers questions about the code, using the mapping to find relevant files.",
+        "functions": "find_relevant_files,process_code_query",
+    },
+]
+
+
+def test_tokenize_splits_identifiers():
+    tokens = LexicalIndex.tokenize("How does getFileTokens use the token_manager?")
+    # Stopwords ("how", "the") and the word "file" are dropped, plurals folded
+    assert tokens == ["getfiletoken", "get", "token", "use", "tokenmanager", "token", "manager"]
+
+
+def test_bm25_ranks_matching_files_first():
+    index = LexicalIndex.build(MAPPING)
+
+    ranked = index.search("how are tokens counted", top_k=10)
+    assert [file_name for file_name, _ in ranked] == ["managers/token_manager.py"]
+
+    ranked = index.search("save the mapping", top_k=10)
+    names = [file_name for file_name, _ in ranked]
+    # The file_name and functions fields weigh more than the description
+    assert names == ["managers/file_manager.py", "agents/core_agent.py"]
+    assert ranked[0][1] > ranked[1][1] > 0
+
+    assert index.search("save the mapping", top_k=1) == ranked[:1]
+    assert index.search("the of and") == []
+    assert LexicalIndex.build([]).search("token") == []
+
+
+def test_index_survives_save_and_load(tmp_path):
+    index = LexicalIndex.build(MAPPING)
+    path = str(tmp_path / "search_index.json")
+    index.save(path)
+
+    loaded = LexicalIndex.load(path)
+    assert loaded.signature == LexicalIndex.compute_signature(MAPPING)
+    assert loaded.search("pack file contents") == index.search("pack file contents")
+    assert LexicalIndex.load(str(tmp_path / "missing.json")) is None
+
+
+def test_search_index_is_rebuilt_when_the_mapping_changes(tmp_path, write_file):
+    src_path = tmp_path / "src"
+    write_file(src_path, "managers/token_manager.py", "def calculate_tokens(text):\n    pass\n")
+    file_manager = FileManager(str(src_path), str(tmp_path / "app_data"))
+    file_manager.save_mapping(MAPPING[0])
+    index = file_manager.get_search_index()
+    assert index.search("read source files") == []
+
+    file_manager.save_mapping(MAPPING[1])
+    index = file_manager.get_search_index()
+    assert index.signature == LexicalIndex.compute_signature(MAPPING[:2])
+    assert [file_name for file_name, _ in index.search("read source files")] == ["managers/file_manager.py"]
+    # The rebuilt index was persisted
+    assert LexicalIndex.load(file_manager.search_index_path).signature == index.signature
+
+
+def test_lexical_search_needs_no_llm(make_agent, write_file, prompts):
+    for item in MAPPING:
+        write_file(make_agent.src_path, item["file_name"], "VALUE = 1\n")
+    agent = make_agent(search_mode="lexical")
+    for item in MAPPING:
+        agent.file_manager.save_mapping(item)
+    assert agent.find_relevant_files("how are tokens counted") == []
+
+    # The agent picks up the mapping written since it was created
+    assert agent.refresh_mapping()
+    assert not agent.refresh_mapping()
+    relevant_files = agent.find_relevant_files("how are tokens counted")
+    assert relevant_files == [os.path.join(make_agent.src_path, "managers", "token_manager.py")]
+    assert agent.find_relevant_files("save the mapping") == [
+        os.path.join(make_agent.src_path, "managers", "file_manager.py"),
+        os.path.join(make_agent.src_path, "agents", "core_agent.py"),
+    ]
+    assert prompts == []
+
+    # Files removed from the mapping are no longer found
+    agent.file_manager.remove_mappings(["managers/token_manager.py"])
+    assert agent.refresh_mapping()
+    assert agent.find_relevant_files("how are tokens counted") == []
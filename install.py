@@ -114,10 +114,13 @@ def install():
     codeace_pkg_path = os.path.join(os.getcwd(), "codeace_pkg")
     if os.path.exists(codeace_pkg_path):
         print(f"Found codeace_pkg directory at: {codeace_pkg_path}")
-        gz_files = list(Path(codeace_pkg_path).glob("*.gz"))
-        if gz_files:
+        if os.path.exists(os.path.join(codeace_pkg_path, "pyproject.toml")):
+            pkg_path = codeace_pkg_path
+        else:
+            gz_files = list(Path(codeace_pkg_path).glob("*.gz"))
+            pkg_path = str(gz_files[0]) if gz_files else None
+        if pkg_path:
             try:
-                pkg_path = str(gz_files[0])
                 print(f"Installing package: {pkg_path}")
                 subprocess.run([venv_pip, "install", pkg_path], check=True)
             except subprocess.CalledProcessError as e:
@@ -125,7 +128,7 @@ def install():
             except Exception as e:
                 print(f"Unexpected error installing package: {e}")
         else:
-            print("No .gz package files found in codeace_pkg directory")
+            print("No package sources or .gz package files found in codeace_pkg directory")
     else:
         print(f"Note: codeace_pkg directory not found at {codeace_pkg_path}, skipping package installation")
     
@@ -0,0 +1,115 @@
+"""
+Benchmark of TagsIndex against the linear tags file scan that find_definitions used to do.
+
+Generates a synthetic ctags file and times a batch lookup with:
+- linear: the previous implementation - read and split every line, test membership in the tags list
+- mmap: sorted tags file, memory-mapped and binary searched (cold = including opening the index)
+- hashed: unsorted tags file, parsed once into a dict (cold = including the build)
+
+Usage:
+    python bench_tags_index.py [--lines 1000000] [--tags 20] [--repeat 5] [--json results.json]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from tags_index import TagsIndex
+
+
+def linear_find_definitions(tags_to_find, tags_file_path):
+    """The previous find_definitions body, kept here as the baseline"""
+    definitions = {}
+    with open(tags_file_path, 'r') as f:
+        for line in f:
+            parts = line.strip().split('\t')
+            if len(parts) >= 4:
+                tag_name = parts[0]
+                file_path = parts[1]
+                kind = parts[3]
+                definition_kinds = ['c', 'f', 'v']
+                if tag_name in tags_to_find and kind in definition_kinds:
+                    definitions[tag_name] = file_path
+    return definitions
+
+
+def write_tags_file(path: str, lines: int, sorted_file: bool, seed: int = 0) -> list:
+    """Write a synthetic tags file, returns the tag names"""
+    rng = random.Random(seed)
+    kinds = ['c', 'f', 'v', 'm', 'd']
+    entries = []
+    for i in range(lines):
+        tag = f"symbol_{rng.randrange(lines // 2 or 1):08d}"
+        entries.append((tag, f"src/module_{i % 997}/file_{i % 31}.c", i % 5000 + 1, kinds[i % len(kinds)]))
+    if sorted_file:
+        entries.sort()
+    else:
+        rng.shuffle(entries)
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write("!_TAG_FILE_FORMAT\t2\t/extended format/\n")
+        f.write(f"!_TAG_FILE_SORTED\t{1 if sorted_file else 0}\t/0=unsorted, 1=sorted, 2=foldcase/\n")
+        for tag, file_name, line, kind in entries:
+            f.write(f"{tag}\t{file_name}\t/^{tag}(void) {{$/;\"\t{kind}\tline:{line}\n")
+    return sorted({entry[0] for entry in entries})
+
+
+def timed(func, repeat: int) -> float:
+    """Best wall time of repeat runs, in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1000000, help="Number of tag lines")
+    parser.add_argument("--tags", type=int, default=20, help="Number of tags per batch lookup")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (the best is reported)")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sorted_path = os.path.join(tmp, "tags_sorted")
+        unsorted_path = os.path.join(tmp, "tags_unsorted")
+        names = write_tags_file(sorted_path, args.lines, sorted_file=True)
+        write_tags_file(unsorted_path, args.lines, sorted_file=False)
+        queries = random.Random(1).sample(names, min(args.tags, len(names)))
+
+        # All implementations must agree on which tags have definitions
+        expected = set(linear_find_definitions(queries, sorted_path))
+        for path in (sorted_path, unsorted_path):
+            found = set(TagsIndex(path).lookup_many(queries, kinds=TagsIndex.DEFINITION_KINDS))
+            assert found == expected, f"TagsIndex results differ from the linear scan for {path}"
+
+        sorted_index = TagsIndex(sorted_path)
+        hashed_index = TagsIndex(unsorted_path)
+        results = {
+            "lines": args.lines,
+            "tags_per_lookup": len(queries),
+            "file_mb": round(os.path.getsize(sorted_path) / 1024 / 1024, 1),
+            "mmap_enabled": TagsIndex.USE_MMAP,
+            "timings_ms": {
+                "linear": timed(lambda: linear_find_definitions(queries, sorted_path), args.repeat),
+                "mmap_cold": timed(lambda: TagsIndex(sorted_path).lookup_many(queries), args.repeat),
+                "mmap_warm": timed(lambda: sorted_index.lookup_many(queries), args.repeat),
+                "hashed_cold": timed(lambda: TagsIndex(unsorted_path).lookup_many(queries), args.repeat),
+                "hashed_warm": timed(lambda: hashed_index.lookup_many(queries), args.repeat),
+            },
+        }
+
+    print(f"{results['lines']} tag lines ({results['file_mb']} MB), {results['tags_per_lookup']} tags per lookup")
+    linear_ms = results["timings_ms"]["linear"]
+    for name, ms in results["timings_ms"].items():
+        print(f"  {name:<12} {ms:10.2f} ms  ({linear_ms / ms if ms else float('inf'):8.1f}x)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,51 @@
+import asyncio
 import json
+import threading
+from collections import OrderedDict
 from langgraph.graph.message import AnyMessage, add_messages
 from langgraph.checkpoint.aiosqlite import AsyncSqliteSaver
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, StateGraph
 from typing_extensions import TypedDict
 from typing import Annotated, Literal, Dict
-from codeace import LLMManager
+from codeace import LLMManager, HistoryManager, get_telemetry
 import os
 from tools import available_functions
 from langchain_core.messages import ToolMessage
 
 tools = [tool for _,tool in available_functions.items()]
+# Seconds a tool call may take before the model gets a timeout message instead of its output
+DEFAULT_TOOL_TIMEOUT = 60
+TOOL_TIMEOUTS = {
+    "web_search": 30,
+    "intel_wiki_search": 30,
+}
 chatbot = LLMManager().create_model_instance_by_name("azure")
-chatbot_with_tools = chatbot.bind_tools(tools)
+telemetry = get_telemetry()
+# Model calls and tool calls are recorded as spans, traced by conversation thread
+chatbot_with_tools = chatbot.bind_tools(tools).with_config(
+    callbacks=[telemetry.llm_handler], metadata={"codeace_stage": "agent"}
+)
+# One history manager per conversation thread - each keeps its own rolling summary.
+# Only the most recently used threads are kept; an evicted thread that resumes starts a new summary
+MAX_HISTORY_THREADS = 256
+history_managers: "OrderedDict[str, HistoryManager]" = OrderedDict()
+history_managers_lock = threading.Lock()
+
+def get_thread_id(config: RunnableConfig) -> str:
+    return (config or {}).get("configurable", {}).get("thread_id", "default")
+
+def get_history_manager(config: RunnableConfig) -> HistoryManager:
+    thread_id = get_thread_id(config)
+    with history_managers_lock:
+        history_manager = history_managers.get(thread_id)
+        if history_manager is None:
+            history_manager = HistoryManager(chatbot)
+            history_managers[thread_id] = history_manager
+        history_managers.move_to_end(thread_id)
+        while len(history_managers) > MAX_HISTORY_THREADS:
+            history_managers.popitem(last=False)
+        return history_manager
 
 ### State
 class GraphState(TypedDict):
@@ -35,7 +68,8 @@ async def call_model(state: GraphState, config: RunnableConfig) -> Dict[str, Any
         dict: The updated state with a new AI message
     """
     print("---CALL MODEL---")
-    messages = state["messages"]
+    # Only a token-budgeted view of the history is sent - the graph state keeps every message
+    messages = get_history_manager(config).compact(state["messages"])
 
     # Invoke the chatbot with the binded tools
     response = await chatbot_with_tools.ainvoke(messages, config)
@@ -44,36 +78,53 @@ async def call_model(state: GraphState, config: RunnableConfig) -> Dict[str, Any
     # We return an object because this will get added to the existing list
     return {"messages": response}
 
-def tool_node(state: GraphState) -> Dict[str, AnyMessage]:
+async def run_tool_call(call: Dict, config: RunnableConfig = None) -> ToolMessage:
+    """
+    Run a single tool call within its timeout (see TOOL_TIMEOUTS).
+    Sync tools run on the default thread pool through ainvoke, so the event loop stays free.
+    A timed out call is answered with a message saying so - its worker thread is not interrupted.
+    """
+    tool = available_functions[call['name']]
+    timeout = TOOL_TIMEOUTS.get(call['name'], DEFAULT_TOOL_TIMEOUT)
+    with telemetry.span(f"tool:{call['name']}", trace_id=get_thread_id(config)) as span:
+        try:
+            output = await asyncio.wait_for(tool.ainvoke(call['args'], config), timeout)
+        except asyncio.TimeoutError:
+            print(f"Tool '{call['name']}' timed out after {timeout} seconds")
+            output = f"Tool '{call['name']}' did not respond within {timeout} seconds."
+            span["timed_out"] = True
+
+    return ToolMessage(
+        output if isinstance(output, str) else json.dumps(output), 
+        tool_call_id=call['id']
+    )
+
+async def tool_node(state: GraphState, config: RunnableConfig) -> Dict[str, AnyMessage]:
     """
     Function that handles all tool calls.
+    The calls of one turn run concurrently, so the turn takes about as long as its slowest tool.
 
     Args:
         state (GraphState): The current graph state
 
     Returns:
-        dict: The updated state with tool messages
+        dict: The updated state with tool messages, in the order of the tool calls
     """
     print("---TOOL NODE---")
     messages = state["messages"]
     last_message = messages[-1] if messages else None
 
-    outputs = []
-
-    if last_message and last_message.tool_calls:
-        for call in last_message.tool_calls:
-            tool = available_functions.get(call['name'], None)
+    if not last_message or not last_message.tool_calls:
+        return {'messages': []}
 
-            if tool is None:
-                raise Exception(f"Tool '{call['name']}' not found.")
+    for call in last_message.tool_calls:
+        if call['name'] not in available_functions:
+            raise Exception(f"Tool '{call['name']}' not found.")
 
-            output = tool.invoke(call['args'])
-            outputs.append(ToolMessage(
-                output if isinstance(output, str) else json.dumps(output), 
-                tool_call_id=call['id']
-            ))
+    # gather returns the results in the order of the calls, whatever order they finish in
+    outputs = await asyncio.gather(*(run_tool_call(call, config) for call in last_message.tool_calls))
 
-    return {'messages': outputs}
+    return {'messages': list(outputs)}
 
 def should_continue(state: GraphState) -> Literal["__end__", "tools"]:
     """
@@ -0,0 +1,203 @@
+import json
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+import tiktoken
+from codeace import QueryCache
+from codeace.managers.search_index import LexicalIndex
+
+
+class SearchBackend(ABC):
+    """
+    Base class for search backends. A backend instance holds its client and is shared by all calls
+    (see get_search_backend). Results are dicts with title, url and content.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def search(self, query: str, max_results: int) -> List[Dict]:
+        """Up to max_results results for the query"""
+
+
+class TavilyBackend(SearchBackend):
+    """Web search through Tavily - the answer, raw page content and images are not requested, only the snippets are used"""
+
+    name = "tavily"
+
+    def __init__(self):
+        from langchain_community.tools import tavily_search
+        self._tavily_search = tavily_search
+        self._clients = {}
+
+    def search(self, query: str, max_results: int) -> List[Dict]:
+        client = self._clients.get(max_results)
+        if client is None:
+            client = self._tavily_search.TavilySearchResults(
+                max_results=max_results,
+                search_depth="advanced",
+                include_answer=False,
+                include_raw_content=False,
+                include_images=False,
+            )
+            self._clients[max_results] = client
+        results = client.invoke({"query": query})
+        if isinstance(results, str):
+            # Tavily reports errors as a string
+            raise IOError(f"Web search failed: {results}")
+        return [{"title": r.get("title", ""), "url": r.get("url", ""), "content": r.get("content", "")} for r in results]
+
+
+class IntelWikiBackend(SearchBackend):
+    """IntelWiki keyword search"""
+
+    name = "intel_wiki"
+
+    def __init__(self):
+        from intel_wiki_lib.intel_wiki_api import IntelWikiAPI
+        self._client = IntelWikiAPI()
+        # The API client is not documented as thread safe
+        self._lock = threading.Lock()
+
+    def search(self, query: str, max_results: int) -> List[Dict]:
+        with self._lock:
+            results = self._client.search_by_keyword(query, result_limit=max_results)
+        return [{"title": r.title, "url": r.url_link, "content": ""} for r in results]
+
+
+class LocalSearchBackend(SearchBackend):
+    """
+    Offline stand-in for tests and development: searches a JSON list of {title, url, content}
+    documents (CODEACE_LOCAL_SEARCH_PATH), ranking them by query term overlap.
+    """
+
+    name = "local"
+
+    def __init__(self, documents_path: str = None):
+        self.documents_path = documents_path or os.getenv("CODEACE_LOCAL_SEARCH_PATH")
+        self.documents = []
+        if self.documents_path:
+            try:
+                with open(self.documents_path, 'r', encoding='utf-8') as f:
+                    self.documents = json.load(f)
+            except (IOError, ValueError) as e:
+                raise IOError(f"Error reading local search documents at {self.documents_path}: {str(e)}")
+        self._terms = [
+            set(LexicalIndex.tokenize(f"{doc.get('title', '')} {doc.get('content', '')}")) for doc in self.documents
+        ]
+
+    def search(self, query: str, max_results: int) -> List[Dict]:
+        query_terms = set(LexicalIndex.tokenize(query))
+        scored = [(len(query_terms & terms), index) for index, terms in enumerate(self._terms)]
+        ranked = sorted((item for item in scored if item[0]), key=lambda item: (-item[0], item[1]))
+        return [
+            {"title": doc.get("title", ""), "url": doc.get("url", ""), "content": doc.get("content", "")}
+            for doc in (self.documents[index] for _, index in ranked[:max_results])
+        ]
+
+
+SEARCH_BACKENDS = {
+    "tavily": TavilyBackend,
+    "intel_wiki": IntelWikiBackend,
+    "local": LocalSearchBackend,
+}
+
+_backends: Dict[str, SearchBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_search_backend(name: str) -> SearchBackend:
+    """
+    The shared instance of a search backend. CODEACE_SEARCH_BACKEND overrides every backend
+    (e.g. 'local' to run the tools offline).
+    """
+    name = os.getenv("CODEACE_SEARCH_BACKEND") or name
+    if name not in SEARCH_BACKENDS:
+        raise ValueError(f"Search backend {name} is not supported.")
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = SEARCH_BACKENDS[name]()
+        return _backends[name]
+
+
+class SearchResultsCache:
+    """
+    On-disk TTL cache of search results, keyed by backend, normalized query and result count
+    """
+
+    def __init__(self, db_path: str = None):
+        db_path = db_path or os.getenv("CODEACE_SEARCH_CACHE_PATH") or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "app_data", "search_cache.db"
+        )
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.cache = QueryCache(db_path)
+
+    def search(self, backend: SearchBackend, query: str, max_results: int, ttl: float) -> List[Dict]:
+        """Cached backend.search - entries older than ttl seconds are fetched again"""
+        key = QueryCache.make_key("search", backend.name, QueryCache.normalize_query(query), max_results)
+        results = self.cache.get(key, max_age=ttl)
+        if results is None:
+            results = backend.search(query, max_results)
+            self.cache.set(key, results, f"search:{backend.name}")
+        return results
+
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchResultsCache:
+    """The process-wide search results cache - its database is created on the first search"""
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchResultsCache()
+        return _search_cache
+
+
+class SearchResultsTrimmer:
+    """
+    Fits search results into a token budget: every result keeps its title and url and the snippets
+    (sentences) of its content that share the most terms with the query, in their original order.
+    """
+
+    _SNIPPET_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+    def __init__(self, max_tokens: int = 1500, snippets_per_result: int = 3, encoding: str = "cl100k_base"):
+        self.max_tokens = max_tokens
+        self.snippets_per_result = snippets_per_result
+        self.tokenizer = tiktoken.get_encoding(encoding)
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        tokens = self.tokenizer.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return self.tokenizer.decode(tokens[:max(max_tokens, 0)]) + "..."
+
+    def trim_content(self, query: str, content: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        snippets = [snippet.strip() for snippet in self._SNIPPET_RE.split(content or "") if snippet.strip()]
+        if not snippets:
+            return ""
+        query_terms = set(LexicalIndex.tokenize(query))
+        ranked = sorted(
+            range(len(snippets)),
+            key=lambda index: (-len(query_terms & set(LexicalIndex.tokenize(snippets[index]))), index)
+        )
+        selected = sorted(ranked[:self.snippets_per_result])
+        return self._truncate(" ... ".join(snippets[index] for index in selected), max_tokens)
+
+    def trim(self, query: str, results: List[Dict]) -> List[Dict]:
+        """Return copies of the results with their content trimmed to an equal share of the budget"""
+        if not results:
+            return []
+        share = self.max_tokens // len(results)
+        trimmed = []
+        for result in results:
+            header_tokens = len(self.tokenizer.encode(f"{result.get('title', '')}\n{result.get('url', '')}\n"))
+            trimmed.append({**result, "content": self.trim_content(query, result.get("content", ""), share - header_tokens)})
+        return trimmed
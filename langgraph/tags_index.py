@@ -0,0 +1,162 @@
+import mmap
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+
+class TagsIndex:
+    """
+    Fast lookups in a ctags file.
+    Files written sorted (!_TAG_FILE_SORTED 1) are memory-mapped and binary searched, so nothing is
+    loaded up front. Unsorted or case-folded files (and all files on Windows) are parsed once into a hashed index.
+    Indexes are cached per path and rebuilt when the file's mtime or size changes (see TagsIndex.get).
+    """
+
+    # Kinds that represent definitions - single letter (default ctags output) or long names (--fields=+K)
+    DEFINITION_KINDS = {"c", "f", "v", "class", "function", "variable"}
+    # A mapped file can't be replaced on Windows, which would break regenerating the tags file
+    USE_MMAP = os.name != "nt"
+
+    _cache: Dict[str, "TagsIndex"] = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, tags_file_path: str):
+        self.tags_file_path = tags_file_path
+        stat = os.stat(tags_file_path)
+        self.file_key = (stat.st_mtime_ns, stat.st_size)
+        self._mmap: Optional[mmap.mmap] = None
+        # tag -> raw tag lines, parsed on lookup (unsorted files only)
+        self._entries: Optional[Dict[bytes, List[bytes]]] = None
+        with open(tags_file_path, 'rb') as f:
+            sorted_file = self._read_sorted_flag(f)
+            if sorted_file and stat.st_size and self.USE_MMAP:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                f.seek(0)
+                self._entries = self._build_entries(f)
+
+    @classmethod
+    def get(cls, tags_file_path: str) -> "TagsIndex":
+        """
+        The cached index of a tags file, rebuilt if the file changed since it was indexed
+        """
+        path = os.path.abspath(tags_file_path)
+        stat = os.stat(path)
+        with cls._cache_lock:
+            index = cls._cache.get(path)
+            if index is None or index.file_key != (stat.st_mtime_ns, stat.st_size):
+                # The replaced index is left to the garbage collector - other threads may still be using it
+                index = cls(path)
+                cls._cache[path] = index
+            return index
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    @staticmethod
+    def _read_sorted_flag(f) -> bool:
+        """Whether the pseudo-tag header declares the file sorted byte-wise (1; 2 means case-folded)"""
+        for line in f:
+            if not line.startswith(b"!_TAG_"):
+                break
+            if line.startswith(b"!_TAG_FILE_SORTED\t"):
+                return line.split(b"\t")[1].strip() == b"1"
+        return False
+
+    @staticmethod
+    def parse_line(line: str) -> Optional[Dict]:
+        """
+        Parse a tags line: name<TAB>file<TAB>address[;"<TAB>extension fields].
+        The kind is either a bare field or 'kind:<kind>'; the line number comes from 'line:<n>'
+        or from a numeric address.
+        """
+        parts = line.rstrip('\r\n').split('\t')
+        if len(parts) < 3 or line.startswith("!_TAG_"):
+            return None
+        entry = {"tag": parts[0], "file": parts[1], "line": None, "kind": None}
+        address = parts[2]
+        if address.endswith(';"'):
+            address = address[:-2]
+        if address.isdigit():
+            entry["line"] = int(address)
+        for field in parts[3:]:
+            key, separator, value = field.partition(':')
+            if not separator:
+                entry["kind"] = key
+            elif key == "kind":
+                entry["kind"] = value
+            elif key == "line" and value.isdigit():
+                entry["line"] = int(value)
+        return entry
+
+    @staticmethod
+    def _build_entries(f) -> Dict[bytes, List[bytes]]:
+        entries: Dict[bytes, List[bytes]] = {}
+        for raw_line in f:
+            if raw_line.startswith(b"!_TAG_"):
+                continue
+            tab = raw_line.find(b"\t")
+            if tab > 0:
+                entries.setdefault(raw_line[:tab], []).append(raw_line)
+        return entries
+
+    def _parse_lines(self, raw_lines: List[bytes]) -> List[Dict]:
+        entries = (self.parse_line(raw_line.decode('utf-8', errors='replace')) for raw_line in raw_lines)
+        return [entry for entry in entries if entry]
+
+    def _mmap_lookup(self, tag: str) -> List[Dict]:
+        """Binary search for the first line of the tag, then read its lines"""
+        data = self._mmap
+        key = tag.encode('utf-8')
+        lo, hi = 0, len(data)
+        # lo and hi are always line starts; every step moves one of them past the middle line
+        while lo < hi:
+            mid = (lo + hi) // 2
+            line_start = data.rfind(b"\n", 0, mid) + 1
+            line_end = data.find(b"\n", line_start)
+            if line_end == -1:
+                line_end = len(data)
+            name_end = data.find(b"\t", line_start, line_end)
+            name = data[line_start:name_end if name_end != -1 else line_end]
+            if name < key:
+                lo = line_end + 1
+            else:
+                hi = line_start
+
+        raw_lines = []
+        prefix = key + b"\t"
+        position = lo
+        while position < len(data) and data[position:position + len(prefix)] == prefix:
+            line_end = data.find(b"\n", position)
+            if line_end == -1:
+                line_end = len(data)
+            raw_lines.append(data[position:line_end])
+            position = line_end + 1
+        return self._parse_lines(raw_lines)
+
+    def lookup(self, tag: str) -> List[Dict]:
+        """
+        All locations of a tag.
+
+        Returns:
+            List[Dict]: Entries with tag, file, line (None if the tag has no line number) and kind
+        """
+        if self._entries is not None:
+            return self._parse_lines(self._entries.get(tag.encode('utf-8'), []))
+        if self._mmap is None:
+            return []
+        return self._mmap_lookup(tag)
+
+    def lookup_many(self, tags: Iterable[str], kinds: Iterable[str] = None) -> Dict[str, List[Dict]]:
+        """
+        Batch lookup - all locations of every tag that was found, optionally only of the given kinds
+        """
+        kinds = set(kinds) if kinds is not None else None
+        results = {}
+        for tag in dict.fromkeys(tags):
+            entries = [entry for entry in self.lookup(tag) if kinds is None or entry["kind"] in kinds]
+            if entries:
+                results[tag] = entries
+        return results
@@ -1,7 +1,14 @@
 from langchain_core.tools import tool
-from codeace import CoreAgent, MappingAgent, LLMManager
-from langchain_community.tools import tavily_search
-from intel_wiki_lib.intel_wiki_api import IntelWikiAPI
+from codeace import get_core_agent
+from tags_index import TagsIndex
+from search_backends import get_search_backend, get_search_cache, SearchResultsTrimmer
+
+# Seconds a cached search result is reused - agent retries and repeated questions don't search again
+WEB_SEARCH_TTL = 60 * 60
+WIKI_SEARCH_TTL = 24 * 60 * 60
+# Web results are cut to their best snippets, so a search can't flood the model context
+results_trimmer = SearchResultsTrimmer(max_tokens=1500, snippets_per_result=3)
+
 @tool
 def get_relevant_files(user_query: str, src_path: str) -> list:
     """
@@ -12,8 +19,8 @@ def get_relevant_files(user_query: str, src_path: str) -> list:
         src_path (str): The source path where the files are located.
     """
     print(f"\n@call get_relevant_files({user_query}, {src_path}):\n\n")
-    # Initialize the CoreAgent
-    core_agent = CoreAgent(model_name="azure", src_path=src_path)
+    # Get the CoreAgent from the process-wide pool
+    core_agent = get_core_agent(model_name="azure", src_path=src_path)
 
     # Get the relevant files
     relevant_files = core_agent.find_relevant_files(user_query)
@@ -22,68 +29,51 @@ def get_relevant_files(user_query: str, src_path: str) -> list:
 @tool
 def find_definitions(tags_to_find, tags_file_path):
     """
-    Finds the files where the given tags are defined based on a ctags file.
-    This version is adapted for the specific ctags format where the kind
-    is indicated by a single letter at the end of the line.
+    Finds where the given tags are defined (classes, functions, variables) based on a ctags file.
 
     Args:
         tags_to_find (list): A list of tag names (strings) to search for.
         tags_file_path (str): The path to the ctags file.
 
     Returns:
-        dict: A dictionary where keys are the tag names and values are the file paths
-              where the tag is defined. If a tag is not found, it will not be
-              present in the dictionary.
+        dict: A dictionary where keys are the tag names and values are lists of all the locations
+              where the tag is defined, each with 'file', 'line' (may be None) and 'kind'.
+              If a tag is not found, it will not be present in the dictionary.
     """
     print(f"\n@call find_definitions({tags_to_find}, {tags_file_path}):\n\n")
-    definitions = {}
+    if isinstance(tags_to_find, str):
+        tags_to_find = [tags_to_find]
     try:
-        with open(tags_file_path, 'r') as f:
-            for line in f:
-                parts = line.strip().split('\t')
-                if len(parts) >= 4:  # Expecting at least 4 parts now
-                    tag_name = parts[0]
-                    file_path = parts[1]
-                    kind = parts[3]  # The kind is the 4th part
-
-                    # Define which kinds represent definitions
-                    definition_kinds = ['c', 'f', 'v']  # Class, function, variable
-
-                    if tag_name in tags_to_find and kind in definition_kinds:
-                        definitions[tag_name] = file_path
+        tags_index = TagsIndex.get(tags_file_path)
     except FileNotFoundError:
         print(f"Error: ctags file not found at {tags_file_path}")
-    return definitions
+        return {}
+    return tags_index.lookup_many(tags_to_find, kinds=TagsIndex.DEFINITION_KINDS)
 
 @tool
 def find_implementations(tags_to_find, tags_file_path):
     """
     Finds the files where the given tags are likely implemented based on a ctags file.
-    Note: ctags doesn't explicitly mark "implementation". This function identifies
-    references to the tag which could indicate implementation.
+    Note: ctags doesn't explicitly mark "implementation". This function returns every
+    location of the tag, which could indicate implementation.
 
     Args:
         tags_to_find (list): A list of tag names (strings) to search for.
         tags_file_path (str): The path to the ctags file.
 
     Returns:
-        dict: A dictionary where keys are the tag names and values are the file paths
-              where the tag is likely implemented (referenced). If a tag is not found,
-              it will not be present in the dictionary.
+        dict: A dictionary where keys are the tag names and values are lists of all the locations
+              of the tag, each with 'file', 'line' (may be None) and 'kind'.
+              If a tag is not found, it will not be present in the dictionary.
     """
-    implementations = {}
+    if isinstance(tags_to_find, str):
+        tags_to_find = [tags_to_find]
     try:
-        with open(tags_file_path, 'r') as f:
-            for line in f:
-                parts = line.strip().split('\t')
-                if len(parts) >= 2:
-                    tag_name = parts[0]
-                    file_path = parts[1]
-                    if tag_name in tags_to_find:
-                        implementations[tag_name] = file_path
+        tags_index = TagsIndex.get(tags_file_path)
     except FileNotFoundError:
         print(f"Error: ctags file not found at {tags_file_path}")
-    return implementations
+        return {}
+    return tags_index.lookup_many(tags_to_find)
 
 @tool
 def web_search(query: str) -> str:
@@ -96,23 +86,9 @@ def web_search(query: str) -> str:
     Returns:
         str: The search results.
     """
-    tool = tavily_search.TavilySearchResults(
-    max_results=5,
-    search_depth="advanced",
-    include_answer=True,
-    include_raw_content=True,
-    include_images=True,
-    # include_domains=[...],
-    # exclude_domains=[...],
-    # name="...",            # overwrite default tool name
-    # description="...",     # overwrite default tool description
-    # args_schema=...,       # overwrite default args_schema: BaseModel
-)
-
-
-    result = tool.invoke({"query": query})
+    results = get_search_cache().search(get_search_backend("tavily"), query, max_results=5, ttl=WEB_SEARCH_TTL)
     answer = ''
-    for i in result:
+    for i in results_trimmer.trim(query, results):
         answer += i['url'] + '\n'
         answer += i['content'] + '\n'
         answer += '-'*50 + '\n\n\n'
@@ -130,14 +106,13 @@ def intel_wiki_search(key_word: str) -> str:
     Returns:
         str: The search results.
     """
-    wiki_app = IntelWikiAPI()
-    results = wiki_app.search_by_keyword(key_word, result_limit=5)
+    results = get_search_cache().search(get_search_backend("intel_wiki"), key_word, max_results=5, ttl=WIKI_SEARCH_TTL)
     answer = ''
      
     for idx, result in enumerate(results):
         answer += f"Result:\n {idx + 1}\n"
-        answer += f"Title:\n {result.title}\n"
-        answer += f"URL:\n {result.url_link}\n\n"
+        answer += f"Title:\n {result['title']}\n"
+        answer += f"URL:\n {result['url']}\n\n"
         answer += '-'*50 + '\n\n\n'
 
     print(f'@call intel_wiki_search({key_word}):\n\n{answer}')
@@ -0,0 +1,88 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+
+class StageEvent(NamedTuple):
+    """An update about a pipeline stage: status is 'done', 'failed' or 'skipped'"""
+    stage: str
+    status: str
+    result: Any = None
+    error: Optional[BaseException] = None
+    duration: float = 0.0
+
+
+class QueryPipeline:
+    """
+    A small DAG of query stages. Every stage whose dependencies are done runs on a thread pool,
+    so independent stages (e.g. the relevance searches of two sources) overlap.
+    Stage functions receive the results of their dependencies as keyword arguments.
+    Events are yielded in the calling thread, so the caller can safely update the Streamlit UI.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._stages: Dict[str, Dict] = {}
+
+    def add_stage(self, name: str, func: Callable, deps: List[str] = None, label: str = None) -> None:
+        """Add a stage; deps must name stages that were added before it"""
+        deps = list(deps or [])
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dep}")
+        self._stages[name] = {"func": func, "deps": deps, "label": label or name}
+
+    def get_label(self, name: str) -> str:
+        return self._stages[name]["label"]
+
+    @property
+    def stages(self) -> List[str]:
+        return list(self._stages)
+
+    def _run_stage(self, name: str, results: Dict[str, Any]):
+        stage = self._stages[name]
+        start = time.perf_counter()
+        result = stage["func"](**{dep: results[dep] for dep in stage["deps"]})
+        return result, time.perf_counter() - start
+
+    def run(self) -> Iterator[StageEvent]:
+        """
+        Run all stages. A failed stage doesn't stop independent stages; its dependents are skipped.
+
+        Yields:
+            StageEvent: One event per stage, in completion order
+        """
+        results: Dict[str, Any] = {}
+        finished = set()
+        blocked = set()
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                for name, stage in self._stages.items():
+                    if name in finished or name in blocked or name in running.values():
+                        continue
+                    if any(dep in blocked for dep in stage["deps"]):
+                        blocked.add(name)
+                        yield StageEvent(name, "skipped")
+                    elif all(dep in finished for dep in stage["deps"]):
+                        # Stages run in the caller's context, e.g. under its telemetry trace
+                        context = contextvars.copy_context()
+                        running[executor.submit(context.run, self._run_stage, name, results)] = name
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        result, duration = future.result()
+                    except Exception as e:
+                        blocked.add(name)
+                        yield StageEvent(name, "failed", error=e)
+                        continue
+                    results[name] = result
+                    finished.add(name)
+                    yield StageEvent(name, "done", result=result, duration=duration)
@@ -2,13 +2,17 @@ import streamlit as st
 import os
 import json
 from datetime import datetime
-from codeace import MappingAgent, CoreAgent, LLMManager
-import git
+from codeace import MappingAgent, CoreAgent, LLMManager, HistoryManager, get_core_agent, get_telemetry
 from typing import Tuple
+from query_pipeline import QueryPipeline
+from clone_manager import get_clone_manager
 
 # Constants
 ASSISTANT_AVATAR_PATH = 'https://imgur.com/FgmmmH7.png'
 USER_AVATAR_PATH = 'https://ps.w.org/user-avatar-reloaded/assets/icon-128x128.png'
+DOCUMENTATIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Documentations")
+# st.fragment is Streamlit 1.37+, earlier releases (e.g. the 1.36 pinned for langgraph) only have the experimental one
+fragment = getattr(st, "fragment", None) or st.experimental_fragment
 
 # Page config
 st.set_page_config(layout="wide", page_title="Code Ace™", page_icon="🤖")
@@ -47,37 +51,69 @@ if 'model_mode' not in st.session_state:
     st.session_state.model_mode = "agente"
 if 'llm_model' not in st.session_state:
     st.session_state.llm_model = LLMManager().create_model_instance_by_name("azure")
+if 'history_manager' not in st.session_state:
+    st.session_state.history_manager = HistoryManager(st.session_state.llm_model)
 if 'extra_context_select' not in st.session_state:
     st.session_state.extra_context_select = []
+if 'doc_context_tokens' not in st.session_state:
+    st.session_state.doc_context_tokens = 2000
 if 'improve_prompt' not in st.session_state:
     st.session_state.improve_prompt = False
+if 'mapping_workers' not in st.session_state:
+    st.session_state.mapping_workers = 4
+if 'search_mode' not in st.session_state:
+    st.session_state.search_mode = "hybrid"
+if 'answer_strategy' not in st.session_state:
+    st.session_state.answer_strategy = "refine"
+if 'summary_mode' not in st.session_state:
+    st.session_state.summary_mode = "hierarchical"
+if "last_trace_id" not in st.session_state:
+    st.session_state.last_trace_id = None
+if 'clone_jobs' not in st.session_state:
+    # Repository paths with a clone or update running in the background
+    st.session_state.clone_jobs = []
+if 'clone_notices' not in st.session_state:
+    st.session_state.clone_notices = []
 def is_github_url(path: str) -> bool:
     """Check if the given path is a GitHub repository URL."""
     return path.startswith(("http://github.com/", "https://github.com/"))
 
-def clone_github_repo(repo_url: str) -> Tuple[bool, str, str]:
+def start_clone_job(repo_url: str = None, repo_path: str = None) -> Tuple[bool, str]:
     """
-    Clone a GitHub repository to the repos directory.
-    Returns: (success, message, repo_path)
+    Clone a repository (or update an existing clone) in the background - see render_clone_jobs for the progress.
+    Returns: (success, message)
     """
+    clone_manager = get_clone_manager()
     try:
-        repos_dir = os.path.join(os.path.dirname(__file__), "repos")
-        os.makedirs(repos_dir, exist_ok=True)
-        
-        repo_name = repo_url.split("/")[-1].replace(".git", "")
-        repo_path = os.path.join(repos_dir, repo_name)
-        
-        # Check if directory already exists and is not empty
-        if os.path.exists(repo_path) and os.listdir(repo_path):
-            # Directory exists and is not empty - return success since we already have it
-            print(f"Repository already exists at {repo_path}")
-            return True, f"Repository already exists at {repo_path}", repo_path
-        
-        git.Repo.clone_from(repo_url, repo_path)
-        print(f"Repository cloned successfully to {repo_path}")
-        return True, f"Repository cloned successfully to {repo_path}", repo_path
-    except Exception as e:
-        return False, f"Error cloning repository: {str(e)}", ""
+        job = clone_manager.start(repo_url) if repo_url else clone_manager.start_update(repo_path)
+    except ValueError as e:
+        return False, str(e)
+    if job.repo_path not in st.session_state.clone_jobs:
+        st.session_state.clone_jobs.append(job.repo_path)
+    action = "Cloning" if job.action == "clone" else "Updating"
+    return True, f"{action} {os.path.basename(job.repo_path)} in the background"
+
+@fragment(run_every=1.0)
+def render_clone_jobs():
+    """
+    Progress of the background clones and updates. Reruns every second on its own, so the rest of the
+    app stays responsive; a finished job adds its repository to the saved sources.
+    """
+    clone_manager = get_clone_manager()
+    for repo_path in list(st.session_state.clone_jobs):
+        job = clone_manager.get_job(repo_path)
+        if job is None:
+            st.session_state.clone_jobs.remove(repo_path)
+            continue
+        if not job.done:
+            st.progress(job.progress, text=f"{os.path.basename(repo_path)}: {job.message}")
+            continue
+        st.session_state.clone_jobs.remove(repo_path)
+        if job.status == "done" and repo_path not in st.session_state.saved_paths:
+            st.session_state.saved_paths.append(repo_path)
+            save_paths(st.session_state.saved_paths)
+        st.session_state.clone_notices.append((job.status, job.summary(), job.changed_files))
+        st.rerun()
 
 def add_source_path(path: str) -> Tuple[bool, str]:
     """
@@ -88,13 +124,7 @@ def add_source_path(path: str) -> Tuple[bool, str]:
         return False, "Path already exists in saved sources"
     
     if is_github_url(path):
-        with st.spinner('Cloning GitHub repository...'):
-            success, message, repo_path = clone_github_repo(path)
-            if success:
-                st.session_state.saved_paths.append(repo_path)
-                save_paths(st.session_state.saved_paths)
-                return True, message
-            return False, message
+        return start_clone_job(repo_url=path)
     
     if os.path.isdir(path):
         st.session_state.saved_paths.append(path)
@@ -150,44 +180,156 @@ def load_conversation(file_path):
     with open(file_path, "r", encoding="utf-8") as file:
         return json.load(file)
 
+def show_cache_status(agent, stage: str, label: str):
+    """Show whether the agent served the last call of a stage from the query cache"""
+    if agent.query_cache is None or stage not in agent.last_cache_hits:
+        return
+    st.caption(f"⚡ {label}: served from cache" if agent.last_cache_hits[stage] else f"{label}: cache miss")
+
+def render_query_breakdown(panel, trace_id: str):
+    """Show the time, tokens and cache hits per stage of a query trace in a sidebar placeholder"""
+    rows = get_telemetry().get_breakdown(trace_id) if trace_id else []
+    with panel.container():
+        if not rows:
+            st.caption("No query yet.")
+            return
+        st.dataframe(
+            [
+                {
+                    "Stage": row["stage"],
+                    "Calls": row["calls"],
+                    "Time (s)": round(row["duration"], 2),
+                    "Prompt tokens": row["prompt_tokens"],
+                    "Completion tokens": row["completion_tokens"],
+                    "Cache hits": row["cache_hits"],
+                }
+                for row in rows
+            ],
+            hide_index=True
+        )
+
+def render_stage_result(stage: str, result, agents: dict):
+    """Render the output of a finished query pipeline stage"""
+    if stage == "relevant_files":
+        relevant_files_str = '\n'.join(result)
+        st.markdown(f"📁 Found relevant files:\n\n{relevant_files_str}\n\n")
+        show_cache_status(agents["primary"], "relevant_files", "Relevance search")
+    elif stage == "dependencies_files":
+        relevant_dependencies_files_str = '\n'.join(result)
+        st.markdown(f"📁 Found relevant dependencies files:\n\n {relevant_dependencies_files_str}\n\n")
+        show_cache_status(agents["extra"], "relevant_files", "Dependencies relevance search")
+    elif stage == "predictions":
+        st.write("🤖 Predictions from additional source:")
+        st.markdown(result)
+        show_cache_status(agents["extra"], "dependencies_query", "Predictions")
+
+def build_query_pipeline(user_input: str, core_agent, pre_agent=None, doc_paths: list = None,
+                         doc_names: list = None) -> QueryPipeline:
+    """
+    Build the stages of a query:
+    relevance search (primary) -> file prefetch, relevance search (extra source) -> predictions,
+    reading the context documents and the documentation section search - all independent branches run concurrently.
+    Stages only compute; everything Streamlit-related (including session state) stays in the script thread.
+    doc_paths are the context documents to read, None standing for the project summary.
+    doc_names are the selected documentations, of which only the sections relevant to the query are used.
+    """
+    search_mode = st.session_state.search_mode
+    strategy = st.session_state.answer_strategy
+    pipeline = QueryPipeline(max_workers=4)
+    pipeline.add_stage(
+        "relevant_files",
+        lambda: core_agent.find_relevant_files(user_input, search_mode=search_mode),
+        label="Finding relevant files"
+    )
+    pipeline.add_stage(
+        "prefetch",
+        lambda relevant_files: core_agent.prefetch_files(relevant_files),
+        deps=["relevant_files"],
+        label="Loading relevant files"
+    )
+    if pre_agent:
+        pipeline.add_stage(
+            "dependencies_files",
+            lambda: pre_agent.find_relevant_files(user_input, search_mode=search_mode),
+            label="Finding relevant dependencies files"
+        )
+        pipeline.add_stage(
+            "predictions",
+            lambda dependencies_files: pre_agent.process_dependencies_query(
+                user_input, dependencies_files, strategy=strategy
+            ),
+            deps=["dependencies_files"],
+            label="Predicting from additional source"
+        )
+
+    if doc_paths:
+        pipeline.add_stage(
+            "context_docs",
+            lambda: [core_agent.file_manager.read_extra_context_doc(path) for path in doc_paths],
+            label="Reading context documents"
+        )
+    if doc_names:
+        max_tokens = st.session_state.doc_context_tokens
+        pipeline.add_stage(
+            "documentation",
+            lambda: core_agent.get_documentation_context(user_input, DOCUMENTATIONS_PATH, doc_names, max_tokens),
+            label="Searching documentation"
+        )
+    return pipeline
+
 def process_user_query(messages):
-    """Process the latest user query"""
+    """
+    Process the latest user query.
+    Returns a stream of response pieces to render with st.write_stream.
+    """
     if not st.session_state.core_agent:
-        return "Please select a source directory and run the mapping process first."
+        return iter(["Please select a source directory and run the mapping process first."])
     
+    # A fresh session copy of the pooled agent - picks up a re-mapped source and starts from a clean context
+    st.session_state.core_agent = get_core_agent(model_name="azure", src_path=st.session_state.current_source)
+    core_agent = st.session_state.core_agent
     user_input = messages[-1]["content"]
-    pre_response = ""
-    with st.spinner('Finding relevant files...'):
-        relevant_files = st.session_state.core_agent.find_relevant_files(user_input)
-        relevant_files_str = '\n'.join(relevant_files)
-        st.markdown(f"📁 Found relevant files:\n\n{relevant_files_str}\n\n")
+    use_extra_source = st.session_state.use_extra_source and st.session_state.extra_src_path
+    pre_agent = get_core_agent(model_name="azure", src_path=st.session_state.extra_src_path) if use_extra_source else None
+    agents = {"primary": core_agent, "extra": pre_agent}
+    doc_paths = [None] if st.session_state.use_summery_contaxt else []
+    doc_names = st.session_state.extra_context_select or []
 
-    if st.session_state.use_extra_source and st.session_state.extra_src_path:
-        pre_agent = CoreAgent(model_name="azure", src_path=st.session_state.extra_src_path)
-        with st.spinner('Finding relevant dependencies files...'):
-            relevant_dependencies_files = pre_agent.find_relevant_files(user_input)
-            relevant_dependencies_files_str = '\n'.join(relevant_dependencies_files)
-            st.markdown(f"📁 Found relevant dependencies files:\n\n {relevant_dependencies_files_str}\n\n")
-        
-        with st.spinner('Generating predictions from additional source...'):
-            pre_response = pre_agent.process_dependencies_query(user_input, relevant_dependencies_files)
-            st.write(f"🤖 Predictions from additional source:\n\n{pre_response}\n\n")
-    
-    with st.spinner('Generating response...'):
-        if st.session_state.use_summery_contaxt:
-            st.session_state.core_agent.add_extra_context_by_path(override=True)
+    pipeline = build_query_pipeline(user_input, core_agent, pre_agent, doc_paths, doc_names)
+    progress = {stage: st.empty() for stage in pipeline.stages}
+    for stage in pipeline.stages:
+        progress[stage].caption(f"⏳ {pipeline.get_label(stage)}...")
 
-        if st.session_state.use_extra_source and st.session_state.extra_src_path:
-            st.session_state.core_agent.add_extra_context(pre_response)
-            st.session_state.core_agent.add_extra_context(st.session_state.extra_context)
-        
-        if st.session_state.extra_context_select:
-            for tag in st.session_state.extra_context_select:
-                st.session_state.core_agent.add_extra_context_by_path(os.path.join("documentations", f"{tag}.md"))
-                print(f"Added extra context from: {tag}")
-        
-        response = st.session_state.core_agent.process_code_query(user_input, relevant_files)
-        return response
+    results = {}
+    for event in pipeline.run():
+        label = pipeline.get_label(event.stage)
+        if event.status == "done":
+            results[event.stage] = event.result
+            progress[event.stage].caption(f"✅ {label} ({event.duration:.1f}s)")
+            render_stage_result(event.stage, event.result, agents)
+        elif event.status == "failed":
+            print(f"Error in stage {event.stage}: {str(event.error)}")
+            progress[event.stage].caption(f"❌ {label} failed: {str(event.error)}")
+        else:
+            progress[event.stage].caption(f"⏭️ {label} skipped")
+
+    if "relevant_files" not in results:
+        return iter(["Could not find relevant files for this query."])
+
+    # Contexts are added in a fixed order, whatever order the stages finished in
+    docs = results.get("context_docs", [])
+    if st.session_state.use_summery_contaxt and docs:
+        core_agent.add_extra_context(docs.pop(0), override=True)
+    if use_extra_source:
+        core_agent.add_extra_context(results.get("predictions", ""))
+        core_agent.add_extra_context(st.session_state.extra_context)
+    if results.get("documentation"):
+        core_agent.add_extra_context(results["documentation"])
+        print(f"Added documentation sections from: {', '.join(doc_names)}")
+
+    return core_agent.stream_code_query(
+        user_input, results["relevant_files"], strategy=st.session_state.answer_strategy
+    )
 
 def run_mapping_process(src_path):
     """Run the mapping process for the selected source"""
@@ -195,18 +337,21 @@ def run_mapping_process(src_path):
     with st.spinner('Running mapping process...'):
         status_placeholder = st.empty()
         mapping_agent = MappingAgent(model_name="azure", src_path=src_path)
-        for status in mapping_agent.run_mapping_process(generate_summery=True):
+        for status in mapping_agent.run_mapping_process(
+            generate_summery=True, max_workers=st.session_state.mapping_workers,
+            summary_mode=st.session_state.summary_mode
+        ):
             print(status)
             status_placeholder.text(status)
         status_placeholder.text("All files processed!")
-        st.session_state.core_agent = CoreAgent(model_name="azure", src_path=src_path)
+        st.session_state.core_agent = get_core_agent(model_name="azure", src_path=src_path)
         st.session_state.mapping_done = True
         return True
 
 def get_tags_from_documetations_folde():
     """Get tags from the documentations folder"""
     tags = []
-    for root, dirs, files in os.walk("documentations"):
+    for root, dirs, files in os.walk(DOCUMENTATIONS_PATH):
         for file in files:
             tags.append(file.split(".")[0])
     return tags
@@ -219,6 +364,7 @@ st.write(f"version: {codeace.__version__}")
 # New chat button
 if st.button("New Chat"):
     st.session_state.messages = []
+    st.session_state.history_manager.reset()
 # Sidebar
 with st.sidebar:
     # Logo and Image
@@ -232,19 +378,52 @@ with st.sidebar:
             "Add Summary to Context", value=st.session_state.use_summery_contaxt
         )
         st.session_state.improve_prompt = st.checkbox("Improve prompt", value=st.session_state.improve_prompt)
+        st.session_state.mapping_workers = st.number_input(
+            "Mapping workers", min_value=1, max_value=32, value=st.session_state.mapping_workers,
+            help="Number of files described concurrently during the mapping process"
+        )
+        st.session_state.summary_mode = st.selectbox(
+            "Summary mode", MappingAgent.SUMMARY_MODES,
+            index=MappingAgent.SUMMARY_MODES.index(st.session_state.summary_mode),
+            help="hierarchical: files are summarized in parallel and merged per directory, rolling: every file updates the whole summary"
+        )
+        st.session_state.search_mode = st.selectbox(
+            "Relevance search", CoreAgent.SEARCH_MODES,
+            index=CoreAgent.SEARCH_MODES.index(st.session_state.search_mode),
+            help="hybrid: local index pre-selects files for the LLM, lexical: local index only, llm: LLM reads the whole mapping"
+        )
+        st.session_state.answer_strategy = st.selectbox(
+            "Answer strategy", CoreAgent.ANSWER_STRATEGIES,
+            index=CoreAgent.ANSWER_STRATEGIES.index(st.session_state.answer_strategy),
+            help="refine: code chunks are answered one after another, map_reduce: chunks are answered in parallel and combined"
+        )
+        if st.session_state.core_agent and st.session_state.core_agent.query_cache and st.button("Clear answer cache"):
+            st.session_state.core_agent.query_cache.clear()
+            st.success("Answer cache cleared")
            
 
     # Source Management
     with st.expander("Source Management", expanded=True):
-        # Add new source path
-        new_path = st.text_input("Add New Source Directory or GitHub repo URL")
-        if new_path:
+        # Add new source path - a form, so the path is submitted once and not on every rerun
+        with st.form("add_source", clear_on_submit=True, border=False):
+            new_path = st.text_input("Add New Source Directory or GitHub repo URL")
+            submitted = st.form_submit_button("Add Source")
+        if submitted and new_path:
             success, message = add_source_path(new_path)
             if success:
                 st.success(message)
-                st.rerun()
             else:
                 st.error(message)
+
+        render_clone_jobs()
+        for status, message, changed_files in st.session_state.clone_notices:
+            if status == "failed":
+                st.error(message)
+            else:
+                st.success(message)
+            if changed_files:
+                st.caption("Run the mapping process to re-map the changed files:\n\n" + "\n".join(changed_files[:20]))
+        st.session_state.clone_notices = []
         
         # Primary source selection
         if st.session_state.saved_paths:
@@ -269,7 +448,7 @@ with st.sidebar:
                 if src_path != st.session_state.current_source:
                     st.session_state.current_source = src_path
                     try:
-                        st.session_state.core_agent = CoreAgent(
+                        st.session_state.core_agent = get_core_agent(
                             model_name="azure", src_path=src_path
                         )
                         st.info("CoreAgent initialized with new source path")
@@ -277,6 +456,13 @@ with st.sidebar:
                     except Exception as e:
                         st.error(f"Error initializing CoreAgent: {str(e)}")
                 
+                # Cloned repositories can pull upstream changes (only changed files are re-mapped)
+                if get_clone_manager().is_managed(src_path) and st.button("Fetch Updates"):
+                    success, message = start_clone_job(repo_path=src_path)
+                    if success:
+                        st.rerun()
+                    st.error(message)
+
                 # Run mapping process button
                 if st.button("Run Mapping Process"):
                     if run_mapping_process(src_path):
@@ -311,12 +497,29 @@ with st.sidebar:
     with st.expander("Extra Context", expanded=False):
         tags_list = get_tags_from_documetations_folde()
         st.session_state.extra_context_select = st.multiselect("Select Extra Context",tags_list)
+        st.session_state.doc_context_tokens = st.number_input(
+            "Documentation token budget", min_value=0, max_value=32000, step=500,
+            value=st.session_state.doc_context_tokens,
+            help="Only the documentation sections most relevant to the question are added, up to this many tokens"
+        )
         
         st.text_area("Add extra context text", key="extra_context_input")
         if st.button("Apply"):
             st.session_state.extra_context = st.session_state.extra_context_input
             st.success("Extra context added successfully!")
 
+    # Per-stage timings of the last query - filled again once a new query finishes
+    with st.expander("Last Query Breakdown", expanded=False):
+        breakdown_panel = st.empty()
+        render_query_breakdown(breakdown_panel, st.session_state.last_trace_id)
+        telemetry = get_telemetry()
+        st.download_button(
+            "Export spans (JSONL)", telemetry.to_jsonl(), file_name="codeace_spans.jsonl", mime="application/jsonl"
+        )
+        st.download_button(
+            "Export metrics (Prometheus)", telemetry.to_prometheus(), file_name="codeace_metrics.prom", mime="text/plain"
+        )
+
     # Conversation Management
     with st.expander("Conversation Management", expanded=False):
     
@@ -348,22 +551,33 @@ for message in st.session_state.messages:
 
 # Chat input
 if prompt := st.chat_input("What would you like to know about the code?"):
-    if st.session_state.improve_prompt:
-        with st.spinner('Improving prompt...'):
-            st.session_state.core_agent.add_extra_context_by_path(r'C:\streamlit_gui\LineTools_documentation.md')
-            prompt = st.session_state.core_agent.improve_user_prompt(prompt)
+    # Every span recorded while answering (pipeline stages, LLM calls) belongs to this query's trace
+    with get_telemetry().trace("query") as trace_id:
+        if st.session_state.improve_prompt:
+            with st.spinner('Improving prompt...'):
+                st.session_state.core_agent.add_extra_context_by_path(r'C:\streamlit_gui\LineTools_documentation.md')
+                prompt = st.session_state.core_agent.improve_user_prompt(prompt)
+            
+        # Display user message
+        st.chat_message("user", avatar=USER_AVATAR_PATH).markdown(prompt)
+        st.session_state.messages.append({"role": "user", "content": prompt})
         
-    # Display user message
-    st.chat_message("user", avatar=USER_AVATAR_PATH).markdown(prompt)
-    st.session_state.messages.append({"role": "user", "content": prompt})
-    
-    if st.session_state.model_mode:
-        response = process_user_query(st.session_state.messages)
-    else:
-        response = st.session_state.llm_model.invoke(st.session_state.messages).content
-    
-    with st.chat_message("assistant", avatar=ASSISTANT_AVATAR_PATH):
-        st.markdown(response)
+        if st.session_state.model_mode:
+            response_stream = process_user_query(st.session_state.messages)
+        else:
+            # The history is compacted to a token budget - older turns are summarized in the background
+            history = st.session_state.history_manager.compact(st.session_state.messages)
+            response_stream = (
+                chunk.content for chunk in st.session_state.llm_model.stream(
+                    history, config=get_telemetry().llm_config("chat")
+                )
+            )
+        
+        with st.chat_message("assistant", avatar=ASSISTANT_AVATAR_PATH):
+            response = st.write_stream(response_stream)
+            if st.session_state.model_mode and st.session_state.core_agent:
+                show_cache_status(st.session_state.core_agent, "code_query", "Answer")
     st.session_state.messages.append({"role": "assistant", "content": response})
-    # = None
-
+    st.session_state.last_trace_id = trace_id
+    render_query_breakdown(breakdown_panel, trace_id)
+    # = None
\ No newline at end of file
@@ -0,0 +1,9 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The GUI and langgraph modules import codeace from the source tree when it isn't installed
+for path in (ROOT, os.path.join(ROOT, "codeace_pkg", "src"), os.path.join(ROOT, "langgraph")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,168 @@
+import os
+import subprocess
+import time
+from unittest import mock
+
+import git
+import pytest
+
+from clone_manager import CloneManager
+
+
+def run_git(cwd, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout
+
+
+def write_file(root, rel_path, content):
+    path = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def list_files(root):
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if name != ".git"]
+        files.extend(os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, "/") for name in filenames)
+    return sorted(files)
+
+
+def wait(job, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not job.done:
+        assert time.monotonic() < deadline, f"{job.action} of {job.repo_path} did not finish"
+        time.sleep(0.02)
+    return job
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    """A local repository with two commits, cloned through its file:// URL"""
+    path = str(tmp_path / "upstream")
+    os.makedirs(path)
+    run_git(path, "init", "-q", "-b", "main")
+    # Partial clones of a local repository need the filter enabled on the serving side
+    run_git(path, "config", "uploadpack.allowFilter", "true")
+    write_file(path, ".gitignore", "*.log\n")
+    write_file(path, "README.md", "# Project\n")
+    write_file(path, "src/app.py", "print('app')\n")
+    write_file(path, "src/util.py", "VALUE = 1\n")
+    write_file(path, "data/blob.bin", "B" * 1000)
+    run_git(path, "add", ".")
+    run_git(path, "commit", "-qm", "first")
+    write_file(path, "src/util.py", "VALUE = 2\n")
+    run_git(path, "commit", "-qam", "second")
+    return path
+
+
+def file_url(path):
+    return "file://" + path.replace(os.sep, "/")
+
+
+def test_clone_is_shallow(upstream, tmp_path):
+    manager = CloneManager(str(tmp_path / "repos"))
+    job = wait(manager.start(file_url(upstream)))
+
+    repo_path = manager.get_repo_path(file_url(upstream))
+    assert job.status == "done", job.summary()
+    assert job.action == "clone"
+    assert os.path.exists(os.path.join(repo_path, ".git", "shallow"))
+    assert run_git(repo_path, "rev-list", "--count", "HEAD").strip() == "1"
+    assert list_files(repo_path) == [".gitignore", "README.md", "data/blob.bin", "src/app.py", "src/util.py"]
+    assert manager.is_managed(repo_path)
+
+
+def test_sparse_clone_checks_out_only_matching_files(upstream, tmp_path):
+    manager = CloneManager(str(tmp_path / "repos"), sparse_extensions=(".py",))
+    job = wait(manager.start(file_url(upstream)))
+
+    repo_path = manager.get_repo_path(file_url(upstream))
+    assert job.status == "done", job.summary()
+    assert list_files(repo_path) == [".gitignore", "src/app.py", "src/util.py"]
+    patterns = run_git(repo_path, "sparse-checkout", "list").split()
+    assert patterns == ["*.py"] + list(CloneManager.SPARSE_ALWAYS)
+
+
+@pytest.mark.parametrize("sparse_extensions", [None, (".py",)])
+def test_update_returns_changed_files(upstream, tmp_path, sparse_extensions):
+    manager = CloneManager(str(tmp_path / "repos"), sparse_extensions=sparse_extensions)
+    url = file_url(upstream)
+    wait(manager.start(url))
+    repo_path = manager.get_repo_path(url)
+
+    write_file(upstream, "src/app.py", "print('changed')\n")
+    write_file(upstream, "src/new.py", "NEW = True\n")
+    run_git(upstream, "rm", "-q", "src/util.py")
+    run_git(upstream, "add", ".")
+    run_git(upstream, "commit", "-qm", "third")
+
+    job = wait(manager.start(url))
+    assert job.action == "update"
+    assert job.status == "done", job.summary()
+    assert sorted(job.changed_files) == ["src/app.py", "src/new.py", "src/util.py"]
+    with open(os.path.join(repo_path, "src", "app.py"), encoding="utf-8") as f:
+        assert f.read() == "print('changed')\n"
+    assert not os.path.exists(os.path.join(repo_path, "src", "util.py"))
+
+    job = wait(manager.start_update(repo_path))
+    assert job.status == "done"
+    assert job.changed_files == []
+
+
+def test_update_of_diverged_clone_fails(upstream, tmp_path):
+    manager = CloneManager(str(tmp_path / "repos"))
+    url = file_url(upstream)
+    wait(manager.start(url))
+    repo_path = manager.get_repo_path(url)
+
+    write_file(repo_path, "src/app.py", "print('local')\n")
+    run_git(repo_path, "commit", "-qam", "local")
+    write_file(upstream, "src/app.py", "print('upstream')\n")
+    run_git(upstream, "commit", "-qam", "upstream")
+
+    job = wait(manager.start_update(repo_path))
+    assert job.status == "failed"
+    with open(os.path.join(repo_path, "src", "app.py"), encoding="utf-8") as f:
+        assert f.read() == "print('local')\n"
+
+
+def test_failed_checkout_leaves_no_repository(upstream, tmp_path):
+    repos_dir = tmp_path / "repos"
+    manager = CloneManager(str(repos_dir), sparse_extensions=(".py",))
+    url = file_url(upstream)
+    repo_path = manager.get_repo_path(url)
+
+    error = git.GitCommandError("checkout", 128)
+    with mock.patch.object(git.Repo, "git", new_callable=mock.PropertyMock) as repo_git:
+        repo_git.return_value.checkout.side_effect = error
+        job = wait(manager.start(url))
+    assert job.status == "failed"
+    assert job.error is error
+    assert not os.path.exists(repo_path)
+    assert os.listdir(repos_dir) == []
+
+    # The next start clones again instead of taking the failed clone as up to date
+    job = wait(manager.start(url))
+    assert job.action == "clone"
+    assert job.status == "done", job.summary()
+    assert list_files(repo_path) == [".gitignore", "src/app.py", "src/util.py"]
+
+
+def test_interrupted_clone_is_replaced(upstream, tmp_path):
+    manager = CloneManager(str(tmp_path / "repos"))
+    url = file_url(upstream)
+    repo_path = manager.get_repo_path(url)
+    # What a process killed during a clone leaves behind
+    partial_path = os.path.join(os.path.dirname(repo_path), f".{os.path.basename(repo_path)}.partial")
+    os.makedirs(os.path.join(partial_path, ".git"))
+    os.makedirs(repo_path)
+
+    job = wait(manager.start(url))
+    assert job.action == "clone"
+    assert job.status == "done", job.summary()
+    assert not os.path.exists(partial_path)
+    assert "src/app.py" in list_files(repo_path)
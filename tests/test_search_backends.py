@@ -0,0 +1,142 @@
+import json
+import time
+from unittest import mock
+
+import pytest
+
+import search_backends
+from search_backends import (
+    LocalSearchBackend, SearchBackend, SearchResultsCache, SearchResultsTrimmer, get_search_backend, get_search_cache
+)
+
+
+DOCUMENTS = [
+    {
+        "title": "Flashing the firmware",
+        "url": "https://example.com/flash",
+        "content": "The board boots from SPI flash. Use the bootloader to flash a firmware image. "
+                   "Power cycle the board afterwards. The serial console prints the boot log.",
+    },
+    {
+        "title": "Power management",
+        "url": "https://example.com/power",
+        "content": "Sleep states are configured in the power controller. Wake sources include the RTC.",
+    },
+    {
+        "title": "Release notes",
+        "url": "https://example.com/notes",
+        "content": "This release updates the firmware bootloader and fixes the serial console.",
+    },
+]
+
+
+@pytest.fixture
+def backend(tmp_path):
+    path = tmp_path / "documents.json"
+    path.write_text(json.dumps(DOCUMENTS), encoding="utf-8")
+    return LocalSearchBackend(str(path))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SearchResultsCache(str(tmp_path / "cache" / "search_cache.db"))
+
+
+def test_local_backend_ranks_by_term_overlap(backend):
+    results = backend.search("flash the firmware image", max_results=5)
+    assert [result["url"] for result in results] == ["https://example.com/flash", "https://example.com/notes"]
+    assert backend.search("flash the firmware image", max_results=1) == results[:1]
+    assert backend.search("unrelated words", max_results=5) == []
+
+
+def test_backend_without_search_cannot_be_created():
+    class IncompleteBackend(SearchBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        IncompleteBackend()
+
+
+def test_search_backend_override(monkeypatch, tmp_path):
+    monkeypatch.setenv("CODEACE_SEARCH_BACKEND", "local")
+    monkeypatch.setattr(search_backends, "_backends", {})
+    assert isinstance(get_search_backend("tavily"), LocalSearchBackend)
+
+    monkeypatch.setenv("CODEACE_SEARCH_BACKEND", "unknown")
+    with pytest.raises(ValueError):
+        get_search_backend("tavily")
+
+
+def test_cache_hit(backend, cache):
+    with mock.patch.object(backend, "search", wraps=backend.search) as search:
+        first = cache.search(backend, "flash firmware", max_results=3, ttl=60)
+        second = cache.search(backend, "flash firmware", max_results=3, ttl=60)
+    assert search.call_count == 1
+    assert second == first
+    assert first[0]["url"] == "https://example.com/flash"
+
+
+def test_cache_key_normalization(backend, cache):
+    with mock.patch.object(backend, "search", wraps=backend.search) as search:
+        cache.search(backend, "Flash  Firmware", max_results=3, ttl=60)
+        cache.search(backend, "  flash firmware\n", max_results=3, ttl=60)
+        assert search.call_count == 1
+        # The result count and the query terms are part of the key
+        cache.search(backend, "flash firmware", max_results=1, ttl=60)
+        cache.search(backend, "firmware flash", max_results=3, ttl=60)
+        assert search.call_count == 3
+
+
+def test_cache_ttl_expiry(backend, cache):
+    now = time.time()
+    with mock.patch.object(backend, "search", wraps=backend.search) as search, \
+            mock.patch("codeace.managers.cache_manager.time.time") as clock:
+        clock.return_value = now
+        cache.search(backend, "power sleep", max_results=3, ttl=60)
+        clock.return_value = now + 59
+        cache.search(backend, "power sleep", max_results=3, ttl=60)
+        assert search.call_count == 1
+        clock.return_value = now + 61
+        cache.search(backend, "power sleep", max_results=3, ttl=60)
+        assert search.call_count == 2
+
+
+def test_search_cache_is_created_on_first_use(monkeypatch, tmp_path):
+    db_path = tmp_path / "app_data" / "search_cache.db"
+    monkeypatch.setenv("CODEACE_SEARCH_CACHE_PATH", str(db_path))
+    monkeypatch.setattr(search_backends, "_search_cache", None)
+    assert not db_path.parent.exists()
+
+    cache = get_search_cache()
+    assert get_search_cache() is cache
+    assert db_path.exists()
+
+
+@pytest.mark.parametrize("max_tokens", [40, 120, 400])
+def test_trimmed_results_fit_the_budget(backend, max_tokens):
+    trimmer = SearchResultsTrimmer(max_tokens=max_tokens, snippets_per_result=2)
+    query = "flash the firmware"
+    results = backend.search(query, max_results=5) + backend.search("power", max_results=1)
+    trimmed = trimmer.trim(query, results)
+
+    assert [(result["title"], result["url"]) for result in trimmed] == [
+        (result["title"], result["url"]) for result in results
+    ]
+    share = max_tokens // len(results)
+    for result in trimmed:
+        header_tokens = len(trimmer.tokenizer.encode(f"{result['title']}\n{result['url']}\n"))
+        content = result["content"]
+        # Truncated content is marked with "..."
+        if content.endswith("..."):
+            content = content[:-3]
+        assert len(trimmer.tokenizer.encode(content)) <= max(share - header_tokens, 0)
+    assert trimmer.trim(query, []) == []
+
+
+def test_trim_keeps_the_best_snippets_in_order():
+    trimmer = SearchResultsTrimmer(max_tokens=1000, snippets_per_result=2)
+    content = DOCUMENTS[0]["content"]
+    trimmed = trimmer.trim_content("flash the firmware with the bootloader", content, 1000)
+    assert trimmed == "The board boots from SPI flash. ... Use the bootloader to flash a firmware image."
+    assert trimmer.trim_content("flash", content, 0) == ""
+    assert trimmer.trim_content("flash", "", 100) == ""